@@ -1,12 +1,74 @@
 import streamlit as st
-from auth_utils import register_user, login_user, send_reset_code, verify_reset_code, update_password
+from auth_utils import register_user, login_user, send_reset_code, verify_reset_code, update_user_password
 from Login import login_ui
-from forecast_module import run_forecasting_pipeline
+from forecast_module import evaluation_key, start_model_evaluation, get_model_evaluation
+from forecast_jobs import submit_forecast_job, job_status, job_progress, job_result
+from forecast_cache import CACHE_DIR, get_forecast_cache
+from model_store import ModelStore
+from model_registry import get_model_registry
+from revenue_ledger import RevenueLedger
+from revenue_cube import MEASURES, RevenueCube, build_revenue_cube
+from model_utils import MONTHLY_REVENUE_COLUMNS
+from session_store import write_table, read_table, clear_session, session_file
+from export import EXPORT_FORMATS, export_table
+from dashboard_utils import DASHBOARD_COLUMNS, FilterIndex, compute_metrics, chart_data, forecast_window
+from profiler import PROFILE_ENABLED, Profiler, profiling, stage
+from upload import MACRO_SCHEMA, REVENUE_SCHEMA, inspect_upload
 import pandas as pd
 import numpy as np
+import os
+import hashlib
+import uuid
+import contextlib
+import time
+import tracemalloc
+
+# Worker processes used to fit the per-stream forecasts (defaults to every core)
+FORECAST_WORKERS = int(os.environ.get("FINOPTIX_FORECAST_WORKERS", os.cpu_count() or 1))
+# Forecaster behind the pipeline: "prophet" or the batched NumPy "linear" engine
+FORECAST_ENGINE = os.environ.get("FINOPTIX_FORECAST_ENGINE", "prophet")
+# How future regressor values are extrapolated: "last" value or "drift"
+REGRESSOR_EXTRAPOLATION = os.environ.get("FINOPTIX_REGRESSOR_EXTRAPOLATION", "last")
+# Seconds between progress refreshes while a forecast job runs
+JOB_POLL_SECONDS = 1.0
 
 st.set_page_config(page_title="FinOptix", layout="wide")
 
+# Traced once for the whole server so concurrent sessions never stop each other's tracing
+if PROFILE_ENABLED and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+def profiled():
+    # Stages inside this block are recorded into the session's profiler when
+    # FINOPTIX_PROFILE is set, and cost nothing otherwise
+    if not PROFILE_ENABLED:
+        return contextlib.nullcontext()
+    if "profiler" not in st.session_state:
+        st.session_state.profiler = Profiler()
+    return profiling(st.session_state.profiler, trace_memory=False)
+
+# Session state that points at (or was derived from) this session's tables. The
+# tables go away on logout, or when prune_sessions removes a session left idle past
+# FINOPTIX_SESSION_TTL_HOURS, possibly while its tab is still open.
+SESSION_DATA_KEYS = ["combined_path", "filter_index", "forecast_results", "performance_results", "evaluation_key",
+                     "monthly_revenue_path", "macro_path", "revenue_file_id", "macro_file_id",
+                     "revenue_preview", "macro_preview", "ingest_stats", "cube_path", "export"]
+
+
+def restart_expired_session():
+    # The session's tables were pruned: forget them and start again from the upload page
+    for key in SESSION_DATA_KEYS:
+        st.session_state.pop(key, None)
+    st.session_state.session_notice = "⌛ This session was idle for too long and its results were removed. " \
+                                      "Please upload your data again."
+    st.session_state.page = "upload"
+    st.rerun()
+
+def user_dir(kind):
+    # Per-user directory under the cache, e.g. fitted parameters or saved revenue history
+    return os.path.join(CACHE_DIR, kind, hashlib.sha1(st.session_state.user_email.encode()).hexdigest())
+
 # === Initialize session state ===
 for key, default in {
     "trigger_signup": False,
@@ -14,7 +76,8 @@ for key, default in {
     "page": "login",
     "user_email": "",
     "first_name": "",
-    "reset_email": ""
+    "reset_email": "",
+    "session_id": uuid.uuid4().hex
 }.items():
     if key not in st.session_state:
         st.session_state[key] = default
@@ -81,45 +144,94 @@ elif st.session_state.page == "new_password":
         elif len(new_pwd) < 6:
             st.warning("Password must be at least 6 characters.")
         else:
-            update_password(st.session_state.reset_email, new_pwd)
+            update_user_password(st.session_state.reset_email, new_pwd)
             st.success("Password updated successfully!")
             st.session_state.page = "login"
 
 # === Upload Page ===
 elif st.session_state.page == "upload":
     st.title("Revenue Forecast Dashboard")
+    if "session_notice" in st.session_state:
+        st.warning(st.session_state.pop("session_notice"))
     with st.sidebar:
         st.markdown("## 📁 Upload Required Data")
         revenue_file = st.file_uploader(" Upload Revenue Data (CSV)", type="csv", key="revenue_file")
         macro_file = st.file_uploader(" Upload Macroeconomic Data (CSV)", type="csv", key="macro_file")
+        append_revenue = st.checkbox(
+            "Append to saved revenue history", key="append_revenue",
+            help="Merge the revenue file into your saved history (orders already in it are skipped), "
+                 "so only new orders need uploading. Unticked, the file replaces the history for this run."
+        )
 
-    required_revenue_cols = {"Order Date", "Unit Price", "Quantity", "Revenue Stream"}
-    required_macro_cols = {"Order Date", "Exchange Rate", "Inflation Rate"}
+        cache_stats = get_forecast_cache().stats()
+        st.caption(f"Forecast cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                   f"({cache_stats['entries']} stored runs)")
 
     revenue_valid = False
     macro_valid = False
 
+    # Headers and dtypes are checked on the first block of each file and the result is
+    # memoized per file hash (see upload.py), so reruns never parse the upload again.
+    # Valid files are then converted once per distinct content.
     if revenue_file:
         try:
-            revenue_df = pd.read_csv(revenue_file)
-            if required_revenue_cols.issubset(revenue_df.columns):
-                st.session_state.revenue_df = revenue_df
+            # Streamed once into the day x stream x product cube (row-level orders are never
+            # held in memory); the forecast input is its monthly roll-up
+            with profiled(), stage("validate_revenue"):
+                revenue_check = inspect_upload(revenue_file, REVENUE_SCHEMA)
+            if revenue_check.valid:
+                revenue_file_id = (revenue_check.digest, append_revenue)
+                if st.session_state.get("revenue_file_id") != revenue_file_id:
+                    revenue_file.seek(0)
+                    if append_revenue:
+                        # Delta ingest: only new orders are folded into the saved
+                        # day x stream x product cube; unchanged streams are not refit
+                        ledger = RevenueLedger(user_dir("ledgers"))
+                        with profiled(), stage("ingest_revenue"):
+                            st.session_state.ingest_stats = ledger.ingest(revenue_file)
+                            cube = ledger.cube
+                    else:
+                        st.session_state.pop("ingest_stats", None)
+                        with profiled(), stage("upload_revenue"):
+                            cube = build_revenue_cube(revenue_file)
+                    st.session_state.monthly_revenue_path = write_table(
+                        cube.monthly_revenue(), st.session_state.session_id, "monthly_revenue"
+                    )
+                    st.session_state.cube_path = cube.save(
+                        session_file(st.session_state.session_id, "revenue_cube.npz")
+                    )
+                    st.session_state.revenue_file_id = revenue_file_id
+                st.session_state.revenue_preview = revenue_check.preview
+                if "ingest_stats" in st.session_state:
+                    stats = st.session_state.ingest_stats
+                    st.info(f"➕ Merged {stats['new']:,} new orders into your saved history "
+                            f"({stats['duplicates']:,} already there); "
+                            f"{len(stats['touched']):,} month × stream totals updated.")
                 revenue_valid = True
             else:
-                missing = required_revenue_cols - set(revenue_df.columns)
-                st.error(f"❌ Revenue data missing columns: {', '.join(missing)}")
+                for error in revenue_check.errors:
+                    st.error(f"❌ Revenue data {error}")
         except Exception as e:
             st.error(f"🚫 Error reading Revenue file: {e}")
 
     if macro_file:
         try:
-            macro_df = pd.read_csv(macro_file)
-            if required_macro_cols.issubset(macro_df.columns):
-                st.session_state.macro_df = macro_df
+            with profiled(), stage("validate_macro"):
+                macro_check = inspect_upload(macro_file, MACRO_SCHEMA)
+            if macro_check.valid:
+                if st.session_state.get("macro_file_id") != macro_check.digest:
+                    macro_file.seek(0)
+                    with profiled(), stage("upload_macro"):
+                        st.session_state.macro_path = write_table(
+                            pd.read_csv(macro_file, usecols=list(MACRO_SCHEMA)),
+                            st.session_state.session_id, "macro"
+                        )
+                    st.session_state.macro_file_id = macro_check.digest
+                st.session_state.macro_preview = macro_check.preview
                 macro_valid = True
             else:
-                missing = required_macro_cols - set(macro_df.columns)
-                st.error(f"❌ Macroeconomic data missing columns: {', '.join(missing)}")
+                for error in macro_check.errors:
+                    st.error(f"❌ Macroeconomic data {error}")
         except Exception as e:
             st.error(f"🚫 Error reading Macroeconomic file: {e}")
 
@@ -127,48 +239,110 @@ elif st.session_state.page == "upload":
         st.success("✅ All required data uploaded and validated.")
 
         with st.expander("📄 Preview Revenue Data"):
-            st.dataframe(st.session_state.revenue_df.head(), use_container_width=True)
+            st.dataframe(st.session_state.revenue_preview.head(), use_container_width=True)
 
         with st.expander("📄 Preview Macroeconomic Data"):
-            st.dataframe(st.session_state.macro_df.head(), use_container_width=True)
+            st.dataframe(st.session_state.macro_preview.head(), use_container_width=True)
 
         if st.button("Go to Dashboard"):
-            with st.spinner("⏳ Running forecasting model..."):
-                try:
-                    forecast_results, performance_results, combined_df = run_forecasting_pipeline(
-                        st.session_state.revenue_df,
-                        st.session_state.macro_df  # ✅ this line was previously truncated
-                    )
-
-                    st.session_state.page = "dashboard"
-                    st.session_state.forecast_results = forecast_results
-                    st.session_state.performance_results = performance_results
-                    st.session_state.combined_df = combined_df
-                    st.session_state.first_name = ["first_name"]
-                    st.rerun()
-
-                except Exception as e:
-                    st.error(f"❌ Forecasting failed: {e}")
+            if not all(os.path.exists(st.session_state.get(key, "")) for key in ("monthly_revenue_path", "macro_path")):
+                restart_expired_session()
+            try:
+                monthly_revenue = read_table(st.session_state.monthly_revenue_path, columns=MONTHLY_REVENUE_COLUMNS)
+                profiler = None
+                if PROFILE_ENABLED:
+                    profiler = st.session_state.profiler = st.session_state.get("profiler") or Profiler()
+                # Runs on the job pool: reruns and refreshes don't stop it, and the same
+                # upload submitted from another session joins this run
+                job_id = submit_forecast_job(
+                    monthly_revenue,
+                    # ✅ this line was previously truncated
+                    read_table(st.session_state.macro_path, columns=list(MACRO_SCHEMA)),
+                    profiler=profiler,
+                    n_jobs=FORECAST_WORKERS,
+                    engine=FORECAST_ENGINE,
+                    extrapolation=REGRESSOR_EXTRAPOLATION,
+                    cache=get_forecast_cache(),
+                    evaluation="background",
+                    # Per-stream fits shared by every session, kept across logouts
+                    registry=get_model_registry(),
+                    # Per-user fitted parameters: next month's upload only refits changed streams
+                    model_store=ModelStore(user_dir("models"))
+                )
+                st.session_state.forecast_job = {
+                    "id": job_id, "evaluation_key": evaluation_key(monthly_revenue, FORECAST_ENGINE)
+                }
+            except Exception as e:
+                st.error(f"❌ Forecasting failed: {e}")
+
+    # === Forecast Job Progress ===
+    forecast_job = st.session_state.get("forecast_job")
+    if forecast_job:
+        status = job_status(forecast_job["id"])
+        if status is None or status["state"] == "interrupted":
+            st.warning("⚠️ The forecasting run was interrupted. Click \"Go to Dashboard\" to start it again.")
+            st.session_state.pop("forecast_job")
+        elif status["state"] == "failed":
+            st.error(f"❌ Forecasting failed: {status['error']}")
+            st.session_state.pop("forecast_job")
+        elif status["state"] == "done":
+            result = job_result(forecast_job["id"])
+            if result is None:
+                st.error("❌ Forecasting failed: the results of this run could not be loaded.")
+                st.session_state.pop("forecast_job")
+            else:
+                forecast_results, performance_results, combined_df = result
+                st.session_state.page = "dashboard"
+                st.session_state.forecast_results = forecast_results
+                st.session_state.performance_results = performance_results
+                st.session_state.combined_path = write_table(
+                    combined_df, st.session_state.session_id, "combined"
+                )
+                st.session_state.pop("export", None)  # prepared for the previous results
+                # Row offsets for every Month/Year/Stream filter combination
+                st.session_state.filter_index = FilterIndex(combined_df)
+                if performance_results is None:
+                    st.session_state.evaluation_key = forecast_job["evaluation_key"]
+                st.session_state.first_name = ["first_name"]
+                st.session_state.pop("forecast_job")
+                st.rerun()
+        else:
+            st.progress(job_progress(status), text=f"⏳ Running forecasting model ({status['state']})...")
+            with st.expander("📈 Progress by Stream"):
+                st.dataframe(
+                    pd.DataFrame(list(status["streams"].items()), columns=["Revenue Stream", "Status"]),
+                    use_container_width=True, hide_index=True
+                )
+            time.sleep(JOB_POLL_SECONDS)
+            st.rerun()
 
 # Dashboard page UI
 elif st.session_state.page == "dashboard":
     st.title("Revenue Forecast Dashboard")
 
 
-    combined_df = st.session_state.combined_df.copy()
-    performance_df = st.session_state.performance_results.copy()
+    if not os.path.exists(st.session_state.combined_path):
+        restart_expired_session()
+    # Memory-mapped on every rerun, only the columns the dashboard shows; filters below
+    # build new frames, so no defensive copy
+    combined_df = read_table(st.session_state.combined_path, columns=DASHBOARD_COLUMNS)
+
+    # Cross-validation metrics are computed in the background; pick them up once ready
+    performance_df = st.session_state.performance_results
+    evaluation_status = "done"
+    if performance_df is None:
+        evaluation_status, performance_df = get_model_evaluation(st.session_state.evaluation_key)
+        if evaluation_status == "missing" and "monthly_revenue_path" in st.session_state:
+            monthly_revenue = read_table(st.session_state.monthly_revenue_path, columns=MONTHLY_REVENUE_COLUMNS)
+            start_model_evaluation(monthly_revenue, key=st.session_state.evaluation_key, engine=FORECAST_ENGINE)
+            evaluation_status = "pending"
+        st.session_state.performance_results = performance_df
 
     # === Sidebar Filters ===
     st.sidebar.header("🔍 Filter Forecast Results")
 
-    month_order = ["January", "February", "March", "April", "May", "June",
-                   "July", "August", "September", "October", "November", "December"]
-    unique_months = combined_df['Date'].dt.month_name().unique()
-    ordered_months = [m for m in month_order if m in unique_months]
-    month_options = ["All"] + ordered_months
-
-    year_options = ["All"] + sorted(combined_df['Date'].dt.year.unique().astype(str))
-    stream_options = ["All"] + sorted(combined_df["Revenue Stream"].unique())
+    filter_index = st.session_state.filter_index
+    month_options, year_options, stream_options = filter_index.options()
 
     forecast_horizon = st.sidebar.slider("Select Forecast Horizon (months into future)", 1, 12, 6)
 
@@ -189,14 +363,7 @@ elif st.session_state.page == "dashboard":
     st.session_state.selected_stream = selected_stream
 
     # === Apply Filters ===
-    filtered_df = combined_df.copy()
-
-    if selected_month != "All":
-        filtered_df = filtered_df[filtered_df['Date'].dt.month_name() == selected_month]
-    if selected_year != "All":
-        filtered_df = filtered_df[filtered_df['Date'].dt.year.astype(str) == selected_year]
-    if selected_stream != "All":
-        filtered_df = filtered_df[filtered_df["Revenue Stream"] == selected_stream]
+    filtered_df = filter_index.select(combined_df, selected_month, selected_year, selected_stream)
 
    # === Divider Function ===
     def blue_divider():
@@ -207,21 +374,10 @@ elif st.session_state.page == "dashboard":
 
   # === Metrics Section ===
     st.subheader("Metrics")
-    filtered_df["Revenue"] = filtered_df["Actual Revenue"].fillna(filtered_df["Forecasted Revenue"])
-    total_revenue = filtered_df["Revenue"].sum()
-
-    df_with_actuals = filtered_df.dropna(subset=["Actual Revenue"])
-    if not df_with_actuals.empty:
-        accuracy = 100 - (abs(df_with_actuals["Forecasted Revenue"] - df_with_actuals["Actual Revenue"]) / df_with_actuals["Actual Revenue"] * 100).mean()
-    else:
-        accuracy = 0
-
-    # Calculate growth rate
-    rev_series = filtered_df.sort_values("Date")["Revenue"]
-    if len(rev_series) >= 2:
-        growth_rate = ((rev_series.iloc[-1] - rev_series.iloc[0]) / rev_series.iloc[0]) * 100 if rev_series.iloc[0] != 0 else 0
-    else:
-        growth_rate = 0
+    metrics = compute_metrics(filtered_df)
+    total_revenue = metrics["total_revenue"]
+    accuracy = metrics["accuracy"]
+    growth_rate = metrics["growth_rate"]
 
     # Determine color and arrow
     if growth_rate > 0:
@@ -256,13 +412,10 @@ elif st.session_state.page == "dashboard":
     st.subheader("Revenue Trend(USD)")
 
     # Prepare the data
-    filtered_df["Revenue"] = filtered_df["Actual Revenue"].fillna(filtered_df["Forecasted Revenue"])
-    filtered_df["Lower Bound"] = filtered_df.apply(lambda row: row["Lower Estimate"] if pd.isna(row["Actual Revenue"]) else None, axis=1)
-    filtered_df["Upper Bound"] = filtered_df.apply(lambda row: row["Upper Estimate"] if pd.isna(row["Actual Revenue"]) else None, axis=1)
-    filtered_df = filtered_df.sort_values("Date")
+    chart_df = chart_data(filtered_df)
 
     # === Create base chart ===
-    base = alt.Chart(filtered_df).encode(
+    base = alt.Chart(chart_df).encode(
         x=alt.X("Date:T", title="Month"),
         tooltip=["Date:T", "Revenue:Q"]
     )
@@ -285,7 +438,7 @@ elif st.session_state.page == "dashboard":
     )
 
     # === Confidence interval area ===
-    confidence = alt.Chart(filtered_df).mark_area(
+    confidence = alt.Chart(chart_df).mark_area(
         color="#aec7e8",
         opacity=0.3
     ).encode(
@@ -311,46 +464,135 @@ elif st.session_state.page == "dashboard":
     # ==============================================
     st.subheader("Total Revenue by Stream")
 
-    pivot_df = filtered_df.copy()
+    pivot_output = forecast_window(filtered_df, forecast_horizon)
 
-    # Get latest date with actual revenue, if it exists
-    latest_actual_date = pivot_df[pivot_df["Actual Revenue"].notna()]["Date"].max()
+    st.dataframe(pivot_output, use_container_width=True)
 
-    if pd.notna(latest_actual_date):
-        forecast_start_date = latest_actual_date + pd.DateOffset(months=1)
-        forecast_end_date = forecast_start_date + pd.DateOffset(months=forecast_horizon - 1)
-        pivot_df = pivot_df[(pivot_df["Date"] >= forecast_start_date) & (pivot_df["Date"] <= forecast_end_date)]
-    else:
-        # No actual revenue available — show all forecasted records instead
-        pivot_df = pivot_df[pivot_df["Forecasted Revenue"].notna()]
+    # === Export ===
+    # Files are only written when "Prepare Export" is clicked, streamed to the session
+    # directory (constant-memory xlsx, chunked CSV, Parquet row groups), and offered
+    # for download while the same selection stays active
+    export_scopes = {
+        "Revenue by stream table": "revenue_forecast_by_stream",
+        "Full forecast data (one sheet per stream)": "revenue_forecast_all_streams",
+    }
+    col_scope, col_format = st.columns(2)
+    export_scope = col_scope.selectbox("Export", list(export_scopes))
+    export_format = col_format.selectbox("Format", list(EXPORT_FORMATS))
+    export_name = f"{export_scopes[export_scope]}.{export_format}"
+    full_export = export_scope != "Revenue by stream table"
+    export_key = (export_scope, export_format) if full_export else (
+        export_scope, export_format, selected_month, selected_year, selected_stream, forecast_horizon
+    )
 
-    # Prepare output
-    pivot_output = pivot_df[["Date", "Revenue Stream", "Forecasted Revenue", "Lower Estimate", "Upper Estimate"]].sort_values("Date")
+    # Only offer an export if there's something to export
+    if full_export or not pivot_output.empty:
+        if st.button("Prepare Export"):
+            if full_export and not os.path.exists(st.session_state.combined_path):
+                restart_expired_session()
+            with st.spinner("⏳ Writing export..."), profiled(), stage("export"):
+                export_path = export_table(
+                    read_table(st.session_state.combined_path) if full_export else pivot_output,
+                    session_file(st.session_state.session_id, export_name),
+                    export_format,
+                    by="Revenue Stream" if full_export else None,
+                    sheet="Forecast by Stream",
+                )
+            st.session_state.export = {"key": export_key, "path": export_path}
+
+        prepared = st.session_state.get("export")
+        if prepared and prepared["key"] == export_key and os.path.exists(prepared["path"]):
+            with open(prepared["path"], "rb") as f:
+                st.download_button(
+                    label="Download Revenue Forecast",
+                    data=f,
+                    file_name=export_name,
+                    mime=EXPORT_FORMATS[export_format]
+                )
 
-    st.dataframe(pivot_output, use_container_width=True)
 
-    from io import BytesIO
-    import pandas as pd
-
-    # Function to convert DataFrame to Excel format
-    def convert_df_to_excel(df):
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df.to_excel(writer, index=False, sheet_name='Forecast by Stream')
-        processed_data = output.getvalue()
-        return processed_data
-
-    # Only show download button if there's something to export
-    if not pivot_output.empty:
-        excel_data = convert_df_to_excel(pivot_output)
-
-        st.download_button(
-            label="Download Revenue Forecast Table",
-            data=excel_data,
-            file_name='revenue_forecast_by_stream.xlsx',
-            mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
+    blue_divider()
 
+    # ==============================================
+    # ===== Revenue History Drill-Down =============
+    # ==============================================
+    # Answered from the cube built at upload (day x stream x product totals), so any
+    # granularity or breakdown is a roll-up of its cells, never a re-group of the orders.
+    # The sidebar year and stream filters apply; pick a stream and break down by
+    # product to drill into it.
+    st.subheader("Revenue History Drill-Down")
+
+    cube_path = st.session_state.get("cube_path")
+    if cube_path and os.path.exists(cube_path):
+        cube = RevenueCube.load(cube_path)
+        col_grain, col_by, col_measure = st.columns(3)
+        grain = col_grain.selectbox("Granularity", ["Day", "Week", "Month", "Quarter"], index=2)
+        breakdown = col_by.selectbox("Break down by", ["Revenue Stream", "Product Name", "Total"])
+        measure = col_measure.selectbox("Measure", list(MEASURES))
+
+        with profiled(), stage("cube_query"):
+            history = cube.query(
+                grain.lower(),
+                by=() if breakdown == "Total" else (breakdown,),
+                streams=None if selected_stream == "All" else [selected_stream],
+                start=None if selected_year == "All" else f"{selected_year}-01-01",
+                end=None if selected_year == "All" else f"{selected_year}-12-31",
+            )
+
+        if history.empty:
+            st.warning("No revenue history for this selection.")
+        else:
+            encoding = {"x": alt.X("ds:T", title=grain), "y": alt.Y(f"{measure}:Q", title=measure),
+                        "tooltip": ["ds:T", f"{measure}:Q"]}
+            if breakdown != "Total":
+                encoding["color"] = alt.Color(f"{breakdown}:N", title=breakdown)
+                encoding["tooltip"] = ["ds:T", f"{breakdown}:N", f"{measure}:Q"]
+            st.altair_chart(alt.Chart(history).mark_line(strokeWidth=1.5).encode(**encoding),
+                            use_container_width=True)
+            with st.expander("📄 Drill-Down Table"):
+                st.dataframe(history.rename(columns={"ds": grain}), use_container_width=True)
+    else:
+        st.info("Upload the revenue file again to explore its history.")
+
+    blue_divider()
+
+    # ==============================================
+    # ===== Model Evaluation Section ===============
+    # ==============================================
+    st.subheader("Model Evaluation (Cross-Validation)")
+
+    if evaluation_status == "pending":
+        st.info("⏳ Metrics pending — cross-validation is still running in the background.")
+        if st.button("🔄 Refresh Metrics"):
+            st.rerun()
+    elif evaluation_status == "failed":
+        st.error("❌ Cross-validation failed. Forecasts above are unaffected.")
+    elif performance_df is not None and not performance_df.empty:
+        metric_cols = [c for c in ["mape", "mae", "rmse"] if c in performance_df.columns]
+        stream_metrics = performance_df.groupby("Revenue Stream")[metric_cols].mean().reset_index()
+        st.dataframe(stream_metrics, use_container_width=True)
+        with st.expander("📄 Metrics by Forecast Horizon"):
+            st.dataframe(performance_df, use_container_width=True)
+    else:
+        st.warning("No cross-validation metrics available for this dataset.")
+
+    # === Performance Panel (FINOPTIX_PROFILE=1) ===
+    if PROFILE_ENABLED and "profiler" in st.session_state:
+        profiler = st.session_state.profiler
+        with st.expander("⏱️ Performance"):
+            st.dataframe(profiler.summary(), use_container_width=True)
+            records = profiler.to_frame()
+            per_stream = records[records["stream"].notna()]
+            if not per_stream.empty:
+                st.dataframe(
+                    per_stream.pivot_table(index="stream", columns="stage", values="wall_s", aggfunc="sum"),
+                    use_container_width=True
+                )
+            col_json, col_csv = st.columns(2)
+            col_json.download_button("Download timings (JSON)", profiler.to_json(),
+                                     file_name="finoptix_timings.json", mime="application/json")
+            col_csv.download_button("Download timings (CSV)", profiler.to_csv(),
+                                    file_name="finoptix_timings.csv", mime="text/csv")
 
     blue_divider()
 
@@ -365,8 +607,9 @@ elif st.session_state.page == "dashboard":
 
     with col_logout:
         if st.button("🚪 Log Out"):
-            keys_to_clear = ["first_name", "page", "combined_df", "performance_results", 
-                             "selected_month", "selected_year", "selected_stream"]
+            keys_to_clear = ["first_name", "page", *SESSION_DATA_KEYS,
+                             "selected_month", "selected_year", "selected_stream", "profiler", "forecast_job"]
+            clear_session(st.session_state.session_id)
             for key in keys_to_clear:
                 st.session_state.pop(key, None)
             st.session_state.page = "login"
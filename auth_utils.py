@@ -1,96 +1,70 @@
-import json
-import os
-import random
-import smtplib
+import math
 
-USERS_FILE = "users.json"
-RESET_CODES_FILE = "reset_codes.json"
-
-# === Load & Save Users ===
-def load_users():
-    if not os.path.exists(USERS_FILE):
-        with open(USERS_FILE, "w") as f:
-            json.dump({}, f)
-        return {}
-    with open(USERS_FILE, "r") as f:
-        try:
-            return json.load(f)
-        except json.JSONDecodeError:
-            return {}
-
-def save_users(users):
-    with open(USERS_FILE, "w") as f:
-        json.dump(users, f, indent=4)
+from mailer import get_email_queue
+from passwords import check_password, hash_password_pooled, login_throttle
+from reset_codes import RESET_CODE_TTL_SECONDS, get_reset_code_store
+from user_store import get_user_store
 
 # === Register & Login ===
+# Users live in the pluggable store from user_store.py (SQLite by default,
+# migrated from users.json), so each call touches one user instead of the whole file.
+# Passwords are stored as salted PBKDF2 hashes (see passwords.py).
 def register_user(first_name, last_name, email, password):
-    users = load_users()
-    if email in users:
+    if get_user_store().get(email) is not None:
         return False, "Email already exists!"
-    users[email] = {
+    added = get_user_store().add(email, {
         "first_name": first_name,
         "last_name": last_name,
-        "password": password
-    }
-    save_users(users)
+        "password": hash_password_pooled(password)
+    })
+    if not added:
+        return False, "Email already exists!"
     return True, "Registration successful!"
 
 def login_user(email, password):
-    users = load_users()
-    if email in users and users[email]["password"] == password:
-        first_name = users[email].get("first_name", "User")
-        return True, f"Welcome back, {first_name}!", first_name
-    return False, "Invalid email or password.", None
+    retry_after = login_throttle.retry_after(email)
+    if retry_after:
+        minutes = math.ceil(retry_after / 60)
+        return False, f"Too many failed attempts. Try again in {minutes} minute(s).", None
+
+    user = get_user_store().get(email)
+    ok, needs_rehash = (False, False) if user is None else check_password(email, password, user["password"])
+    if not ok:
+        login_throttle.failure(email)
+        return False, "Invalid email or password.", None
+
+    login_throttle.success(email)
+    if needs_rehash:
+        # legacy plaintext or an older work factor: upgrade while we have the password
+        get_user_store().update(email, password=hash_password_pooled(password))
+    first_name = user.get("first_name", "User")
+    return True, f"Welcome back, {first_name}!", first_name
 
 # === Forgot Password Utilities ===
+# Codes expire and allow a limited number of guesses (see reset_codes.py); the mail
+# is queued and sent in the background, so the click returns immediately
 def send_reset_code(email):
-    users = load_users()
-    if email not in users:
+    if get_user_store().get(email) is None:
         return False, "Email not found."
 
-    code = str(random.randint(100000, 999999))
-    reset_codes = load_reset_codes()
-    reset_codes[email] = code
-    save_reset_codes(reset_codes)
-
-    # Simulate sending email — you should replace this with real email logic
-    print(f"[DEBUG] Sending code to {email}: {code}")
+    code = get_reset_code_store().issue(email)
+    minutes = int(RESET_CODE_TTL_SECONDS // 60)
+    get_email_queue().send(
+        email,
+        "Your FinOptix password reset code",
+        f"Your reset code is {code}. It expires in {minutes} minutes.",
+    )
 
     return True, "Reset code sent successfully."
 
 def verify_reset_code(email, code):
-    reset_codes = load_reset_codes()
-    if reset_codes.get(email) == code:
-        return True
-    return False
+    return get_reset_code_store().verify(email, code)
 
 def update_user_password(email, new_password):
-    users = load_users()
-    if email not in users:
+    if not get_user_store().update(email, password=hash_password_pooled(new_password)):
         return False, "User not found."
-    users[email]["password"] = new_password
-    save_users(users)
 
     # Remove reset code after successful reset
-    reset_codes = load_reset_codes()
-    if email in reset_codes:
-        del reset_codes[email]
-        save_reset_codes(reset_codes)
+    get_reset_code_store().consume(email)
 
     return True, "Password updated successfully."
-
-# === Reset Code File Helpers ===
-def load_reset_codes():
-    if not os.path.exists(RESET_CODES_FILE):
-        with open(RESET_CODES_FILE, "w") as f:
-            json.dump({}, f)
-        return {}
-    with open(RESET_CODES_FILE, "r") as f:
-        try:
-            return json.load(f)
-        except json.JSONDecodeError:
-            return {}
-
-def save_reset_codes(codes):
-    with open(RESET_CODES_FILE, "w") as f:
-        json.dump(codes, f, indent=4)
@@ -0,0 +1,99 @@
+"""Revenue cube: dashboard roll-ups from the cube vs re-grouping the raw orders.
+
+1. Build. A --rows synthetic upload is streamed once into the day x stream x
+   product cube. That is compared with aggregate_revenue_csv, which is the monthly
+   stream totals only. It reports the cube's cells, bytes in memory, .npz size,
+   and the largest difference between the cube's monthly roll-up and
+   aggregate_revenue_csv.
+2. Queries. Each granularity (day/week/month/quarter) x breakdown (stream,
+   product) is answered twice. Once by RevenueCube.query, which is what the
+   dashboard runs. Once by a pandas groupby over the row-level orders already
+   in memory. That is the best case for re-grouping: a real re-group would
+   have to read the upload again first.
+
+    python benchmarks/bench_cube.py --rows 2000000 --products 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd  # noqa: E402
+
+from model_utils import aggregate_revenue_csv  # noqa: E402
+from revenue_cube import GRAINS, RevenueCube, build_revenue_cube  # noqa: E402
+from synthetic_data import generate_revenue  # noqa: E402
+
+
+def timed(fn, *args, repeat=1, **kwargs):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def regroup(orders, grain, by):
+    # What a new breakdown costs without the cube: group every order row again
+    period = orders["Order Date"].dt.to_period(GRAINS[grain]).dt.to_timestamp(how="end").dt.normalize()
+    return orders.groupby([period, by], observed=True).agg(
+        Revenue=("Revenue", "sum"), Quantity=("Quantity", "sum"), Orders=("Quantity", "size")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--streams", type=int, default=3)
+    parser.add_argument("--products", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=5, help="query timings are the best of this many runs")
+    args = parser.parse_args()
+
+    revenue = generate_revenue(args.rows, streams=args.streams, products=args.products)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "revenue.csv")
+        revenue.to_csv(csv_path, index=False)
+
+        monthly, t_monthly = timed(aggregate_revenue_csv, csv_path)
+        cube, t_cube = timed(build_revenue_cube, csv_path)
+        cube_path = cube.save(os.path.join(tmp, "revenue_cube.npz"))
+        _, t_load = timed(RevenueCube.load, cube_path, repeat=args.repeat)
+        # match rows by month and stream, not by position
+        paired = monthly.merge(cube.monthly_revenue(), on=["ds", "Revenue Stream"], how="outer",
+                               suffixes=("", "_cube"), indicator=True)
+        if (paired["_merge"] != "both").any():
+            raise AssertionError(f"{(paired['_merge'] != 'both').sum()} month x stream rows in only one roll-up")
+        drift = (paired["y_cube"] - paired["y"]).abs().max()
+
+        print(f"{args.rows:,} orders, {args.streams} streams, {args.products} products")
+        print(f"monthly stream totals (aggregate_revenue_csv)  {t_monthly:6.2f}s")
+        print(f"cube build (build_revenue_cube)                {t_cube:6.2f}s  "
+              f"({len(cube):,} cells, {cube.nbytes / 2**20:.1f} MiB, "
+              f"{os.path.getsize(cube_path) / 2**20:.1f} MiB .npz, loads in {t_load * 1000:.1f} ms)")
+        print(f"cube monthly roll-up vs aggregate_revenue_csv: max |diff| {drift:.2e}")
+
+    orders = revenue.assign(
+        **{"Order Date": pd.to_datetime(revenue["Order Date"]),
+           "Revenue Stream": revenue["Revenue Stream"].astype("category"),
+           "Product Name": revenue["Product Name"].astype("category"),
+           "Revenue": revenue["Unit Price"].astype("float64") * revenue["Quantity"]}
+    )
+    print(f"\n{'query':<26}{'cube':>10}{'raw groupby':>14}{'speedup':>10}")
+    for grain in GRAINS:
+        for by in ["Revenue Stream", "Product Name"]:
+            result, t_query = timed(cube.query, grain, by=(by,), repeat=args.repeat)
+            expected, t_raw = timed(regroup, orders, grain, by, repeat=args.repeat)
+            if len(result) != len(expected):
+                raise AssertionError(f"{grain} x {by}: {len(result)} cube rows vs {len(expected)} raw groups")
+            print(f"{grain + ' x ' + by:<26}{t_query * 1000:>8.1f}ms{t_raw * 1000:>12.1f}ms{t_raw / t_query:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Cross-validation throughput: per-stream cross_validation vs one shared job queue.
+
+The legacy path fits a full-history model per stream and then calls Prophet's
+cross_validation(parallel="processes"), which spawns a new process pool for
+every stream. evaluate_models now puts every (stream, cutoff) refit into a
+single queue on a persistent pool. Both paths run on the bundled data
+replicated to --streams streams; metrics are compared for equality.
+
+    python benchmarks/bench_cv.py --streams 8 --workers 4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from prophet import Prophet
+from prophet.diagnostics import cross_validation, performance_metrics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from model_utils import load_revenue_data, evaluate_models, _cv_window, _monthly_series_by_stream  # noqa: E402
+from bench_parallel_forecast import replicate_streams  # noqa: E402
+
+
+def legacy_evaluate(monthly_revenue):
+    performance = []
+    fits = 0
+    for stream, monthly in _monthly_series_by_stream(monthly_revenue):
+        model = Prophet()
+        model.fit(monthly)
+        initial, period, horizon = _cv_window(monthly)
+        df_cv = cross_validation(model, initial=initial, period=period, horizon=horizon, parallel="processes")
+        fits += 1 + df_cv['cutoff'].nunique()
+        performance.append(performance_metrics(df_cv).assign(**{'Revenue Stream': stream}))
+    return pd.concat(performance, ignore_index=True), fits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    _, monthly_revenue = load_revenue_data(os.path.join(ROOT, "Revenue_data.csv"))
+    monthly_revenue = replicate_streams(monthly_revenue, args.streams)
+
+    start = time.perf_counter()
+    legacy_perf, legacy_fits = legacy_evaluate(monthly_revenue)
+    legacy_time = time.perf_counter() - start
+
+    # First call pays for starting the persistent pool, the second one doesn't
+    timings = []
+    for _ in range(2):
+        start = time.perf_counter()
+        cv_results, performance_df = evaluate_models(monthly_revenue, n_jobs=args.workers)
+        timings.append(time.perf_counter() - start)
+    fits = sum(df_cv['cutoff'].nunique() for df_cv in cv_results.values())
+
+    print(f"{'path':<22}{'fits':>8}{'seconds':>10}{'fits/s':>10}")
+    print(f"{'legacy per-stream':<22}{legacy_fits:>8}{legacy_time:>10.2f}{legacy_fits / legacy_time:>10.2f}")
+    for label, elapsed in zip(["queue (cold pool)", "queue (warm pool)"], timings):
+        print(f"{label:<22}{fits:>8}{elapsed:>10.2f}{fits / elapsed:>10.2f}")
+
+    merged = legacy_perf.merge(performance_df, on=['Revenue Stream', 'horizon'], suffixes=('_legacy', ''))
+    diff = np.abs(merged['mape'] - merged['mape_legacy']).max()
+    print(f"\nmax |mape difference| vs legacy: {diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Per-interaction latency of the dashboard computations: legacy vs dashboard_utils.
+
+Builds a synthetic combined_df (streams x months, last 12 months forecast-only),
+then times one "interaction" (filter, metrics, chart bounds, forecast window) for
+a few selections using the original row-wise app.py code and the vectorized
+dashboard_utils functions, and checks that both produce the same numbers.
+A second table compares the filter step alone: full-frame mask vs FilterIndex.
+
+    python benchmarks/bench_dashboard.py --streams 500 --months 240
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from dashboard_utils import FilterIndex, filter_combined, compute_metrics, chart_data, forecast_window  # noqa: E402
+
+
+def make_combined(n_streams, n_months, forecast_months=12, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2000-01-31", periods=n_months, freq="M")
+    streams = [f"Stream {i:04d}" for i in range(n_streams)]
+    index = pd.MultiIndex.from_product([dates, streams], names=["Date", "Revenue Stream"])
+    df = index.to_frame(index=False)
+    forecast = rng.uniform(1_000, 10_000, len(df))
+    actual = forecast * rng.normal(1.0, 0.1, len(df))
+    actual[df["Date"] > dates[-forecast_months - 1]] = np.nan
+    df["Actual Revenue"] = actual
+    df["Forecasted Revenue"] = forecast
+    df["Lower Estimate"] = forecast * 0.9
+    df["Upper Estimate"] = forecast * 1.1
+    return df
+
+
+# === Original app.py implementation, kept for comparison ===
+def legacy_interaction(combined_df, month, year, stream, horizon):
+    filtered_df = combined_df.copy()
+    if month != "All":
+        filtered_df = filtered_df[filtered_df['Date'].dt.month_name() == month]
+    if year != "All":
+        filtered_df = filtered_df[filtered_df['Date'].dt.year.astype(str) == year]
+    if stream != "All":
+        filtered_df = filtered_df[filtered_df["Revenue Stream"] == stream]
+    filtered_df = filtered_df.copy()
+
+    filtered_df["Revenue"] = filtered_df["Actual Revenue"].fillna(filtered_df["Forecasted Revenue"])
+    total_revenue = filtered_df["Revenue"].sum()
+    df_with_actuals = filtered_df.dropna(subset=["Actual Revenue"])
+    if not df_with_actuals.empty:
+        accuracy = 100 - (abs(df_with_actuals["Forecasted Revenue"] - df_with_actuals["Actual Revenue"])
+                          / df_with_actuals["Actual Revenue"] * 100).mean()
+    else:
+        accuracy = 0
+    rev_series = filtered_df.sort_values("Date", kind="stable")["Revenue"]
+    if len(rev_series) >= 2:
+        growth_rate = ((rev_series.iloc[-1] - rev_series.iloc[0]) / rev_series.iloc[0]) * 100 \
+            if rev_series.iloc[0] != 0 else 0
+    else:
+        growth_rate = 0
+
+    filtered_df["Lower Bound"] = filtered_df.apply(
+        lambda row: row["Lower Estimate"] if pd.isna(row["Actual Revenue"]) else None, axis=1)
+    filtered_df["Upper Bound"] = filtered_df.apply(
+        lambda row: row["Upper Estimate"] if pd.isna(row["Actual Revenue"]) else None, axis=1)
+    filtered_df = filtered_df.sort_values("Date")
+
+    pivot_df = filtered_df.copy()
+    latest_actual_date = pivot_df[pivot_df["Actual Revenue"].notna()]["Date"].max()
+    if pd.notna(latest_actual_date):
+        start = latest_actual_date + pd.DateOffset(months=1)
+        end = start + pd.DateOffset(months=horizon - 1)
+        pivot_df = pivot_df[(pivot_df["Date"] >= start) & (pivot_df["Date"] <= end)]
+    else:
+        pivot_df = pivot_df[pivot_df["Forecasted Revenue"].notna()]
+    pivot_output = pivot_df[["Date", "Revenue Stream", "Forecasted Revenue",
+                             "Lower Estimate", "Upper Estimate"]].sort_values("Date")
+
+    metrics = {"total_revenue": total_revenue, "accuracy": accuracy, "growth_rate": growth_rate}
+    return metrics, filtered_df, pivot_output
+
+
+def vectorized_interaction(combined_df, month, year, stream, horizon):
+    filtered_df = filter_combined(combined_df, month, year, stream)
+    return compute_metrics(filtered_df), chart_data(filtered_df), forecast_window(filtered_df, horizon)
+
+
+def best_of(fn, repeat, *args):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=500)
+    parser.add_argument("--months", type=int, default=240)
+    parser.add_argument("--horizon", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    combined_df = make_combined(args.streams, args.months)
+    print(f"combined_df rows: {len(combined_df):,}")
+    print(f"{'selection':<40}{'legacy':>12}{'vectorized':>14}{'speedup':>10}")
+
+    last_year = str(combined_df["Date"].dt.year.max())
+    selections = [
+        ("All", "All", "All"),
+        ("March", "All", "All"),
+        ("All", last_year, "All"),
+        ("All", "All", "Stream 0001"),
+        ("June", last_year, "Stream 0001"),
+    ]
+    for month, year, stream in selections:
+        (m_old, chart_old, table_old), t_old = best_of(
+            legacy_interaction, args.repeat, combined_df, month, year, stream, args.horizon)
+        (m_new, chart_new, table_new), t_new = best_of(
+            vectorized_interaction, args.repeat, combined_df, month, year, stream, args.horizon)
+
+        for key in m_old:
+            assert np.isclose(m_old[key], m_new[key], equal_nan=True), (key, m_old[key], m_new[key])
+        # legacy sort_values("Date") is not stable, so compare row by row via the index
+        chart_old, chart_new = chart_old.sort_index(), chart_new.sort_index()
+        np.testing.assert_allclose(chart_old["Lower Bound"].astype(float), chart_new["Lower Bound"])
+        np.testing.assert_allclose(chart_old["Upper Bound"].astype(float), chart_new["Upper Bound"])
+        # the legacy window drops the last month (DateOffset from a month end lands on
+        # the 30th), so it is a prefix of the vectorized window
+        assert set(table_old.index) <= set(table_new.index)
+
+        label = f"{month} / {year} / {stream}"
+        print(f"{label:<40}{t_old * 1000:>10.1f}ms{t_new * 1000:>12.1f}ms{t_old / t_new:>9.1f}x")
+
+    start = time.perf_counter()
+    filter_index = FilterIndex(combined_df)
+    print(f"\nFilterIndex build: {(time.perf_counter() - start) * 1000:.1f}ms (once per forecast run)")
+    print(f"{'selection':<40}{'mask':>12}{'index':>14}{'speedup':>10}")
+    for month, year, stream in selections[1:]:
+        masked, t_mask = best_of(filter_combined, args.repeat, combined_df, month, year, stream)
+        indexed, t_index = best_of(filter_index.select, args.repeat, combined_df, month, year, stream)
+        pd.testing.assert_frame_equal(masked, indexed)
+
+        label = f"{month} / {year} / {stream}"
+        print(f"{label:<40}{t_mask * 1000:>10.2f}ms{t_index * 1000:>12.2f}ms{t_mask / t_index:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
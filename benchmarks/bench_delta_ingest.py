@@ -0,0 +1,100 @@
+"""Delta ingest: merging last month's orders vs re-uploading the full history.
+
+1. Ingest cost. A --rows synthetic history is split into everything but its
+   last month plus that month. It compares aggregating the full file again with
+   RevenueLedger.ingest of only the delta, after the history is already
+   ingested. The full file is then re-ingested to show that overlapping uploads
+   add nothing.
+2. Refits. The bundled data minus its last month is forecast with a
+   ModelStore. Then that month's orders are merged in, as in a monthly update.
+   Next, late orders for one stream in an already-forecast month are merged.
+   After each step it counts how many streams are refit warm-started from the
+   stored parameters, refit cold or reused as-is, next to a cold refit of
+   everything.
+
+    python benchmarks/bench_delta_ingest.py --rows 2000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd  # noqa: E402
+
+from bench_warm_start import counted_fits, describe  # noqa: E402
+from model_store import ModelStore  # noqa: E402
+from model_utils import aggregate_revenue_csv, forecast_revenue_streams, load_macro_data  # noqa: E402
+from revenue_ledger import RevenueLedger  # noqa: E402
+from synthetic_data import generate_revenue  # noqa: E402
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        revenue = generate_revenue(args.rows)
+        last_month = revenue["Order Date"].str[:7].max()
+        in_delta = revenue["Order Date"].str[:7] == last_month
+        paths = {name: os.path.join(tmp, f"{name}.csv") for name in ["full", "history", "delta"]}
+        revenue.to_csv(paths["full"], index=False)
+        revenue[~in_delta].to_csv(paths["history"], index=False)
+        revenue[in_delta].to_csv(paths["delta"], index=False)
+
+        ledger = RevenueLedger(os.path.join(tmp, "ledger"))
+        _, t_seed = timed(ledger.ingest, paths["history"])
+        full_monthly, t_full = timed(aggregate_revenue_csv, paths["full"])
+        stats, t_delta = timed(ledger.ingest, paths["delta"])
+        overlap, t_overlap = timed(ledger.ingest, paths["full"])
+        merged = ledger.monthly_revenue()
+        drift = (merged["y"] - full_monthly["y"]).abs().max()
+
+        print(f"{args.rows:,} rows of history, delta = {in_delta.sum():,} orders ({last_month})")
+        print(f"seed ledger with history      {t_seed:>7.2f}s")
+        print(f"re-aggregate full upload      {t_full:>7.2f}s")
+        print(f"ingest delta only             {t_delta:>7.2f}s  ({stats['new']:,} new, "
+              f"{len(stats['touched'])} month x stream totals touched)")
+        print(f"re-ingest full file (overlap) {t_overlap:>7.2f}s  ({overlap['new']} new, "
+              f"{overlap['duplicates']:,} skipped)")
+        print(f"ledger vs full aggregate: max |diff| {drift:.2e}")
+
+        bundled = pd.read_csv(os.path.join(ROOT, "Revenue_data.csv"))
+        _, df_macro_monthly = load_macro_data(os.path.join(ROOT, "daily_exchange_inflation_data.csv"))
+        bundled_month = bundled["Order Date"].str[:7]
+        ledger = RevenueLedger(os.path.join(tmp, "bundled"))
+        ledger.ingest(bundled[bundled_month < bundled_month.max()])
+        store = ModelStore(os.path.join(tmp, "models"))
+        forecast_revenue_streams(ledger.monthly_revenue(), df_macro_monthly, model_store=store)
+
+        # the monthly update: last month's orders arrive (uploaded with the overlapping history)
+        month_stats = ledger.ingest(bundled)
+        monthly_revenue = ledger.monthly_revenue()
+        _, t_cold, cold_fits = counted_fits(forecast_revenue_streams, monthly_revenue, df_macro_monthly)
+        _, t_month, month_fits = counted_fits(forecast_revenue_streams, monthly_revenue, df_macro_monthly,
+                                              model_store=store)
+        print(f"\nnew month ({month_stats['new']} orders, {len(month_stats['touched'])} month x stream totals "
+              f"touched): {describe(month_fits)} in {t_month:.2f}s "
+              f"(cold refit: {describe(cold_fits)} in {t_cold:.2f}s)")
+
+        late = bundled[(bundled["Revenue Stream"] == "License")].tail(5).assign(Quantity=1)
+        late_stats = ledger.ingest(late)
+        _, t_refit, late_fits = counted_fits(forecast_revenue_streams, ledger.monthly_revenue(), df_macro_monthly,
+                                             model_store=store)
+        print(f"late orders for one stream ({len(late_stats['touched'])} month x stream total touched): "
+              f"{describe(late_fits)} in {t_refit:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Accuracy vs speed: Prophet vs the batched linear engine.
+
+Holds out the last --holdout months of the bundled data, forecasts them with
+both engines and reports MAPE per stream, then times both engines on the full
+history replicated to --streams streams.
+
+    python benchmarks/bench_engines.py --holdout 12 --streams 40
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from model_utils import load_revenue_data, load_macro_data, forecast_revenue_streams  # noqa: E402
+from bench_parallel_forecast import replicate_streams  # noqa: E402
+
+ENGINES = ["prophet", "linear"]
+
+
+def mape(actual, predicted):
+    return float(np.mean(np.abs(predicted - actual) / np.abs(actual)) * 100)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--holdout", type=int, default=12)
+    parser.add_argument("--streams", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    _, monthly_revenue = load_revenue_data(os.path.join(ROOT, "Revenue_data.csv"))
+    _, df_macro_monthly = load_macro_data(os.path.join(ROOT, "daily_exchange_inflation_data.csv"))
+
+    months = np.sort(monthly_revenue['ds'].unique())
+    cutoff = months[-args.holdout - 1]
+    train = monthly_revenue[monthly_revenue['ds'] <= cutoff]
+    test = monthly_revenue[monthly_revenue['ds'] > cutoff]
+
+    print(f"holdout accuracy (last {args.holdout} months), MAPE %")
+    print(f"{'stream':<20}" + "".join(f"{e:>12}" for e in ENGINES))
+    results = {
+        engine: forecast_revenue_streams(train, df_macro_monthly, periods=args.holdout, engine=engine)
+        for engine in ENGINES
+    }
+    for stream, actual in test.groupby('Revenue Stream'):
+        row = f"{stream:<20}"
+        for engine in ENGINES:
+            forecast = results[engine][stream].set_index('ds')['yhat']
+            row += f"{mape(actual['y'].to_numpy(), forecast.reindex(actual['ds']).to_numpy()):>12.2f}"
+        print(row)
+
+    replicated = replicate_streams(monthly_revenue, args.streams)
+    print(f"\nfit + forecast time on {args.streams} streams")
+    for engine in ENGINES:
+        start = time.perf_counter()
+        forecast_revenue_streams(replicated, df_macro_monthly, n_jobs=args.workers, engine=engine)
+        print(f"{engine:<20}{time.perf_counter() - start:>10.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Export cost: time and peak Python memory per format.
+
+Builds a combined_df-shaped frame (Date, Revenue Stream, actuals, forecast and
+bounds) of --streams streams × --months months and writes it:
+
+- the old way, one pd.ExcelWriter sheet built in a BytesIO, and
+- through export.export_table as xlsx (constant_memory, one sheet per stream),
+  CSV (chunked) and Parquet (a row group per stream).
+
+    python benchmarks/bench_export.py --streams 200 --months 600
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from export import EXPORT_FORMATS, export_table  # noqa: E402
+
+
+def combined_frame(streams, months, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2000-01-31", periods=months, freq="ME")
+    df = pd.DataFrame({
+        "Date": np.repeat(dates, streams),
+        "Revenue Stream": np.tile([f"Stream {i + 1}" for i in range(streams)], months),
+        "Actual Revenue": rng.uniform(1e4, 1e5, months * streams),
+    })
+    df["Forecasted Revenue"] = df["Actual Revenue"] * rng.normal(1, 0.05, len(df))
+    df["Lower Estimate"] = df["Forecasted Revenue"] * 0.9
+    df["Upper Estimate"] = df["Forecasted Revenue"] * 1.1
+    df.loc[df["Date"] > dates[-min(12, months)], "Actual Revenue"] = np.nan
+    return df
+
+
+def legacy_excel(df, path):
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
+        df.to_excel(writer, index=False, sheet_name="Forecast by Stream")
+    with open(path, "wb") as f:
+        f.write(output.getvalue())
+    return path
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    path = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=100)
+    parser.add_argument("--months", type=int, default=300)
+    args = parser.parse_args()
+
+    df = combined_frame(args.streams, args.months)
+    print(f"{len(df):,} rows, {args.streams} streams")
+    print(f"{'writer':<22} {'seconds':>8} {'peak MB':>8} {'file MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = {"legacy ExcelWriter": lambda: legacy_excel(df, os.path.join(tmp, "legacy.xlsx"))}
+        for fmt in EXPORT_FORMATS:
+            runs[f"export {fmt}"] = lambda fmt=fmt: export_table(df, os.path.join(tmp, f"export.{fmt}"), fmt)
+        for label, func in runs.items():
+            elapsed, peak, size = measure(func)
+            print(f"{label:<22} {elapsed:>8.2f} {peak / 2**20:>8.1f} {size / 2**20:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
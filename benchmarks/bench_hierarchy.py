@@ -0,0 +1,96 @@
+"""Hierarchical forecast on a synthetic product catalogue.
+
+Generates monthly revenue for --products products spread over --streams streams
+(on the bundled macro data's 2019-01..2025-04 window), runs forecast_hierarchy and
+reports the time of each level, checks the reconciled forecasts add up, and
+extrapolates what fitting every product independently with Prophet would cost
+from a small timed sample.
+
+    python benchmarks/bench_hierarchy.py --products 5000 --streams 20 --workers 4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model_utils import (  # noqa: E402
+    TOTAL_LABEL,
+    load_macro_data,
+    fit_seasonal_linear_batch,
+    forecast_revenue_streams,
+    forecast_hierarchy,
+)
+
+
+def make_catalogue(n_products, n_streams, seed=0):
+    rng = np.random.default_rng(seed)
+    months = pd.date_range("2019-01-31", "2025-04-30", freq="M")
+    t = np.arange(len(months))[:, None]
+    level = rng.lognormal(6, 1, n_products)
+    trend = rng.normal(0.003, 0.01, n_products)
+    season = rng.uniform(0, 0.3, n_products) * np.sin(2 * np.pi * (t + rng.integers(0, 12, n_products)) / 12)
+    noise = rng.normal(0, 0.15, (len(months), n_products))
+    Y = np.maximum(level * (1 + trend * t + season + noise), 0)
+
+    stream_of_product = rng.integers(0, n_streams, n_products)
+    return pd.DataFrame({
+        'ds': np.repeat(months.to_numpy(), n_products),
+        'Revenue Stream': np.tile([f"Stream {s:02d}" for s in stream_of_product], len(months)),
+        'Product Name': np.tile([f"Product {p:05d}" for p in range(n_products)], len(months)),
+        'y': Y.reshape(-1),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--streams", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--prophet-sample", type=int, default=5)
+    args = parser.parse_args()
+
+    _, df_macro_monthly = load_macro_data(os.path.join(ROOT, "daily_exchange_inflation_data.csv"))
+    catalogue = make_catalogue(args.products, args.streams)
+
+    wide = catalogue.pivot_table(index='ds', columns=['Revenue Stream', 'Product Name'], values='y')
+    start = time.perf_counter()
+    fit_seasonal_linear_batch(wide.to_numpy(), pd.DatetimeIndex(wide.index), 12)
+    t_products = time.perf_counter() - start
+
+    start = time.perf_counter()
+    forecast_results, product_forecast = forecast_hierarchy(
+        catalogue, df_macro_monthly, periods=12, n_jobs=args.workers
+    )
+    t_total = time.perf_counter() - start
+
+    by_stream = product_forecast.groupby(['ds', 'Revenue Stream'])['yhat'].sum().unstack()
+    max_gap = max(
+        (forecast_results[s].set_index('ds').loc[by_stream.index, 'yhat'] - by_stream[s]).abs().max()
+        for s in by_stream.columns
+    )
+    total_gap = (forecast_results[TOTAL_LABEL].set_index('ds').loc[by_stream.index, 'yhat']
+                 - by_stream.sum(axis=1)).abs().max()
+
+    sample = catalogue[catalogue['Product Name'].isin(catalogue['Product Name'].unique()[:args.prophet_sample])]
+    sample = sample.drop(columns='Revenue Stream').rename(columns={'Product Name': 'Revenue Stream'})
+    start = time.perf_counter()
+    forecast_revenue_streams(sample, df_macro_monthly, periods=12, n_jobs=1)
+    per_product = (time.perf_counter() - start) / args.prophet_sample
+
+    print(f"products: {args.products:,}  streams: {args.streams}  workers: {args.workers}")
+    print(f"product level (batched linear): {t_products * 1000:.1f}ms")
+    print(f"full hierarchy (incl. {args.streams + 1} Prophet fits + reconciliation): {t_total:.2f}s")
+    print(f"max incoherence: streams {max_gap:.2e}, total {total_gap:.2e}")
+    print(f"independent Prophet per product (extrapolated, serial): "
+          f"{per_product * args.products:.0f}s ({per_product * 1000:.0f}ms x {args.products:,})")
+
+
+if __name__ == "__main__":
+    main()
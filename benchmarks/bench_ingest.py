@@ -0,0 +1,70 @@
+"""Peak memory and time: full read_csv + groupby vs chunked aggregate_revenue_csv.
+
+Writes the bundled Revenue_data.csv repeated --copies times to a temp file and
+aggregates it both ways (the number of month x stream groups stays fixed while
+the row count grows).
+Peak memory is measured with tracemalloc (numpy/pandas buffers included).
+
+    python benchmarks/bench_ingest.py --copies 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model_utils import aggregate_monthly_revenue, aggregate_revenue_csv  # noqa: E402
+
+
+def write_large_csv(path, copies):
+    base = pd.read_csv(os.path.join(ROOT, "Revenue_data.csv"))
+    for i in range(copies):
+        base.to_csv(path, mode="a", header=(i == 0), index=False)
+    return len(base) * copies
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def full_read(path):
+    df = pd.read_csv(path)
+    df['Order Date'] = pd.to_datetime(df['Order Date'])
+    return aggregate_monthly_revenue(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, default=200)
+    parser.add_argument("--chunksize", type=int, default=500_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "revenue.csv")
+        rows = write_large_csv(path, args.copies)
+
+        full, t_full, mem_full = measure(lambda: full_read(path))
+        chunked, t_chunked, mem_chunked = measure(lambda: aggregate_revenue_csv(path, chunksize=args.chunksize))
+
+    max_diff = (full['y'] - chunked['y']).abs().max()
+    print(f"rows:    {rows:,}  ->  {len(chunked):,} month x stream groups")
+    print(f"full:    {t_full:.2f}s  peak {mem_full:,.1f} MiB")
+    print(f"chunked: {t_chunked:.2f}s  peak {mem_chunked:,.1f} MiB")
+    print(f"max |y| difference: {max_diff:.6f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Forecast job queue under many concurrent sessions.
+
+--sessions simulated sessions click "Go to Dashboard" at the same moment,
+spread round-robin over --datasets distinct uploads (the bundled data, scaled
+per dataset). They run:
+
+- inline: every session runs the pipeline in its own thread, as the
+  dashboard used to, and
+- queued: every session submits to forecast_jobs and polls until done.
+  Identical uploads share one job.
+
+For both modes it reports pipeline runs, wall time, and median/max time for a
+session to get control back (submit) and to get results. Uses a temporary
+cache directory and no forecast cache, so every run starts cold.
+
+    python benchmarks/bench_jobs.py --sessions 24 --datasets 3 --engine linear
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["FINOPTIX_CACHE_DIR"] = tempfile.mkdtemp(prefix="finoptix-bench-jobs-")
+
+import pandas as pd  # noqa: E402
+
+from forecast_jobs import JOB_WORKERS, job_result, job_status, submit_forecast_job  # noqa: E402
+from forecast_module import run_forecasting_pipeline  # noqa: E402
+from model_utils import FORECAST_ENGINES, load_revenue_data  # noqa: E402
+
+MACRO_COLUMNS = ["Order Date", "Exchange Rate", "Inflation Rate"]
+
+
+def report(label, runs, wall, returned, finished):
+    print(f"{label:<8} {runs:>5} runs  {wall:>7.2f}s wall  "
+          f"control back {statistics.median(returned) * 1000:>7.1f} / {max(returned) * 1000:>7.1f} ms  "
+          f"results {statistics.median(finished):>6.2f} / {max(finished):>6.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=24)
+    parser.add_argument("--datasets", type=int, default=3)
+    parser.add_argument("--engine", default="linear", choices=sorted(FORECAST_ENGINES))
+    parser.add_argument("--poll", type=float, default=0.05, help="seconds between status polls")
+    args = parser.parse_args()
+
+    _, monthly_revenue = load_revenue_data(os.path.join(ROOT, "Revenue_data.csv"))
+    macro_df = pd.read_csv(os.path.join(ROOT, "daily_exchange_inflation_data.csv"), usecols=MACRO_COLUMNS)
+    uploads = [monthly_revenue.assign(y=monthly_revenue["y"] * (1 + i / 10)) for i in range(args.datasets)]
+    kwargs = {"engine": args.engine, "evaluation": "background"}
+    print(f"{args.sessions} sessions over {args.datasets} uploads, {args.engine} engine, "
+          f"{JOB_WORKERS} job workers")
+
+    def inline(session):
+        start = time.perf_counter()
+        run_forecasting_pipeline(uploads[session % args.datasets], macro_df, **kwargs)
+        elapsed = time.perf_counter() - start
+        return elapsed, elapsed
+
+    def queued(session):
+        start = time.perf_counter()
+        job_id = submit_forecast_job(uploads[session % args.datasets], macro_df, **kwargs)
+        returned = time.perf_counter() - start
+        while job_status(job_id)["state"] not in ("done", "failed"):
+            time.sleep(args.poll)
+        assert job_result(job_id) is not None
+        return returned, time.perf_counter() - start
+
+    for label, session in [("inline", inline), ("queued", queued)]:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+            timings = list(pool.map(session, range(args.sessions)))
+        wall = time.perf_counter() - start
+        runs = args.sessions if label == "inline" else args.datasets
+        report(label, runs, wall, [t[0] for t in timings], [t[1] for t in timings])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Serial vs process-pool wall-clock time for forecast_revenue_streams.
+
+The bundled Revenue_data.csv only has three streams, so its monthly series are
+replicated (with a random per-copy scale factor) until there are N streams.
+
+    python benchmarks/bench_parallel_forecast.py --streams 40 --workers 8
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model_utils import load_revenue_data, load_macro_data, forecast_revenue_streams  # noqa: E402
+
+
+def replicate_streams(monthly_revenue, n_streams, seed=0):
+    rng = np.random.default_rng(seed)
+    base_streams = list(monthly_revenue['Revenue Stream'].unique())
+    copies = []
+    for i in range(n_streams):
+        base = base_streams[i % len(base_streams)]
+        df_copy = monthly_revenue[monthly_revenue['Revenue Stream'] == base].copy()
+        df_copy['y'] = df_copy['y'] * rng.uniform(0.5, 1.5)
+        df_copy['Revenue Stream'] = f"{base} {i + 1}"
+        copies.append(df_copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--periods", type=int, default=12)
+    args = parser.parse_args()
+
+    _, monthly_revenue = load_revenue_data(os.path.join(ROOT, "Revenue_data.csv"))
+    _, df_macro_monthly = load_macro_data(os.path.join(ROOT, "daily_exchange_inflation_data.csv"))
+    monthly_revenue = replicate_streams(monthly_revenue, args.streams)
+
+    timings = {}
+    results = {}
+    for label, n_jobs in [("serial", 1), ("parallel", args.workers)]:
+        start = time.perf_counter()
+        results[label] = forecast_revenue_streams(
+            monthly_revenue, df_macro_monthly, periods=args.periods, n_jobs=n_jobs
+        )
+        timings[label] = time.perf_counter() - start
+
+    assert list(results["serial"]) == list(results["parallel"]), "stream order differs between modes"
+    max_diff = max(
+        (results["serial"][s]['yhat'] - results["parallel"][s]['yhat']).abs().max()
+        for s in results["serial"]
+    )
+
+    print(f"streams:  {args.streams}")
+    print(f"workers:  {args.workers}")
+    print(f"serial:   {timings['serial']:.2f}s")
+    print(f"parallel: {timings['parallel']:.2f}s")
+    print(f"speedup:  {timings['serial'] / timings['parallel']:.2f}x")
+    print(f"max |yhat| difference serial vs parallel: {max_diff:.6f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Password hashing cost: work factor, verification cache and login throttling.
+
+1. Time for one PBKDF2 hash at a few work factors.
+2. --logins logins from --threads threads over --users accounts. They run
+   cold (every login hashes on the bounded pool) and then warm (repeat logins
+   and reruns hit the verification cache).
+3. A brute-force run of --attempts wrong passwords against one account, with
+   and without the per-email throttle, reporting CPU seconds spent hashing.
+
+    python benchmarks/bench_passwords.py --iterations 600000 --logins 200
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import passwords  # noqa: E402
+from passwords import LoginThrottle, VerificationCache, check_password, hash_password, verify_password  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=passwords.PBKDF2_ITERATIONS)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--attempts", type=int, default=200)
+    args = parser.parse_args()
+    passwords.PBKDF2_ITERATIONS = args.iterations
+
+    print("work factor      ms/hash")
+    for iterations in sorted({100_000, 300_000, args.iterations}):
+        start = time.perf_counter()
+        hash_password("correct horse", iterations)
+        print(f"{iterations:>11,}  {(time.perf_counter() - start) * 1000:>11.1f}")
+
+    stored = {f"user{i}@example.com": hash_password(f"pw-{i}") for i in range(args.users)}
+    logins = [i % args.users for i in range(args.logins)]
+
+    def login(i):
+        email = f"user{i}@example.com"
+        return check_password(email, f"pw-{i}", stored[email])[0]
+
+    print(f"\n{args.logins} logins over {args.users} accounts, {args.threads} threads, "
+          f"{passwords.HASH_WORKERS} hashing workers")
+    for label in ["cold cache", "warm cache"]:
+        if label == "cold cache":
+            passwords.verification_cache = VerificationCache()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            ok = sum(pool.map(login, logins))
+        elapsed = time.perf_counter() - start
+        print(f"{label:<12} {elapsed:>7.2f}s  {args.logins / elapsed:>8.0f} logins/s  ({ok} succeeded)")
+
+    print(f"\nbrute force: {args.attempts} wrong passwords against one account")
+    target = stored["user0@example.com"]
+    for label, throttle in [("unthrottled", None), ("throttled", LoginThrottle())]:
+        cpu_start = time.process_time()
+        hashes = 0
+        for attempt in range(args.attempts):
+            if throttle is not None and throttle.retry_after("user0@example.com"):
+                continue
+            hashes += 1
+            if not verify_password(f"guess-{attempt}", target)[0] and throttle is not None:
+                throttle.failure("user0@example.com")
+        print(f"{label:<12} {hashes:>5} hashes  {time.process_time() - cpu_start:>7.2f} CPU s")
+
+
+if __name__ == "__main__":
+    main()
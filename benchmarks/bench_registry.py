@@ -0,0 +1,66 @@
+"""Shared model registry: concurrent sessions forecasting the same upload.
+
+--sessions threads (standing in for Streamlit sessions) forecast the bundled
+data with --streams streams at the same moment, first each on their own (every
+session fits every stream) and then through one ModelRegistry (each stream is
+fitted once, the other sessions wait for it). A final run after dropping the
+memory tier shows the disk tier serving a restarted process.
+
+    python benchmarks/bench_registry.py --sessions 4 --streams 6
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from model_utils import load_revenue_data, load_macro_data, forecast_revenue_streams  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+from bench_parallel_forecast import replicate_streams  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--streams", type=int, default=6)
+    args = parser.parse_args()
+
+    _, monthly_revenue = load_revenue_data(os.path.join(ROOT, "Revenue_data.csv"))
+    _, df_macro_monthly = load_macro_data(os.path.join(ROOT, "daily_exchange_inflation_data.csv"))
+    monthly_revenue = replicate_streams(monthly_revenue, args.streams)
+
+    def run_sessions(registry):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+            results = list(pool.map(
+                lambda _: forecast_revenue_streams(monthly_revenue, df_macro_monthly, registry=registry),
+                range(args.sessions),
+            ))
+        return results, time.perf_counter() - start
+
+    print(f"{args.sessions} concurrent sessions, {args.streams} streams each")
+    _, t_isolated = run_sessions(None)
+    print(f"isolated     {t_isolated:>7.2f}s  ({args.sessions * args.streams} fits)")
+
+    with tempfile.TemporaryDirectory() as registry_dir:
+        registry = ModelRegistry(registry_dir)
+        results, t_shared = run_sessions(registry)
+        stats = registry.stats()
+        print(f"shared       {t_shared:>7.2f}s  ({stats['misses']} fits, {stats['memory_hits']} reused)")
+        same = all(r[s]["yhat"].equals(results[0][s]["yhat"]) for r in results for s in r)
+        print(f"identical forecasts across sessions: {same}")
+
+        restarted = ModelRegistry(registry_dir)
+        start = time.perf_counter()
+        forecast_revenue_streams(monthly_revenue, df_macro_monthly, registry=restarted)
+        print(f"disk tier    {time.perf_counter() - start:>7.2f}s  ({restarted.stats()['disk_hits']} streams from disk)")
+
+
+if __name__ == "__main__":
+    main()
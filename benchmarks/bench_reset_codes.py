@@ -0,0 +1,90 @@
+"""Reset-code store and mail queue: per-call cost, log size and send latency.
+
+1. --codes codes issued and verified (one wrong guess each, then the right
+   code) against the log-backed store, reporting operations per second and
+   how many lines the log holds before and after the purge.
+2. Restart cost: replaying that log into a fresh store.
+3. Time for send_reset_code-style requests to return when the mail goes through
+   the background queue, against sending inline, with a sink that sleeps
+   --smtp-ms per message to stand in for an SMTP round trip.
+
+    python benchmarks/bench_reset_codes.py --codes 10000 --smtp-ms 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mailer import EmailQueue, StubSMTPSink, build_message  # noqa: E402
+from reset_codes import ResetCodeStore  # noqa: E402
+
+
+class SlowSink(StubSMTPSink):
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+
+    def __call__(self, message):
+        time.sleep(self.delay)
+        super().__call__(message)
+
+
+def log_lines(path):
+    with open(path) as f:
+        return sum(1 for _ in f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--codes", type=int, default=10_000)
+    parser.add_argument("--mails", type=int, default=20)
+    parser.add_argument("--smtp-ms", type=float, default=200.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "reset_codes.log")
+        store = ResetCodeStore(path, ttl=1.0)
+        emails = [f"user{i}@example.com" for i in range(args.codes)]
+
+        start = time.perf_counter()
+        codes = [store.issue(email) for email in emails]
+        issued = time.perf_counter() - start
+        start = time.perf_counter()
+        ok = sum(store.verify(email, "000000") or store.verify(email, code) for email, code in zip(emails, codes))
+        verified = time.perf_counter() - start
+        print(f"issue   {args.codes / issued:>10.0f} ops/s")
+        print(f"verify  {2 * args.codes / verified:>10.0f} ops/s  ({ok} accepted)")
+        print(f"log: {log_lines(path)} lines for {len(store)} live codes")
+
+        start = time.perf_counter()
+        replayed = ResetCodeStore(path, ttl=1.0)
+        print(f"replay  {time.perf_counter() - start:>10.3f}s  ({len(replayed)} live codes restored)")
+
+        time.sleep(1.0)
+        purged = store.purge()
+        print(f"purge: {purged} expired codes dropped, log now {log_lines(path)} lines")
+
+    delay = args.smtp_ms / 1000
+    print(f"\n{args.mails} reset requests, {args.smtp_ms:.0f} ms per SMTP send")
+    inline = SlowSink(delay)
+    start = time.perf_counter()
+    for i in range(args.mails):
+        inline(build_message(f"user{i}@example.com", "code", "123456"))
+    print(f"inline  {(time.perf_counter() - start) / args.mails * 1000:>8.2f} ms per request")
+
+    mail_queue = EmailQueue(SlowSink(delay))
+    start = time.perf_counter()
+    for i in range(args.mails):
+        mail_queue.send(f"user{i}@example.com", "code", "123456")
+    print(f"queued  {(time.perf_counter() - start) / args.mails * 1000:>8.2f} ms per request")
+    mail_queue.join()
+    print(f"queue drained after {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
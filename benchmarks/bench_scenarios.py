@@ -0,0 +1,68 @@
+"""What-if scenarios: one batched predict vs a refit per scenario.
+
+Builds --scenarios exchange-rate/inflation shocks around the baseline regressor
+path, evaluates all of them with ScenarioForecaster.predict and, for the first
+--refits of them, with a full forecast_revenue_streams run on the shocked
+scenario. Reports the time per scenario and the largest yhat difference.
+
+    python benchmarks/bench_scenarios.py --scenarios 50 --refits 3
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model_utils import load_revenue_data, load_macro_data, forecast_revenue_streams, ScenarioForecaster  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", type=int, default=50)
+    parser.add_argument("--refits", type=int, default=3)
+    parser.add_argument("--engine", default="prophet")
+    args = parser.parse_args()
+
+    _, monthly_revenue = load_revenue_data(os.path.join(ROOT, "Revenue_data.csv"))
+    _, df_macro_monthly = load_macro_data(os.path.join(ROOT, "daily_exchange_inflation_data.csv"))
+
+    start = time.perf_counter()
+    forecaster = ScenarioForecaster(monthly_revenue, df_macro_monthly, periods=12, engine=args.engine)
+    t_fit = time.perf_counter() - start
+
+    fx = np.linspace(0.9, 1.1, args.scenarios)
+    inflation = np.linspace(1.2, 0.8, args.scenarios)
+    scenarios = {
+        f"FX x{a:.3f}, inflation x{b:.3f}": forecaster.shocked({'Exchange Rate': a, 'Inflation Rate': b})
+        for a, b in zip(fx, inflation)
+    }
+
+    start = time.perf_counter()
+    cube = forecaster.predict(scenarios)
+    t_predict = time.perf_counter() - start
+
+    max_diff = 0.0
+    start = time.perf_counter()
+    for i, (name, trajectory) in enumerate(list(scenarios.items())[:args.refits]):
+        refit = forecast_revenue_streams(monthly_revenue, df_macro_monthly, periods=12, engine=args.engine,
+                                         scenario=trajectory.reset_index())
+        for k, stream in enumerate(cube.streams):
+            yhat = refit[stream].set_index('ds')['yhat'].reindex(cube.ds).to_numpy()
+            max_diff = max(max_diff, float(np.nanmax(np.abs(yhat - cube.yhat[i, k]))))
+    t_refit = (time.perf_counter() - start) / max(args.refits, 1)
+
+    print(f"engine: {args.engine}  streams: {len(cube.streams)}  months: {len(cube.ds)}")
+    print(f"initial fit: {t_fit:.2f}s")
+    print(f"batched predict, {args.scenarios} scenarios: {t_predict * 1000:.1f}ms "
+          f"({t_predict / args.scenarios * 1000:.2f}ms per scenario)")
+    print(f"refit per scenario: {t_refit:.2f}s")
+    print(f"max |yhat difference| vs refit: {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
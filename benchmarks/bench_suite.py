@@ -0,0 +1,210 @@
+"""Pipeline benchmark suite with a stored baseline and regression thresholds.
+
+Generates a synthetic dataset (see synthetic_data.py) for a size profile and
+times, in pipeline order:
+load_revenue_data, load_macro_data, forecast_revenue_streams,
+merge_forecast_with_history, evaluate_models, and the dashboard computations
+(FilterIndex build, then filter + metrics + chart + forecast table for every
+stream).
+
+Each step reports its best wall time over --repeat runs. Prophet steps run
+once. The results are compared with the stored baseline for the same
+profile (benchmarks/baseline.json). A step counts as a regression when it is
+both more than --threshold slower in relative terms (default 25%) and more
+than --min-delta seconds slower in absolute terms (default 0.02s, so
+millisecond-level noise never fails). The script exits with status 1 on any
+regression.
+
+    python benchmarks/bench_suite.py --profile small                  # compare
+    python benchmarks/bench_suite.py --profile small --save-baseline  # record
+
+Baselines are machine-specific: record one on the machine that runs the checks.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from model_utils import (  # noqa: E402
+    load_revenue_data,
+    load_macro_data,
+    forecast_revenue_streams,
+    merge_forecast_with_history,
+    evaluate_models,
+)
+from dashboard_utils import FilterIndex, compute_metrics, chart_data, forecast_window  # noqa: E402
+from synthetic_data import write_dataset  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+PROFILES = {
+    "small": dict(rows=20_000, streams=3, products=24, years=4),
+    "medium": dict(rows=500_000, streams=10, products=200, years=6),
+    "large": dict(rows=5_000_000, streams=40, products=2_000, years=8),
+}
+
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_MIN_DELTA = 0.02
+
+
+# === 1. Benchmark Steps ===
+def pipeline_steps(revenue_path, macro_path, workers, engine):
+    # (name, callable, max repeats); later steps use the outputs of earlier ones
+    state = {}
+
+    def load_revenue():
+        state["df"], state["monthly_revenue"] = load_revenue_data(revenue_path)
+
+    def load_macro():
+        state["df_macro"], state["df_macro_monthly"] = load_macro_data(macro_path)
+
+    def forecast():
+        state["forecast_results"] = forecast_revenue_streams(
+            state["monthly_revenue"], state["df_macro_monthly"], periods=12, n_jobs=workers, engine=engine
+        )
+
+    def merge():
+        state["combined_df"] = merge_forecast_with_history(state["forecast_results"], state["monthly_revenue"])
+
+    def evaluate():
+        evaluate_models(state["monthly_revenue"], n_jobs=workers, engine=engine)
+
+    def build_index():
+        state["filter_index"] = FilterIndex(state["combined_df"])
+
+    def interactions():
+        combined_df = state["combined_df"]
+        filter_index = state["filter_index"]
+        _, _, stream_options = filter_index.options()
+        for stream in stream_options:
+            filtered_df = filter_index.select(combined_df, stream=stream)
+            compute_metrics(filtered_df)
+            chart_data(filtered_df)
+            forecast_window(filtered_df, 6)
+
+    return [
+        ("load_revenue_data", load_revenue, None),
+        ("load_macro_data", load_macro, None),
+        ("forecast_revenue_streams", forecast, 1),
+        ("merge_forecast_with_history", merge, None),
+        ("evaluate_models", evaluate, 1),
+        ("dashboard_filter_index", build_index, None),
+        ("dashboard_interactions", interactions, None),
+    ]
+
+
+def best_time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# === 2. Baseline Comparison ===
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def load_baselines(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, threshold, min_delta):
+    # Yields (name, seconds, baseline seconds or None, ratio or None, status)
+    for name, seconds in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            yield name, seconds, None, None, "new"
+            continue
+        ratio = seconds / reference if reference > 0 else float("inf")
+        regressed = seconds > reference * (1 + threshold) and seconds - reference > min_delta
+        yield name, seconds, reference, ratio, "REGRESSION" if regressed else "ok"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", default="small", choices=sorted(PROFILES))
+    parser.add_argument("--rows", type=int, help="override the profile's row count")
+    parser.add_argument("--streams", type=int, help="override the profile's stream count")
+    parser.add_argument("--products", type=int, help="override the profile's product count")
+    parser.add_argument("--years", type=float, help="override the profile's number of years")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--engine", default="prophet")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip", nargs="*", default=[], help="step names to leave out")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed relative slowdown")
+    parser.add_argument("--min-delta", type=float, default=DEFAULT_MIN_DELTA, help="allowed absolute slowdown (s)")
+    parser.add_argument("--output", help="also write this run's results as JSON")
+    args = parser.parse_args()
+
+    params = dict(PROFILES[args.profile])
+    for key in params:
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+    # a custom size gets its own baseline entry
+    profile_key = args.profile if params == PROFILES[args.profile] else json.dumps(params, sort_keys=True)
+    profile_key = f"{profile_key}|engine={args.engine}|workers={args.workers}"
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        revenue_path, macro_path = write_dataset(tmp, **params)
+        for name, fn, max_repeat in pipeline_steps(revenue_path, macro_path, args.workers, args.engine):
+            if name in args.skip:
+                continue
+            repeat = args.repeat if max_repeat is None else min(args.repeat, max_repeat)
+            results[name] = best_time(fn, max(repeat, 1))
+
+    run = {"params": params, "machine": machine_info(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(run, f, indent=2)
+
+    baselines = load_baselines(args.baseline)
+    baseline = baselines.get(profile_key)
+    if baseline is not None and baseline["machine"] != run["machine"]:
+        print("⚠️ baseline was recorded on a different machine; ratios are indicative only")
+
+    print(f"profile: {profile_key}  {params}")
+    print(f"{'step':<30}{'seconds':>10}{'baseline':>10}{'ratio':>8}  status")
+    regressions = []
+    for name, seconds, reference, ratio, status in compare(
+            results, baseline["results"] if baseline else {}, args.threshold, args.min_delta):
+        ref_text = f"{reference:>10.3f}" if reference is not None else f"{'-':>10}"
+        ratio_text = f"{ratio:>8.2f}" if ratio is not None else f"{'-':>8}"
+        print(f"{name:<30}{seconds:>10.3f}{ref_text}{ratio_text}  {status}")
+        if status == "REGRESSION":
+            regressions.append(name)
+
+    if args.save_baseline:
+        baselines[profile_key] = run
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"✅ baseline saved to {args.baseline}")
+    elif regressions:
+        print(f"❌ {len(regressions)} regression(s) beyond {args.threshold:.0%} / {args.min_delta}s: "
+              f"{', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
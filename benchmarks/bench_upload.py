@@ -0,0 +1,72 @@
+"""Upload-to-validated latency: full parse vs first-block sniffing.
+
+Builds a --rows revenue CSV (benchmarks/synthetic_data.py) held in memory like
+a Streamlit upload. It times the old check (pd.read_csv of the whole file, then
+a column check) against upload.inspect_upload. The first inspect hashes the
+file and parses only its first block; a rerun hits the per-hash memo. The same
+is done for the head(20) preview of a --xlsx-rows Excel file (read_excel of
+everything vs nrows).
+
+    python benchmarks/bench_upload.py --rows 2000000 --xlsx-rows 50000
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd  # noqa: E402
+
+from synthetic_data import generate_revenue  # noqa: E402
+from upload import PREVIEW_ROWS, REVENUE_SCHEMA, UploadInspector  # noqa: E402
+
+
+class FakeUpload(io.BytesIO):
+    # In-memory file with the name and file_id of a Streamlit UploadedFile
+    def __init__(self, data, name, file_id):
+        super().__init__(data)
+        self.name = name
+        self.file_id = file_id
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--xlsx-rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    revenue = generate_revenue(args.rows)
+    csv_bytes = revenue.to_csv(index=False).encode()
+    xlsx_buffer = io.BytesIO()
+    revenue.head(args.xlsx_rows).to_excel(xlsx_buffer, index=False)
+    uploads = [
+        ("csv", FakeUpload(csv_bytes, "revenue.csv", "csv-upload"), lambda f: pd.read_csv(f)),
+        ("xlsx", FakeUpload(xlsx_buffer.getvalue(), "revenue.xlsx", "xlsx-upload"), lambda f: pd.read_excel(f)),
+    ]
+
+    print(f"{'file':<6} {'MB':>7}  {'full parse':>10}  {'inspect':>9}  {'rerun':>9}")
+    for kind, upload, full_read in uploads:
+        inspector = UploadInspector()
+        upload.seek(0)
+        df, t_full = timed(lambda: full_read(upload))
+        full_valid = set(REVENUE_SCHEMA).issubset(df.columns)
+        check, t_cold = timed(lambda: inspector.inspect(upload, REVENUE_SCHEMA))
+        _, t_warm = timed(lambda: inspector.inspect(upload, REVENUE_SCHEMA))
+        assert check.valid == full_valid and check.preview.equals(df.head(PREVIEW_ROWS))
+        size = len(upload.getvalue()) / 2**20
+        print(f"{kind:<6} {size:>7.1f}  {t_full:>9.3f}s  {t_cold:>8.4f}s  {t_warm * 1e6:>7.0f}µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Concurrent logins and registrations: legacy users.json vs the user stores.
+
+Seeds --users accounts. From --threads threads at once, it then runs --logins
+logins against random existing accounts and --registrations new sign-ups.
+Backends:
+  legacy  the original auth_utils code: parse users.json on every call and
+          rewrite the whole file on every change
+  json    JSONUserStore (same file, locked atomic rewrites)
+  sqlite  SQLiteUserStore (email primary key, WAL)
+Reports throughput, failed logins (e.g. reads of a half-written file) and
+sign-ups that were acknowledged but are missing afterwards (lost writes).
+
+    python benchmarks/bench_user_store.py --users 5000 --logins 5000 --threads 64
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from user_store import JSONUserStore, SQLiteUserStore, migrate_json_users  # noqa: E402
+
+
+class LegacyUsers:
+    # auth_utils before the user store: whole-file load/save, no locking
+
+    def __init__(self, path):
+        self.path = path
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def get(self, email):
+        return self._load().get(email)
+
+    def add(self, email, record):
+        users = self._load()
+        if email in users:
+            return False
+        users[email] = record
+        with open(self.path, "w") as f:
+            json.dump(users, f, indent=4)
+        return True
+
+
+def user_record(i):
+    return {"first_name": f"User{i}", "last_name": "Load", "password": f"pw-{i}"}
+
+
+def run(store, n_users, logins, registrations, threads):
+    rng = random.Random(0)
+    targets = [rng.randrange(n_users) for _ in range(logins)]
+
+    def login(i):
+        user = store.get(f"user{i}@example.com")
+        return user is not None and user["password"] == f"pw-{i}"
+
+    def register(i):
+        return store.add(f"new{i}@example.com", user_record(i))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        login_results = pool.map(login, targets)
+        register_results = pool.map(register, range(registrations))
+        login_ok = sum(login_results)
+        acknowledged = [i for i, ok in zip(range(registrations), register_results) if ok]
+    elapsed = time.perf_counter() - start
+
+    lost = sum(store.get(f"new{i}@example.com") is None for i in acknowledged)
+    return elapsed, logins - login_ok, lost
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--logins", type=int, default=5000)
+    parser.add_argument("--registrations", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--backends", nargs="*", default=["legacy", "json", "sqlite"])
+    args = parser.parse_args()
+
+    print(f"users: {args.users:,}  logins: {args.logins:,}  sign-ups: {args.registrations}  "
+          f"threads: {args.threads}")
+    print(f"{'backend':<10}{'seconds':>10}{'ops/s':>10}{'failed logins':>15}{'lost sign-ups':>15}")
+    with tempfile.TemporaryDirectory() as tmp:
+        seed_path = os.path.join(tmp, "seed.json")
+        with open(seed_path, "w") as f:
+            json.dump({f"user{i}@example.com": user_record(i) for i in range(args.users)}, f)
+
+        for backend in args.backends:
+            json_path = os.path.join(tmp, f"{backend}.json")
+            with open(seed_path) as src, open(json_path, "w") as dst:
+                dst.write(src.read())
+            if backend == "legacy":
+                store = LegacyUsers(json_path)
+            elif backend == "json":
+                store = JSONUserStore(json_path)
+            else:
+                store = SQLiteUserStore(os.path.join(tmp, "users.db"))
+                start = time.perf_counter()
+                imported = migrate_json_users(store, json_path)
+                print(f"{'':<10}(migrated {imported:,} users from JSON in {time.perf_counter() - start:.2f}s)")
+
+            elapsed, failed, lost = run(store, args.users, args.logins, args.registrations, args.threads)
+            ops = (args.logins + args.registrations) / elapsed
+            print(f"{backend:<10}{elapsed:>10.2f}{ops:>10.0f}{failed:>15}{lost:>15}")
+
+
+if __name__ == "__main__":
+    main()
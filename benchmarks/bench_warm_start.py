@@ -0,0 +1,102 @@
+"""Cold refit vs warm-started incremental refit after appending one month.
+
+Fits every stream on the bundled data minus its last month (populating a
+ModelStore), then appends that month back and times
+  * a cold refit of every stream, and
+  * an incremental refit warm-started from the stored parameters,
+reporting the forecast drift of the warm fit against the cold one and how many
+streams each run fit cold, warm-started or reused. A final run with unchanged
+data shows the no-op path where every stream is reused.
+
+    python benchmarks/bench_warm_start.py --streams 12
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import model_utils  # noqa: E402
+from model_utils import load_revenue_data, load_macro_data, forecast_revenue_streams  # noqa: E402
+from model_store import ModelStore  # noqa: E402
+from bench_parallel_forecast import replicate_streams  # noqa: E402
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def counted_fits(fn, *args, **kwargs):
+    # Runs fn with model_utils._forecast_stream wrapped to count cold and warm-started
+    # fits (serial runs only: pool workers don't see the wrapper); streams that are
+    # not fitted at all were reused. Returns (result, seconds, Counter).
+    fits = Counter()
+    forecast_stream = model_utils._forecast_stream
+
+    def spy(stream, df_stream, regressors, periods, init=None):
+        fits["warm" if init is not None else "cold"] += 1
+        return forecast_stream(stream, df_stream, regressors, periods, init)
+
+    model_utils._forecast_stream = spy
+    try:
+        result, seconds = timed(fn, *args, **kwargs)
+    finally:
+        model_utils._forecast_stream = forecast_stream
+    fits["reused"] = len(result) - fits["warm"] - fits["cold"]
+    return result, seconds, fits
+
+
+def describe(fits):
+    return f"{fits['cold']} cold, {fits['warm']} warm-started, {fits['reused']} reused"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=12)
+    parser.add_argument("--periods", type=int, default=12)
+    args = parser.parse_args()
+
+    _, monthly_revenue = load_revenue_data(os.path.join(ROOT, "Revenue_data.csv"))
+    _, df_macro_monthly = load_macro_data(os.path.join(ROOT, "daily_exchange_inflation_data.csv"))
+    monthly_revenue = replicate_streams(monthly_revenue, args.streams)
+
+    last_month = monthly_revenue['ds'].max()
+    previous = monthly_revenue[monthly_revenue['ds'] < last_month]
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = ModelStore(store_dir)
+        _, t_initial = timed(forecast_revenue_streams, previous, df_macro_monthly,
+                             periods=args.periods, model_store=store)
+
+        cold, t_cold, cold_fits = counted_fits(forecast_revenue_streams, monthly_revenue, df_macro_monthly,
+                                               periods=args.periods)
+        warm, t_warm, warm_fits = counted_fits(forecast_revenue_streams, monthly_revenue, df_macro_monthly,
+                                               periods=args.periods, model_store=store)
+        _, t_noop, noop_fits = counted_fits(forecast_revenue_streams, monthly_revenue, df_macro_monthly,
+                                            periods=args.periods, model_store=store)
+
+    drifts = []
+    for stream in cold:
+        future_cold = cold[stream][cold[stream]['ds'] > last_month]['yhat'].to_numpy()
+        future_warm = warm[stream][warm[stream]['ds'] > last_month]['yhat'].to_numpy()
+        drifts.append(abs(future_warm - future_cold).max() / abs(future_cold).mean() * 100)
+
+    print(f"streams:                 {args.streams}")
+    print(f"initial fit (n-1 months): {t_initial:.2f}s")
+    print(f"cold refit:              {t_cold:.2f}s  ({describe(cold_fits)})")
+    print(f"warm-started refit:      {t_warm:.2f}s  ({t_cold / t_warm:.2f}x; {describe(warm_fits)})")
+    print(f"unchanged data (reuse):  {t_noop:.2f}s  ({describe(noop_fits)})")
+    print(f"forecast drift warm vs cold: max {max(drifts):.3f}%  mean {sum(drifts) / len(drifts):.3f}% "
+          f"(max |Δyhat| over the horizon / mean |yhat|)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Synthetic revenue and macro data at any size.
+
+Vectorized version of the generator in Revenue_data.ipynb: daily orders with
+uniform unit prices (0.5-100) and quantities (1-4), spread over products named
+"<stream> <n>". Beyond the notebook it is parameterized by row count, number
+of streams and products, and years. The first three streams keep the
+notebook's names. A matching daily macro file (exchange rate and inflation
+as random walks) covers the same dates.
+
+    python benchmarks/synthetic_data.py --rows 1000000 --streams 10 --products 200 --years 6 --out data/
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+BASE_STREAMS = ["License", "Managed Service", "Product"]
+
+
+def stream_names(n_streams):
+    return [BASE_STREAMS[i] if i < len(BASE_STREAMS) else f"Stream {i + 1}" for i in range(n_streams)]
+
+
+def generate_revenue(rows, streams=3, products=24, years=6, start="2019-01-01", seed=0):
+    if products < streams:
+        raise ValueError("Need at least one product per stream.")
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=int(round(years * 365.25)), freq="D")
+
+    # products are dealt round-robin over the streams, numbered within their stream
+    names = stream_names(streams)
+    product_stream = np.arange(products) % streams
+    product_number = np.arange(products) // streams + 1
+    product_names = np.array([f"{names[s]} {n}" for s, n in zip(product_stream, product_number)])
+
+    day = np.sort(rng.integers(0, len(dates), rows))
+    product = rng.integers(0, products, rows)
+    return pd.DataFrame({
+        "Order Date": dates[day].strftime("%Y-%m-%d"),
+        "Product Name": product_names[product],
+        "Revenue Stream": np.array(names)[product_stream[product]],
+        "Unit Price": np.round(rng.uniform(0.5, 100, rows), 2),
+        "Quantity": rng.integers(1, 5, rows),
+    })
+
+
+def generate_macro(years=6, start="2019-01-01", seed=0):
+    rng = np.random.default_rng(seed + 1)
+    dates = pd.date_range(start, periods=int(round(years * 365.25)), freq="D")
+    exchange_rate = 385 * np.exp(np.cumsum(rng.normal(0.0006, 0.004, len(dates))))
+    inflation = np.clip(11.5 + np.cumsum(rng.normal(0.005, 0.05, len(dates))), 0, None)
+    return pd.DataFrame({
+        "Order Date": dates.strftime("%Y-%m-%d"),
+        "Exchange Rate": exchange_rate,
+        "Inflation Rate": inflation,
+    })
+
+
+def write_dataset(out_dir, rows, streams=3, products=24, years=6, seed=0):
+    # Returns (revenue_path, macro_path)
+    os.makedirs(out_dir, exist_ok=True)
+    revenue_path = os.path.join(out_dir, "revenue.csv")
+    macro_path = os.path.join(out_dir, "macro.csv")
+    generate_revenue(rows, streams, products, years, seed=seed).to_csv(revenue_path, index=False)
+    generate_macro(years, seed=seed).to_csv(macro_path, index=False)
+    return revenue_path, macro_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=12_000)
+    parser.add_argument("--streams", type=int, default=3)
+    parser.add_argument("--products", type=int, default=24)
+    parser.add_argument("--years", type=float, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="synthetic_data")
+    args = parser.parse_args()
+
+    revenue_path, macro_path = write_dataset(args.out, args.rows, args.streams, args.products, args.years, args.seed)
+    print(f"✅ wrote {revenue_path} and {macro_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# dashboard_utils.py
+
+import numpy as np
+import pandas as pd
+
+# combined_df columns the dashboard reads on each rerun (exports read every column)
+DASHBOARD_COLUMNS = ["Date", "Revenue Stream", "Actual Revenue",
+                     "Forecasted Revenue", "Lower Estimate", "Upper Estimate"]
+MONTH_ORDER = ["January", "February", "March", "April", "May", "June",
+               "July", "August", "September", "October", "November", "December"]
+
+
+# === 1. Filter Options & Filtering ===
+def filter_combined(combined_df, month="All", year="All", stream="All"):
+    # One boolean mask over integer month/year columns instead of chained string filters
+    # (ad-hoc fallback; the dashboard uses a FilterIndex built once per forecast run)
+    mask = np.ones(len(combined_df), dtype=bool)
+    if month != "All":
+        mask &= combined_df['Date'].dt.month.to_numpy() == MONTH_ORDER.index(month) + 1
+    if year != "All":
+        mask &= combined_df['Date'].dt.year.to_numpy() == int(year)
+    if stream != "All":
+        mask &= combined_df["Revenue Stream"].to_numpy() == stream
+    if mask.all():
+        return combined_df
+    return combined_df[mask]
+
+
+class FilterIndex:
+    # Built once per forecast run. Pre-extracts integer year/month columns and a
+    # categorical stream code, then for every combination of Month/Year/Stream filters
+    # (with "All" as a wildcard) keeps the rows grouped by key plus per-key row
+    # offsets. A sidebar selection is then a binary search and a take() of exactly
+    # the matching rows instead of a scan of the whole frame.
+
+    _FIELDS = ("year", "month", "stream")
+
+    def __init__(self, combined_df):
+        dates = combined_df['Date']
+        self.years = dates.dt.year.to_numpy().astype(np.int16)
+        self.months = dates.dt.month.to_numpy().astype(np.int8)
+        self.stream_codes, self.streams = pd.factorize(combined_df["Revenue Stream"], sort=True)
+        self.n_rows = len(combined_df)
+        self.first_year = int(self.years.min()) if self.n_rows else 0
+        self._radix = {
+            "year": (int(self.years.max()) - self.first_year + 1) if self.n_rows else 1,
+            "month": 13,
+            "stream": max(len(self.streams), 1),
+        }
+
+        values = {
+            "year": self.years.astype(np.int64) - self.first_year,
+            "month": self.months.astype(np.int64),
+            "stream": self.stream_codes.astype(np.int64),
+        }
+        self._groups = {}
+        for mask in range(1, 8):
+            used = tuple(f for bit, f in enumerate(self._FIELDS) if mask & (1 << bit))
+            key = self._encode(used, values)
+            order = np.argsort(key, kind="stable").astype(np.int32)
+            keys, offsets = np.unique(key[order], return_index=True)
+            offsets = np.append(offsets, len(order))
+            self._groups[used] = (keys, offsets, order)
+
+    def _encode(self, used, values):
+        key = 0
+        for field in used:
+            key = key * self._radix[field] + values[field]
+        return key
+
+    def options(self):
+        month_options = ["All"] + [MONTH_ORDER[m - 1] for m in np.unique(self.months)]
+        year_options = ["All"] + [str(y) for y in np.unique(self.years)]
+        stream_options = ["All"] + list(self.streams)
+        return month_options, year_options, stream_options
+
+    def positions(self, month="All", year="All", stream="All"):
+        # Row positions for a selection, or None when nothing is filtered
+        values = {}
+        if year != "All":
+            values["year"] = int(year) - self.first_year
+            if not 0 <= values["year"] < self._radix["year"]:
+                return np.empty(0, dtype=np.int32)
+        if month != "All":
+            values["month"] = MONTH_ORDER.index(month) + 1
+        if stream != "All":
+            if stream not in self.streams:
+                return np.empty(0, dtype=np.int32)
+            values["stream"] = self.streams.get_loc(stream)
+        if not values:
+            return None
+
+        used = tuple(f for f in self._FIELDS if f in values)
+        keys, offsets, order = self._groups[used]
+        key = self._encode(used, values)
+        i = np.searchsorted(keys, key)
+        if i == len(keys) or keys[i] != key:
+            return np.empty(0, dtype=np.int32)
+        return order[offsets[i]:offsets[i + 1]]
+
+    def select(self, combined_df, month="All", year="All", stream="All"):
+        rows = self.positions(month, year, stream)
+        if rows is None:
+            return combined_df
+        return combined_df.take(rows)
+
+
+# === 2. Metrics ===
+def _sorted_by_date(df):
+    if df['Date'].is_monotonic_increasing:
+        return df
+    return df.sort_values("Date", kind="stable")
+
+
+def compute_metrics(filtered_df):
+    actual = filtered_df["Actual Revenue"].to_numpy(dtype=float)
+    forecast = filtered_df["Forecasted Revenue"].to_numpy(dtype=float)
+    has_actual = ~np.isnan(actual)
+    revenue = np.where(has_actual, actual, forecast)
+
+    total_revenue = np.nansum(revenue)
+
+    if has_actual.any():
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pct_error = np.abs(forecast[has_actual] - actual[has_actual]) / actual[has_actual] * 100
+        accuracy = 100 - np.nanmean(pct_error) if not np.isnan(pct_error).all() else 0
+    else:
+        accuracy = 0
+
+    # Growth from the earliest to the latest row in the selection
+    if len(revenue) >= 2:
+        if not filtered_df['Date'].is_monotonic_increasing:
+            revenue = revenue[np.argsort(filtered_df['Date'].to_numpy(), kind="stable")]
+        first, last = revenue[0], revenue[-1]
+        growth_rate = ((last - first) / first) * 100 if first != 0 else 0
+    else:
+        growth_rate = 0
+
+    return {
+        "total_revenue": float(total_revenue),
+        "accuracy": float(accuracy),
+        "growth_rate": float(growth_rate),
+    }
+
+
+# === 3. Chart Data ===
+def chart_data(filtered_df):
+    # Revenue line = actuals where known, else forecast; the confidence band only
+    # covers months without actuals
+    no_actual = filtered_df["Actual Revenue"].isna()
+    chart_df = filtered_df.assign(
+        Revenue=filtered_df["Actual Revenue"].fillna(filtered_df["Forecasted Revenue"]),
+        **{
+            "Lower Bound": filtered_df["Lower Estimate"].where(no_actual),
+            "Upper Bound": filtered_df["Upper Estimate"].where(no_actual),
+        }
+    )
+    return _sorted_by_date(chart_df)
+
+
+# === 4. Forecast Window Table ===
+FORECAST_TABLE_COLUMNS = ["Date", "Revenue Stream", "Forecasted Revenue", "Lower Estimate", "Upper Estimate"]
+
+
+def forecast_window(filtered_df, horizon):
+    # The `horizon` months following the latest month with actuals, or every
+    # forecasted row when the selection has no actuals at all
+    has_actual = filtered_df["Actual Revenue"].notna()
+    if has_actual.any():
+        month_index = filtered_df["Date"].dt.year.to_numpy() * 12 + filtered_df["Date"].dt.month.to_numpy()
+        latest = month_index[has_actual.to_numpy()].max()
+        window = filtered_df[(month_index > latest) & (month_index <= latest + horizon)]
+    else:
+        window = filtered_df[filtered_df["Forecasted Revenue"].notna()]
+    return _sorted_by_date(window[FORECAST_TABLE_COLUMNS])
@@ -0,0 +1,124 @@
+# export.py
+
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xlsxwriter
+
+from forecast_cache import atomic_write
+
+EXPORT_FORMATS = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+# Rows converted to Python objects at a time; bounds the working set of every writer
+EXPORT_CHUNK_ROWS = int(os.environ.get("FINOPTIX_EXPORT_CHUNK_ROWS", "20000"))
+
+_SHEET_NAME_INVALID = re.compile(r"[\[\]:*?/\\]")
+
+
+# === 1. Sheets ===
+def sheet_name(name, used):
+    # Excel caps sheet names at 31 characters, forbids []:*?/\ and compares them
+    # case-insensitively; clashes get a numeric suffix
+    base = _SHEET_NAME_INVALID.sub("_", str(name)).strip("'") or "Sheet"
+    candidate, n = base[:31], 1
+    while candidate.lower() in used:
+        n += 1
+        suffix = f" ({n})"
+        candidate = base[:31 - len(suffix)] + suffix
+    used.add(candidate.lower())
+    return candidate
+
+
+def stream_sheets(df, by="Revenue Stream"):
+    # (value, rows) per distinct value of `by`, in order of first appearance. Only
+    # one group is copied out at a time, so a memory-mapped combined_df is never
+    # materialised as a whole.
+    codes, uniques = pd.factorize(df[by])
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    for i, value in enumerate(uniques):
+        yield value, df.take(order[bounds[i]:bounds[i + 1]])
+
+
+def _row_chunks(df, chunk_rows):
+    # Rows as tuples of plain Python values (NaN/NaT -> None), chunk by chunk
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        yield from chunk.itertuples(index=False, name=None)
+
+
+# === 2. Writers ===
+# Each writer goes through atomic_write, so a half-written export is never served
+def write_xlsx(path, sheets, chunk_rows=EXPORT_CHUNK_ROWS):
+    # sheets: iterable of (name, DataFrame). Uses xlsxwriter's constant_memory mode,
+    # which flushes each row to disk as soon as the next one starts, so memory stays
+    # flat however many rows are exported. Rows must therefore be written strictly
+    # in order, one sheet after the other.
+    def write(tmp_path):
+        workbook = xlsxwriter.Workbook(tmp_path, {"constant_memory": True})
+        header = workbook.add_format({"bold": True})
+        date_format = workbook.add_format({"num_format": "yyyy-mm-dd"})
+        used = set()
+        try:
+            for name, df in sheets:
+                worksheet = workbook.add_worksheet(sheet_name(name, used))
+                worksheet.write_row(0, 0, [str(c) for c in df.columns], header)
+                for col, dtype in enumerate(df.dtypes):
+                    if pd.api.types.is_datetime64_any_dtype(dtype):
+                        worksheet.set_column(col, col, 12, date_format)
+                for row, values in enumerate(_row_chunks(df, chunk_rows), start=1):
+                    worksheet.write_row(row, 0, values)
+        finally:
+            workbook.close()
+    return atomic_write(path, write)
+
+
+def write_csv(path, df, chunk_rows=EXPORT_CHUNK_ROWS):
+    # One CSV with every row, appended chunk by chunk
+    def write(tmp_path):
+        with open(tmp_path, "w", newline="") as f:
+            for start in range(0, max(len(df), 1), chunk_rows):
+                df.iloc[start:start + chunk_rows].to_csv(f, index=False, header=start == 0)
+    return atomic_write(path, write)
+
+
+def write_parquet(path, df, by="Revenue Stream"):
+    # One row group per stream, so readers can fetch a single stream cheaply
+    def write(tmp_path):
+        groups = stream_sheets(df, by) if by in df.columns else [(None, df)]
+        writer = None
+        try:
+            for _, rows in groups:
+                table = pa.Table.from_pandas(rows, preserve_index=False)
+                if writer is None:
+                    # schema from the first group: an empty frame has no string types yet
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            df.to_parquet(tmp_path, index=False)
+    return atomic_write(path, write)
+
+
+# === 3. Export Entry Point ===
+def export_table(df, path, fmt, by="Revenue Stream", sheet="Forecast"):
+    # Writes df to path as xlsx (one sheet per `by` value, or a single `sheet` when
+    # by is None), csv or parquet, and returns the path
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'. Use one of {sorted(EXPORT_FORMATS)}.")
+    if fmt == "xlsx":
+        sheets = stream_sheets(df, by) if by is not None else [(sheet, df)]
+        return write_xlsx(path, sheets)
+    if fmt == "csv":
+        return write_csv(path, df)
+    return write_parquet(path, df, by)
@@ -0,0 +1,160 @@
+# forecast_cache.py
+
+import functools
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+
+import pandas as pd
+
+CACHE_DIR = os.environ.get("FINOPTIX_CACHE_DIR", ".finoptix_cache")
+CACHE_MAX_BYTES = int(float(os.environ.get("FINOPTIX_CACHE_MAX_MB", "512")) * 1024 * 1024)
+
+# Bump when the pipeline output changes shape so stale entries stop matching
+CACHE_VERSION = 1
+
+
+# === 1. Shared Helpers ===
+def atomic_write(path, writer, mode=None):
+    # Writes path through a temp file in the same directory + os.replace, so readers
+    # (other sessions or processes) never see a partial file, and removes the temp
+    # file if writing fails. writer gets the temp file opened in mode ("wb", "w"), or
+    # its path when mode is None (for libraries that open the path themselves).
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        if mode is None:
+            os.close(fd)
+            writer(tmp_path)
+        else:
+            with os.fdopen(fd, mode) as f:
+                writer(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def shared_instance(factory):
+    # Turns a no-argument factory into get_X(): the first call builds the instance
+    # under a lock and every later call, from any session's thread, returns it
+    lock = threading.Lock()
+    instances = []
+
+    @functools.wraps(factory)
+    def get():
+        with lock:
+            if not instances:
+                instances.append(factory())
+        return instances[0]
+
+    return get
+
+
+# === 2. Content Fingerprints ===
+def frame_fingerprint(df):
+    h = hashlib.sha256()
+    h.update(json.dumps([str(c) for c in df.columns]).encode())
+    h.update(json.dumps([str(t) for t in df.dtypes]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()
+
+
+def forecast_cache_key(*frames, **config):
+    h = hashlib.sha256()
+    h.update(f"v{CACHE_VERSION}".encode())
+    for df in frames:
+        h.update(frame_fingerprint(df).encode())
+    h.update(json.dumps(config, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+# === 3. Size-Capped LRU Cache on Disk ===
+class ForecastCache:
+    # One pickle per key. The file mtime doubles as the LRU clock: it is refreshed
+    # on every hit and the oldest files are evicted once the directory grows past
+    # max_bytes. Writes go through atomic_write so readers never see a partial
+    # entry, which keeps the directory safe to share between processes.
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        atomic_write(self._path(key), lambda f: pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL), "wb")
+        self._evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".pkl"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+        return entries
+
+    def _evict(self):
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                total -= size
+
+    def clear(self):
+        with self._lock:
+            for _, _, name in self._entries():
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def stats(self):
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+        }
+
+
+@shared_instance
+def get_forecast_cache():
+    # Process-wide instance so every Streamlit session shares the same counters
+    return ForecastCache()
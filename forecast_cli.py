@@ -0,0 +1,162 @@
+"""Headless forecast run, e.g. for a nightly scheduler.
+
+Runs the same pipeline as the dashboard on a revenue and a macro file and writes
+combined_df, the per-stream forecasts and the cross-validation metrics to
+--output-dir, plus a timing report: timings.json (wall/CPU time and peak memory
+per stage, and per stream for the fits) and timings.csv. Results also land
+in the shared forecast cache, so the dashboard only loads them when the same
+files are uploaded later.
+
+    python forecast_cli.py Revenue_data.csv daily_exchange_inflation_data.csv \\
+        --horizon 12 --workers 4 --output-dir forecasts --format both
+
+With --ledger DIR the revenue file only needs the new orders: they are merged
+into the history saved in DIR (orders already there are skipped), and only
+streams whose monthly totals changed are refit when --model-store is set too.
+
+    python forecast_cli.py last_month.csv daily_exchange_inflation_data.csv \\
+        --ledger history/ --model-store models/
+
+With --scenario FILE the regressors follow a supplied future path (a CSV with a
+'ds' or 'Order Date' column and the Exchange Rate / Inflation Rate columns)
+instead of being extrapolated from the macro file.
+
+    python forecast_cli.py Revenue_data.csv daily_exchange_inflation_data.csv \\
+        --scenario high_inflation.csv
+"""
+
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+from export import write_parquet, write_xlsx
+from forecast_cache import get_forecast_cache
+from forecast_module import run_forecasting_pipeline
+from model_registry import get_model_registry
+from model_store import ModelStore
+from model_utils import (
+    EXTRAPOLATION_METHODS, FORECAST_ENGINES, REGRESSORS, aggregate_monthly_revenue, aggregate_revenue_csv,
+    load_regressor_scenario,
+)
+from profiler import profiling, stage
+from revenue_ledger import RevenueLedger
+
+MACRO_COLUMNS = ["Order Date", "Exchange Rate", "Inflation Rate"]
+FORMATS = ("parquet", "excel", "both")
+
+
+# === 1. Inputs ===
+def read_revenue(path):
+    # Monthly revenue per stream, built the same way as the dashboard upload
+    if path.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(path)
+        df['Order Date'] = pd.to_datetime(df['Order Date'])
+        return aggregate_monthly_revenue(df)
+    return aggregate_revenue_csv(path)
+
+
+def read_macro(path):
+    if path.lower().endswith((".xlsx", ".xls")):
+        return pd.read_excel(path, usecols=MACRO_COLUMNS)
+    return pd.read_csv(path, usecols=MACRO_COLUMNS)
+
+
+def read_scenario(path):
+    # Monthly regressor path; ValueError names what is wrong with the file
+    scenario = load_regressor_scenario(path)
+    if scenario.empty:
+        raise ValueError(f"Scenario file has no {' / '.join(REGRESSORS)} values")
+    return scenario
+
+
+# === 2. Outputs ===
+def forecast_table(forecast_results):
+    return pd.concat(forecast_results.values(), ignore_index=True)
+
+
+def write_outputs(output_dir, tables, fmt):
+    # tables: {name: DataFrame}; one Parquet file per table and/or one workbook
+    # with a sheet per table
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    if fmt in ("parquet", "both"):
+        for name, df in tables.items():
+            written.append(write_parquet(os.path.join(output_dir, f"{name}.parquet"), df))
+    if fmt in ("excel", "both"):
+        written.append(write_xlsx(os.path.join(output_dir, "forecast.xlsx"), tables.items()))
+    return written
+
+
+# === 3. Entry Point ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("revenue", help="row-level revenue orders (CSV or Excel)")
+    parser.add_argument("macro", help="daily exchange rate / inflation data (CSV or Excel)")
+    parser.add_argument("--horizon", type=int, default=12, help="months to forecast")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (0 = every core)")
+    parser.add_argument("--engine", default="prophet", choices=sorted(FORECAST_ENGINES))
+    parser.add_argument("--extrapolation", default="last", choices=EXTRAPOLATION_METHODS)
+    parser.add_argument("--output-dir", default="forecast_output")
+    parser.add_argument("--format", default="parquet", choices=FORMATS)
+    parser.add_argument("--model-store", help="directory for fitted parameters, enables incremental refits")
+    parser.add_argument("--ledger", help="directory of saved revenue history; the revenue file is merged into it")
+    parser.add_argument("--scenario", help=f"CSV of future regressor values ({', '.join(REGRESSORS)}) to forecast under")
+    parser.add_argument("--no-cache", action="store_true", help="skip the shared forecast cache and model registry")
+    parser.add_argument("--no-memory", action="store_true", help="skip peak-memory tracing (lower overhead)")
+    args = parser.parse_args(argv)
+
+    scenario = None
+    if args.scenario:
+        try:
+            scenario = read_scenario(args.scenario)
+        except (OSError, ValueError, TypeError) as e:
+            parser.error(f"--scenario {args.scenario}: {e} (expected a 'ds' or 'Order Date' column "
+                         f"and {', '.join(REGRESSORS)})")
+
+    with profiling(trace_memory=not args.no_memory) as profiler:
+        with stage("total"):
+            if args.ledger:
+                ledger = RevenueLedger(args.ledger)
+                with stage("ingest_revenue"):
+                    source = pd.read_excel(args.revenue) if args.revenue.lower().endswith((".xlsx", ".xls")) \
+                        else args.revenue
+                    ingest_stats = ledger.ingest(source)
+                    monthly_revenue = ledger.monthly_revenue()
+                print(f"➕ {ingest_stats['new']:,} new orders merged ({ingest_stats['duplicates']:,} already saved), "
+                      f"{len(ingest_stats['touched']):,} month x stream totals updated")
+            else:
+                with stage("load_revenue"):
+                    monthly_revenue = read_revenue(args.revenue)
+            with stage("load_macro"):
+                macro_df = read_macro(args.macro)
+
+            forecast_results, performance_df, combined_df = run_forecasting_pipeline(
+                monthly_revenue, macro_df,
+                periods=args.horizon,
+                n_jobs=args.workers,
+                cache=None if args.no_cache else get_forecast_cache(),
+                evaluation="sync",
+                model_store=ModelStore(args.model_store) if args.model_store else None,
+                registry=None if args.no_cache else get_model_registry(),
+                engine=args.engine,
+                extrapolation=args.extrapolation,
+                scenario=scenario,
+            )
+
+            tables = {"combined": combined_df, "forecasts": forecast_table(forecast_results)}
+            if performance_df is not None and not performance_df.empty:
+                tables["performance"] = performance_df
+            with stage("write_outputs"):
+                write_outputs(args.output_dir, tables, args.format)
+
+    profiler.to_json(os.path.join(args.output_dir, "timings.json"))
+    profiler.to_csv(os.path.join(args.output_dir, "timings.csv"))
+    print(profiler.summary().to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+    print(f"✅ {len(forecast_results)} streams forecast, outputs in {args.output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
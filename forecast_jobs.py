@@ -0,0 +1,194 @@
+# forecast_jobs.py
+
+import contextlib
+import json
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from forecast_cache import CACHE_DIR, atomic_write, forecast_cache_key
+from forecast_module import run_forecasting_pipeline, to_monthly_revenue
+from model_utils import REGRESSORS
+from profiler import profiling
+
+JOBS_DIR = os.path.join(CACHE_DIR, "jobs")
+# Pipeline runs executed at once; each run still fans its fits out over its own process pool
+JOB_WORKERS = int(os.environ.get("FINOPTIX_JOB_WORKERS", "2"))
+# Finished jobs (status and results) are kept this long, then pruned on the next submit
+JOB_TTL_SECONDS = float(os.environ.get("FINOPTIX_JOB_TTL_HOURS", "24")) * 3600
+# Per-stream progress is written to disk at most this often; state changes always are
+JOB_STATUS_INTERVAL = 0.5
+
+FINISHED = ("done", "failed")
+
+_job_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="finoptix-job")
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+# === 1. Job Ids and Files ===
+def forecast_job_id(monthly_revenue, macro_df, periods=12, engine="prophet", extrapolation="last",
+                    scenario=None, evaluation="sync"):
+    # Content-addressed: the same upload and config always map to the same job, so
+    # identical submissions from any session share one run
+    scenario_frames = [] if scenario is None else [scenario]
+    return forecast_cache_key(monthly_revenue, macro_df, *scenario_frames, job="forecast", periods=periods,
+                              regressors=REGRESSORS, engine=engine, extrapolation=extrapolation,
+                              evaluation=evaluation)
+
+
+def _status_path(job_id):
+    return os.path.join(JOBS_DIR, f"{job_id}.json")
+
+
+def _result_path(job_id):
+    return os.path.join(JOBS_DIR, f"{job_id}.pkl")
+
+
+def _read_status(job_id):
+    try:
+        with open(_status_path(job_id)) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _prune_jobs(now):
+    # caller holds _jobs_lock
+    for job_id, job in list(_jobs.items()):
+        finished = job.status["finished"]
+        if finished is not None and now - finished > JOB_TTL_SECONDS:
+            del _jobs[job_id]
+    if not os.path.isdir(JOBS_DIR):
+        return
+    for name in os.listdir(JOBS_DIR):
+        path = os.path.join(JOBS_DIR, name)
+        job_id = name.split(".")[0]
+        with contextlib.suppress(OSError):
+            if job_id not in _jobs and now - os.path.getmtime(path) > JOB_TTL_SECONDS:
+                os.remove(path)
+
+
+# === 2. Running Jobs ===
+class ForecastJob:
+    # Status of one pipeline run: overall state (queued/running/done/failed), timings,
+    # error and the state of every revenue stream. Mirrored to <job_id>.json so
+    # other processes and later sessions can poll it; the result tuple goes to
+    # <job_id>.pkl once the run succeeds.
+
+    def __init__(self, job_id, streams):
+        self.job_id = job_id
+        self.status = {
+            "job_id": job_id,
+            "state": "queued",
+            "submitted": time.time(),
+            "started": None,
+            "finished": None,
+            "error": None,
+            "streams": {str(stream): "queued" for stream in streams},
+        }
+        self._lock = threading.Lock()
+        self._persisted = 0.0
+        self._persist(force=True)
+
+    def _persist(self, force=False):
+        # caller holds self._lock (or owns the job exclusively)
+        now = time.monotonic()
+        if force or now - self._persisted >= JOB_STATUS_INTERVAL:
+            atomic_write(_status_path(self.job_id), lambda f: json.dump(self.status, f), "w")
+            self._persisted = now
+
+    def set_state(self, state, error=None):
+        with self._lock:
+            self.status["state"] = state
+            self.status["error"] = error
+            if state == "running":
+                self.status["started"] = time.time()
+            if state in FINISHED:
+                self.status["finished"] = time.time()
+            self._persist(force=True)
+
+    def on_stream(self, stream, state):
+        with self._lock:
+            self.status["streams"][str(stream)] = state
+            self._persist()
+
+    def snapshot(self):
+        with self._lock:
+            return json.loads(json.dumps(self.status))
+
+    def run(self, revenue_df, macro_df, profiler, pipeline_kwargs):
+        self.set_state("running")
+        try:
+            with profiling(profiler, trace_memory=False) if profiler is not None else contextlib.nullcontext():
+                result = run_forecasting_pipeline(revenue_df, macro_df, on_stream=self.on_stream, **pipeline_kwargs)
+            atomic_write(_result_path(self.job_id),
+                         lambda f: pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL), "wb")
+        except Exception as e:
+            print(f"❌ Forecast job {self.job_id[:12]} failed: {e}")
+            self.set_state("failed", error=str(e))
+            return
+        with self._lock:
+            # streams the pipeline never reported (e.g. every fit failed) count as failed
+            for stream, state in self.status["streams"].items():
+                if state not in ("done", "reused"):
+                    self.status["streams"][stream] = "failed"
+        self.set_state("done")
+
+
+# === 3. Public API ===
+def submit_forecast_job(revenue_df, macro_df, profiler=None, **pipeline_kwargs):
+    # Queues run_forecasting_pipeline(revenue_df, macro_df, **pipeline_kwargs) on the
+    # job pool and returns its job id right away. A job with the same id that is
+    # queued, running or finished successfully is reused instead of starting again.
+    monthly_revenue = to_monthly_revenue(revenue_df)
+    job_id = forecast_job_id(
+        monthly_revenue, macro_df,
+        **{k: pipeline_kwargs[k] for k in ("periods", "engine", "extrapolation", "scenario", "evaluation")
+           if k in pipeline_kwargs}
+    )
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is not None and job.status["state"] != "failed":
+            return job_id
+        status = _read_status(job_id)
+        if job is None and status is not None and status["state"] == "done" and os.path.exists(_result_path(job_id)):
+            return job_id
+        _prune_jobs(time.time())
+        job = ForecastJob(job_id, monthly_revenue["Revenue Stream"].unique())
+        _jobs[job_id] = job
+    _job_executor.submit(job.run, monthly_revenue, macro_df, profiler, pipeline_kwargs)
+    return job_id
+
+
+def job_status(job_id):
+    # Status dict (see ForecastJob), or None for an unknown job. A job found only on
+    # disk in a queued/running state belongs to a process that has since stopped and
+    # is reported "interrupted"; submitting it again restarts it.
+    job = _jobs.get(job_id)
+    if job is not None:
+        return job.snapshot()
+    status = _read_status(job_id)
+    if status is not None and status["state"] not in FINISHED:
+        status["state"] = "interrupted"
+    return status
+
+
+def job_progress(status):
+    # Fraction of streams that are finished (done, reused or failed)
+    streams = status["streams"]
+    if not streams:
+        return 1.0 if status["state"] in FINISHED else 0.0
+    finished = sum(state in ("done", "reused", "failed") for state in streams.values())
+    return finished / len(streams)
+
+
+def job_result(job_id):
+    # (forecast_results, performance_df, combined_df) of a finished job, else None
+    try:
+        with open(_result_path(job_id), "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
@@ -1,39 +1,177 @@
 # forecast_module.py
 
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 from model_utils import (
+    REGRESSORS,
     load_revenue_data,
     load_macro_data,
+    aggregate_monthly_revenue,
     forecast_revenue_streams,
     evaluate_models,
     merge_forecast_with_history  # ✅ Import the new function
 )
+from forecast_cache import CACHE_DIR, ForecastCache, forecast_cache_key, shared_instance
+from profiler import stage
+
+METRICS_DIR = os.path.join(CACHE_DIR, "metrics")
+# Persisted CV metrics are a size-capped LRU like the forecast cache (one entry per
+# revenue history and engine), so new uploads don't grow the directory forever
+METRICS_MAX_BYTES = int(float(os.environ.get("FINOPTIX_METRICS_MAX_MB", "64")) * 1024 * 1024)
+
+# Cross-validation runs off the interactive path on a single background thread
+# (evaluate_models spreads every (stream, cutoff) refit over a shared process pool)
+_evaluation_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="finoptix-eval")
+_evaluation_jobs = {}
+_evaluation_lock = threading.Lock()
+
+
+# === 1. Prepare Inputs ===
+def to_monthly_revenue(revenue_df):
+    # Accepts either the uploaded row-level orders or revenue already aggregated by
+    # aggregate_revenue_csv (ds, Revenue Stream, y). The caller's frame is not modified.
+    if {'ds', 'Revenue Stream', 'y'}.issubset(revenue_df.columns):
+        return revenue_df
+    revenue_df = revenue_df.assign(**{'Order Date': pd.to_datetime(revenue_df['Order Date'])})
+    return aggregate_monthly_revenue(revenue_df)
+
+
+# === 2. Model Evaluation (persisted, optionally in the background) ===
+def evaluation_key(monthly_revenue, engine="prophet"):
+    # CV metrics only depend on the revenue history and the engine being evaluated,
+    # not on the horizon or macro data
+    return forecast_cache_key(monthly_revenue, stage="evaluation", engine=engine)
+
+
+@shared_instance
+def get_metrics_cache():
+    return ForecastCache(METRICS_DIR, max_bytes=METRICS_MAX_BYTES)
+
+
+def load_model_evaluation(key):
+    return get_metrics_cache().get(key)
+
+
+def _evaluate_and_persist(key, monthly_revenue, engine="prophet"):
+    cv_results, performance_df = evaluate_models(monthly_revenue, engine=engine)
+    if performance_df.empty:
+        # every stream failed: don't pin that outcome for future runs
+        return performance_df
+    get_metrics_cache().put(key, performance_df)
+    return performance_df
+
+
+def start_model_evaluation(monthly_revenue, key=None, engine="prophet"):
+    # Submits CV of this engine on this dataset unless it is already running or
+    # persisted. Returns the key to poll with get_model_evaluation.
+    key = key or evaluation_key(monthly_revenue, engine)
+    if load_model_evaluation(key) is not None:
+        return key
+    with _evaluation_lock:
+        job = _evaluation_jobs.get(key)
+        if job is None or (job.done() and job.exception() is not None):
+            _evaluation_jobs[key] = _evaluation_executor.submit(_evaluate_and_persist, key, monthly_revenue, engine)
+    return key
+
+
+def get_model_evaluation(key):
+    # Returns (status, performance_df) with status one of
+    # "done", "pending", "failed" or "missing" (never started in this process)
+    performance_df = load_model_evaluation(key)
+    if performance_df is not None:
+        return "done", performance_df
+
+    job = _evaluation_jobs.get(key)
+    if job is None:
+        return "missing", None
+    if not job.done():
+        return "pending", None
+    if job.exception() is not None:
+        return "failed", None
+    return "done", job.result()
+
+
+# === 3. Full Pipeline ===
+def run_forecasting_pipeline(revenue_df, macro_df, periods=12, n_jobs=1, cache=None, evaluation="sync",
+                             model_store=None, engine="prophet", extrapolation="last", scenario=None,
+                             registry=None, on_stream=None, ledger=None):
+    # revenue_df is the row-level upload or its monthly aggregate (see to_monthly_revenue).
+    # Results are looked up by a hash of the monthly revenue, the macro data and the
+    # model config, so re-running on identical data (from any session) skips the fits.
+    # evaluation="background" returns as soon as the forecasts are ready; the
+    # performance_df slot is then None until get_model_evaluation reports "done".
+    # A ModelStore makes refits incremental, a ModelRegistry shares per-stream fits
+    # between sessions (see _forecast_streams_prophet) and engine swaps the forecaster;
+    # extrapolation and scenario control the future regressor values
+    # (see forecast_revenue_streams and project_regressors). on_stream(stream, status)
+    # reports per-stream progress; streams served from the cache are reported "reused".
+    # With a RevenueLedger, revenue_df holds only new row-level orders: they are merged
+    # into the ledger's saved history (orders already in it are skipped) and the whole
+    # history is forecast. Together with a ModelStore or ModelRegistry only the streams
+    # whose monthly totals changed are refit.
+    if evaluation not in ("sync", "background"):
+        raise ValueError(f"Unknown evaluation mode: {evaluation}")
 
-def run_forecasting_pipeline(revenue_df, macro_df):
     # Reconstruct monthly datasets expected by forecasting functions
-    revenue_df['Order Date'] = pd.to_datetime(revenue_df['Order Date'])
-    revenue_df['Revenue'] = revenue_df['Unit Price'] * revenue_df['Quantity']
-    
-    monthly_revenue = (
-        revenue_df.groupby([pd.Grouper(key='Order Date', freq='M'), 'Revenue Stream'])['Revenue']
-        .sum()
-        .reset_index()
-    )
-    monthly_revenue.rename(columns={'Order Date': 'ds', 'Revenue': 'y'}, inplace=True)
-
-    macro_df['ds'] = pd.to_datetime(macro_df['Order Date'])
-    macro_df = macro_df.drop(columns='Order Date')
-    df_macro_monthly = macro_df.groupby(pd.Grouper(key='ds', freq='M'))[
-        ['Exchange Rate', 'Inflation Rate']
-    ].mean().reset_index()
-
-    # Run forecast
-    forecast_results = forecast_revenue_streams(monthly_revenue, df_macro_monthly, macro_df)
-
-    # Merge forecast and history for reporting
-    combined_df = merge_forecast_with_history(forecast_results, monthly_revenue)  # ✅
-
-    # Evaluate model
-    cv_results, performance_df = evaluate_models(revenue_df)
+    if ledger is not None:
+        if {'ds', 'y'}.issubset(revenue_df.columns):
+            raise ValueError("Delta ingest needs row-level orders, not monthly totals.")
+        with stage('ingest_delta'):
+            ledger.ingest(revenue_df)
+        monthly_revenue = ledger.monthly_revenue()
+    else:
+        monthly_revenue = to_monthly_revenue(revenue_df)
+
+    cached = None
+    if cache is not None:
+        scenario_frames = [] if scenario is None else [scenario]
+        with stage('cache_lookup'):
+            cache_key = forecast_cache_key(monthly_revenue, macro_df, *scenario_frames, periods=periods,
+                                           regressors=REGRESSORS, engine=engine, extrapolation=extrapolation)
+            cached = cache.get(cache_key)
+
+    if cached is not None:
+        forecast_results, performance_df, combined_df = cached
+        if on_stream is not None:
+            for stream in forecast_results:
+                on_stream(stream, 'reused')
+    else:
+        with stage('macro_monthly'):
+            macro_df = macro_df.assign(ds=pd.to_datetime(macro_df['Order Date']))
+            macro_df = macro_df.drop(columns='Order Date')
+            df_macro_monthly = macro_df.groupby(pd.Grouper(key='ds', freq='M'))[
+                ['Exchange Rate', 'Inflation Rate']
+            ].mean().reset_index()
+
+        # Run forecast
+        with stage('forecast'):
+            forecast_results = forecast_revenue_streams(
+                monthly_revenue, df_macro_monthly, periods=periods, n_jobs=n_jobs,
+                model_store=model_store, engine=engine, extrapolation=extrapolation, scenario=scenario,
+                registry=registry, on_stream=on_stream
+            )
+
+        # Merge forecast and history for reporting
+        with stage('merge_history'):
+            combined_df = merge_forecast_with_history(forecast_results, monthly_revenue)  # ✅
+        performance_df = None
+
+    # Evaluate model (reuse metrics persisted by an earlier run when available)
+    if performance_df is None:
+        metrics_key = evaluation_key(monthly_revenue, engine)
+        performance_df = load_model_evaluation(metrics_key)
+        if performance_df is None:
+            if evaluation == "sync":
+                with stage('cross_validation'):
+                    performance_df = _evaluate_and_persist(metrics_key, monthly_revenue, engine)
+            else:
+                start_model_evaluation(monthly_revenue, key=metrics_key, engine=engine)
+
+    if cache is not None and (cached is None or (cached[1] is None and performance_df is not None)):
+        with stage('cache_store'):
+            cache.put(cache_key, (forecast_results, performance_df, combined_df))
 
     return forecast_results, performance_df, combined_df  # ✅ Return the merged report
@@ -0,0 +1,93 @@
+# mailer.py
+
+import os
+import queue
+import smtplib
+import threading
+from email.message import EmailMessage
+
+from forecast_cache import shared_instance
+
+SMTP_HOST = os.environ.get("FINOPTIX_SMTP_HOST", "")
+SMTP_PORT = int(os.environ.get("FINOPTIX_SMTP_PORT", "587"))
+SMTP_USER = os.environ.get("FINOPTIX_SMTP_USER", "")
+SMTP_PASSWORD = os.environ.get("FINOPTIX_SMTP_PASSWORD", "")
+MAIL_FROM = os.environ.get("FINOPTIX_MAIL_FROM", "no-reply@finoptix.local")
+
+
+# === 1. Senders ===
+def build_message(to, subject, body, sender=MAIL_FROM):
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = to
+    message["Subject"] = subject
+    message.set_content(body)
+    return message
+
+
+class SMTPSender:
+    def __init__(self, host=SMTP_HOST, port=SMTP_PORT, user=SMTP_USER, password=SMTP_PASSWORD):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+
+    def __call__(self, message):
+        with smtplib.SMTP(self.host, self.port, timeout=30) as smtp:
+            smtp.starttls()
+            if self.user:
+                smtp.login(self.user, self.password)
+            smtp.send_message(message)
+
+
+class StubSMTPSink:
+    # Keeps messages in memory instead of sending them (local runs and tests);
+    # echo=True also prints them, like the old debug output
+    def __init__(self, echo=False):
+        self.echo = echo
+        self.messages = []
+        self._lock = threading.Lock()
+
+    def __call__(self, message):
+        with self._lock:
+            self.messages.append(message)
+        if self.echo:
+            print(f"[DEBUG] Mail to {message['To']}: {message['Subject']}\n{message.get_content()}")
+
+
+# === 2. Background Queue ===
+class EmailQueue:
+    # send() only enqueues; worker threads hand messages to the sender, so the
+    # request that triggered the mail returns without waiting on SMTP. A failed
+    # delivery is logged and counted, it never reaches the caller.
+
+    def __init__(self, sender, workers=1):
+        self.sender = sender
+        self.failed = 0
+        self._queue = queue.Queue()
+        for i in range(workers):
+            threading.Thread(target=self._work, name=f"finoptix-mail-{i}", daemon=True).start()
+
+    def _work(self):
+        while True:
+            message = self._queue.get()
+            try:
+                self.sender(message)
+            except Exception as e:
+                self.failed += 1
+                print(f"❌ Sending mail to {message['To']} failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def send(self, to, subject, body):
+        self._queue.put(build_message(to, subject, body))
+
+    def join(self):
+        # Blocks until every queued message has been handed to the sender
+        self._queue.join()
+
+
+@shared_instance
+def get_email_queue():
+    # Real SMTP when FINOPTIX_SMTP_HOST is set, otherwise the printing stub
+    return EmailQueue(SMTPSender() if SMTP_HOST else StubSMTPSink(echo=True))
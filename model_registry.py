@@ -0,0 +1,139 @@
+# model_registry.py
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+from forecast_cache import CACHE_DIR, ForecastCache, shared_instance
+
+REGISTRY_DIR = os.path.join(CACHE_DIR, "registry")
+REGISTRY_MEMORY_BYTES = int(float(os.environ.get("FINOPTIX_REGISTRY_MEMORY_MB", "64")) * 1024 * 1024)
+REGISTRY_DISK_BYTES = int(float(os.environ.get("FINOPTIX_REGISTRY_DISK_MB", "1024")) * 1024 * 1024)
+# Longest a session waits on a fit another session already started before fitting itself
+REGISTRY_WAIT_SECONDS = float(os.environ.get("FINOPTIX_REGISTRY_WAIT_SECONDS", "600"))
+
+# Bump when the stored record changes shape so stale entries stop matching
+REGISTRY_VERSION = 1
+
+
+def registry_key(data_hash, stream, config):
+    # (dataset fingerprint, stream, model config) -> one hex key
+    h = hashlib.sha256()
+    h.update(f"v{REGISTRY_VERSION}".encode())
+    h.update(data_hash.encode())
+    h.update(json.dumps(str(stream)).encode())
+    h.update(json.dumps(config, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+# === Process-Wide Registry of Fitted Stream Models ===
+class ModelRegistry:
+    # Fitted per-stream models (Prophet parameters, regressor effects and forecast)
+    # shared by every session in the process, so analysts uploading the same data
+    # reuse each other's fits and a logout no longer throws them away.
+    #
+    # Two tiers: an in-memory LRU of pickled records capped at memory_bytes, in front
+    # of a ForecastCache directory capped at disk_bytes that also survives restarts
+    # and is shared between processes. Records are kept pickled in memory too, so
+    # every get() hands out a private copy and sessions never share mutable frames.
+    #
+    # acquire() also deduplicates fits in flight: the first caller for a key gets
+    # "fit" and must call release(); concurrent callers get "wait" with an event
+    # that is set once the record is stored (or the fit failed).
+
+    def __init__(self, cache_dir=REGISTRY_DIR, memory_bytes=REGISTRY_MEMORY_BYTES, disk_bytes=REGISTRY_DISK_BYTES):
+        self.memory_bytes = memory_bytes
+        self.disk = ForecastCache(cache_dir, max_bytes=disk_bytes)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._memory_used = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def _remember(self, key, blob):
+        # caller holds self._lock
+        if key in self._memory:
+            self._memory_used -= len(self._memory.pop(key))
+        self._memory[key] = blob
+        self._memory_used += len(blob)
+        while self._memory_used > self.memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    def _lookup(self, key):
+        # caller holds self._lock
+        blob = self._memory.get(key)
+        if blob is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return blob
+        blob = self.disk.get(key)
+        if blob is not None:
+            self._remember(key, blob)
+            self.disk_hits += 1
+            return blob
+        self.misses += 1
+        return None
+
+    def get(self, key):
+        with self._lock:
+            blob = self._lookup(key)
+        return None if blob is None else pickle.loads(blob)
+
+    def put(self, key, record):
+        blob = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        self.disk.put(key, blob)
+        with self._lock:
+            self._remember(key, blob)
+
+    def acquire(self, key):
+        # ("hit", record), ("fit", None) or ("wait", event)
+        with self._lock:
+            event = self._in_flight.get(key)
+            if event is not None:
+                return "wait", event
+            blob = self._lookup(key)
+            if blob is None:
+                self._in_flight[key] = threading.Event()
+                return "fit", None
+        return "hit", pickle.loads(blob)
+
+    def release(self, key, record=None):
+        # Ends a fit claimed with acquire(); stores record unless the fit failed
+        if record is not None:
+            self.put(key, record)
+        with self._lock:
+            event = self._in_flight.pop(key, None)
+        if event is not None:
+            event.set()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_used = 0
+        self.disk.clear()
+
+    def stats(self):
+        with self._lock:
+            memory = {"memory_entries": len(self._memory), "memory_bytes": self._memory_used,
+                      "in_flight": len(self._in_flight)}
+        disk = self.disk.stats()
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            **memory,
+            "disk_entries": disk["entries"],
+            "disk_bytes": disk["bytes"],
+        }
+
+
+@shared_instance
+def get_model_registry():
+    # Process-wide instance shared by every Streamlit session
+    return ModelRegistry()
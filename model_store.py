@@ -0,0 +1,37 @@
+# model_store.py
+
+import hashlib
+import os
+import pickle
+
+from forecast_cache import atomic_write
+
+
+# === Per-Stream Model State on Disk ===
+class ModelStore:
+    # Keeps, for every revenue stream, the fingerprint of the data it was last fit on,
+    # the model config, the fitted Prophet parameters (used to warm-start the next
+    # fit) and the resulting forecast (reused as-is when nothing changed).
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        os.makedirs(store_dir, exist_ok=True)
+
+    def _path(self, stream):
+        name = hashlib.sha1(str(stream).encode()).hexdigest()
+        return os.path.join(self.store_dir, f"{name}.pkl")
+
+    def get(self, stream):
+        try:
+            with open(self._path(stream), "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def put(self, stream, record):
+        atomic_write(self._path(stream), lambda f: pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL), "wb")
+
+    def clear(self):
+        for name in os.listdir(self.store_dir):
+            if name.endswith(".pkl"):
+                os.remove(os.path.join(self.store_dir, name))
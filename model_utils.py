@@ -1,19 +1,119 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from statistics import NormalDist
+
+import numpy as np
 import pandas as pd
 from prophet import Prophet
-from prophet.diagnostics import cross_validation, performance_metrics
+from prophet.diagnostics import generate_cutoffs, performance_metrics
+from prophet.utilities import regressor_coefficients
+
+from forecast_cache import frame_fingerprint
+from model_registry import REGISTRY_WAIT_SECONDS, registry_key
+from profiler import stage, submit_profiled
+
+REGRESSORS = ['Exchange Rate', 'Inflation Rate']
+# Worker processes are started from a clean server process, never forked from the
+# caller: pools are created from job and evaluation threads of a multi-threaded
+# Streamlit server, and forking a process that holds other threads' locks can deadlock
+POOL_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+if POOL_CONTEXT.get_start_method() == "forkserver":
+    # the server imports Prophet once; each worker is forked from it already warm
+    POOL_CONTEXT.set_forkserver_preload(["model_utils"])
 
 
 # === 1. Load and Preprocess Revenue Data ===
-def load_revenue_data(filepath):
-    df = pd.read_csv(filepath)
-    df['Order Date'] = pd.to_datetime(df['Order Date'])
-    df['Revenue'] = df['Unit Price'] * df['Quantity']
+REVENUE_COLUMNS = ['Order Date', 'Revenue Stream', 'Unit Price', 'Quantity']
+REVENUE_DTYPES = {
+    'Order Date': 'category',
+    'Product Name': 'category',
+    'Revenue Stream': 'category',
+    'Unit Price': 'float32',
+    'Quantity': 'int32',
+}
+
+
+STREAM_LEVEL = ('Revenue Stream',)
+# Columns of the monthly stream totals that feed the forecast
+MONTHLY_REVENUE_COLUMNS = ['ds', *STREAM_LEVEL, 'y']
+PRODUCT_LEVEL = ('Revenue Stream', 'Product Name')
+
+
+def aggregate_monthly_revenue(df, by=STREAM_LEVEL):
+    # Row-level orders -> monthly revenue per stream (ds, Revenue Stream, y), or per
+    # stream and product with by=PRODUCT_LEVEL
+    by = list(by)
+    if 'Revenue' not in df.columns:
+        df = df.assign(Revenue=df['Unit Price'] * df['Quantity'])
     monthly_revenue = (
-        df.groupby([pd.Grouper(key='Order Date', freq='M'), 'Revenue Stream'])['Revenue']
+        df.groupby([pd.Grouper(key='Order Date', freq='M'), *by], observed=True)['Revenue']
         .sum()
         .reset_index()
     )
     monthly_revenue.rename(columns={'Order Date': 'ds', 'Revenue': 'y'}, inplace=True)
+    for col in by:
+        monthly_revenue[col] = monthly_revenue[col].astype(str)
+    return monthly_revenue
+
+
+def aggregate_revenue_csv(filepath_or_buffer, chunksize=500_000, by=STREAM_LEVEL):
+    # Streaming alternative to read_csv + aggregate_monthly_revenue: reads only the
+    # needed columns in chunks with narrow dtypes and folds each chunk into running
+    # month x stream sums, so peak memory tracks the number of groups, not rows.
+    by = list(by)
+    usecols = REVENUE_COLUMNS + [col for col in by if col not in REVENUE_COLUMNS]
+    totals = None
+    reader = pd.read_csv(
+        filepath_or_buffer,
+        usecols=usecols,
+        dtype={col: REVENUE_DTYPES[col] for col in usecols if col in REVENUE_DTYPES},
+        chunksize=chunksize,
+    )
+    chunks = iter(reader)
+    while True:
+        with stage('parse_csv'):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+        with stage('monthly_groupby'):
+            # dates repeat heavily, so parse each distinct date string once
+            order_dates = chunk['Order Date'].cat
+            month_of_date = pd.to_datetime(order_dates.categories).to_period('M')
+            month = month_of_date.take(order_dates.codes, allow_fill=True, fill_value=pd.NaT)
+            # accumulate in float64 so float32 prices don't lose cents over millions of rows
+            revenue = chunk['Unit Price'].astype('float64') * chunk['Quantity']
+            partial = revenue.groupby([month, *[chunk[col] for col in by]], observed=True).sum()
+            # categories differ between chunks; align on plain names
+            levels = list(range(1, len(by) + 1))
+            partial.index = partial.index.set_levels([partial.index.levels[i].astype(str) for i in levels],
+                                                     level=levels)
+            totals = partial if totals is None else totals.add(partial, fill_value=0)
+
+    columns = ['ds', *by, 'y']
+    if totals is None:
+        empty = {col: pd.Series(dtype=str) for col in by}
+        return pd.DataFrame({'ds': pd.Series(dtype='datetime64[ns]'), **empty, 'y': pd.Series(dtype='float64')})
+
+    monthly_revenue = totals.sort_index().rename('y').reset_index()
+    monthly_revenue.columns = columns
+    monthly_revenue['ds'] = monthly_revenue['ds'].dt.to_timestamp(how='end').dt.normalize()
+    for col in by:
+        monthly_revenue[col] = monthly_revenue[col].astype(str)
+    return monthly_revenue
+
+
+def load_revenue_data(filepath):
+    with stage('parse_csv'):
+        df = pd.read_csv(filepath)
+        df['Order Date'] = pd.to_datetime(df['Order Date'])
+    df['Revenue'] = df['Unit Price'] * df['Quantity']
+    with stage('monthly_groupby'):
+        monthly_revenue = aggregate_monthly_revenue(df)
     return df, monthly_revenue
 
 
@@ -28,30 +128,315 @@ def load_macro_data(filepath):
     return df_macro, df_macro_monthly
 
 
+def load_regressor_scenario(filepath):
+    # A future path for the regressors: a CSV with a date column ('ds' or
+    # 'Order Date') and the REGRESSORS columns, daily or monthly, averaged to
+    # month-end like load_macro_data
+    scenario = pd.read_csv(filepath)
+    date_column = 'ds' if 'ds' in scenario.columns else 'Order Date'
+    missing = [c for c in [date_column, *REGRESSORS] if c not in scenario.columns]
+    if missing:
+        raise ValueError(f"Scenario file is missing columns: {missing}")
+    scenario = scenario.assign(ds=pd.to_datetime(scenario[date_column]))
+    return scenario.groupby(pd.Grouper(key='ds', freq='M'))[REGRESSORS].mean().dropna(how='all').reset_index()
+
+
+# === 2b. Project Regressors onto the Forecast Months ===
+EXTRAPOLATION_METHODS = ('last', 'drift')
+
+
+def _month_number(ds):
+    ds = pd.DatetimeIndex(ds)
+    return np.asarray(ds.year) * 12 + np.asarray(ds.month)
+
+
+def project_regressors(df_macro_monthly, ds, extrapolation='last', scenario=None):
+    # Regressor values for every month in ds (history and future), built once and
+    # shared by all streams. Each month takes the latest monthly mean at or before it
+    # (a sorted as-of join); months before the data start take the first value.
+    # A scenario frame (see load_regressor_scenario) extends the observations past
+    # the last observed month. Beyond that, extrapolation='last' carries the last
+    # value forward and 'drift' continues the average monthly change.
+    if extrapolation not in EXTRAPOLATION_METHODS:
+        raise ValueError(f"Unknown extrapolation: {extrapolation}")
+
+    observed = df_macro_monthly[['ds', *REGRESSORS]].dropna(how='all', subset=REGRESSORS)
+    if scenario is not None:
+        scenario = scenario[scenario['ds'] > observed['ds'].max()] if not observed.empty else scenario
+        observed = pd.concat([observed, scenario[['ds', *REGRESSORS]]], ignore_index=True)
+    if observed.empty:
+        raise ValueError("No macro data to project the regressors from.")
+    observed = observed.sort_values('ds').ffill().bfill()
+    observed['ds'] = observed['ds'].astype('datetime64[ns]')
+
+    keys = pd.DataFrame({'ds': pd.DatetimeIndex(ds).unique().sort_values().astype('datetime64[ns]')})
+    projected = pd.merge_asof(keys, observed, on='ds', direction='backward')
+    projected[REGRESSORS] = projected[REGRESSORS].fillna(observed[REGRESSORS].iloc[0])
+
+    if extrapolation == 'drift' and len(observed) > 1:
+        first, last = _month_number(observed['ds'].iloc[[0, -1]])
+        slope = (observed[REGRESSORS].iloc[-1] - observed[REGRESSORS].iloc[0]) / max(last - first, 1)
+        steps = np.clip(_month_number(projected['ds']) - last, 0, None)
+        projected[REGRESSORS] += np.outer(steps, slope.to_numpy())
+    return projected
+
+
+def forecast_months(monthly_revenue, periods):
+    # Month-end grid from the first history month through the last forecast month,
+    # plus the exact history dates, i.e. every ds a stream model can ask for
+    history_ds = pd.DatetimeIndex(monthly_revenue['ds'].unique())
+    grid = pd.date_range(history_ds.min(), history_ds.max(), freq='M')
+    future_ds = pd.date_range(history_ds.max(), periods=periods + 1, freq='M')[1:]
+    return history_ds.union(grid).union(future_ds)
+
+
 # === 3. Run Forecast for Each Revenue Stream ===
-def forecast_revenue_streams(monthly_revenue, df_macro_monthly, df_macro, periods=12):
-    forecast_results = {}
+def resolve_n_jobs(n_jobs):
+    if n_jobs is None or n_jobs < 1:
+        return os.cpu_count() or 1
+    return n_jobs
+
+
+def _new_model():
+    model = Prophet()
+    for regressor in REGRESSORS:
+        model.add_regressor(regressor)
+    return model
 
-    for stream in monthly_revenue['Revenue Stream'].unique():
-        df_stream = monthly_revenue[monthly_revenue['Revenue Stream'] == stream][['ds', 'y']]
-        df_model = pd.merge(df_stream, df_macro_monthly, on='ds', how='left')
-        df_model.fillna(method='ffill', inplace=True)
 
-        model = Prophet()
-        model.add_regressor('Exchange Rate')
-        model.add_regressor('Inflation Rate')
-        model.fit(df_model)
+def warm_start_params(model):
+    # Fitted MAP parameters in the shape Prophet.fit(init=...) expects
+    return {
+        'k': model.params['k'][0][0],
+        'm': model.params['m'][0][0],
+        'sigma_obs': model.params['sigma_obs'][0][0],
+        'delta': model.params['delta'][0],
+        'beta': model.params['beta'][0],
+    }
 
-        future = model.make_future_dataframe(periods=periods, freq='M')
-        future = pd.merge(future, df_macro, on='ds', how='left')
-        future.fillna(method='ffill', inplace=True)
 
+def regressor_effects(model):
+    # Change in forecast revenue per unit of each regressor, in REGRESSORS order
+    # (the regressors are additive, so this holds for every month)
+    coefficients = regressor_coefficients(model).set_index('regressor')['coef']
+    return coefficients.reindex(REGRESSORS).to_numpy(dtype=float)
+
+
+def _forecast_stream(stream, df_stream, regressors, periods, init=None):
+    # regressors: the project_regressors frame shared by every stream
+    df_model = pd.merge(df_stream, regressors, on='ds', how='left')
+
+    with stage('prophet_fit', stream):
+        model = _new_model()
+        if init is None:
+            model.fit(df_model)
+        else:
+            try:
+                # Prophet picks Newton for short series, which crawls from a warm start;
+                # quasi-Newton from the previous optimum converges in a handful of steps
+                model.fit(df_model, init=init, algorithm='LBFGS')
+            except Exception:
+                # Stale parameters (e.g. a different number of seasonality terms): fit cold
+                model = _new_model()
+                model.fit(df_model)
+
+    future = model.make_future_dataframe(periods=periods, freq='M')
+    future = pd.merge(future, regressors, on='ds', how='left')
+
+    with stage('prophet_predict', stream):
         forecast = model.predict(future)
-        forecast['Revenue Stream'] = stream
-        forecast_results[stream] = forecast
+    forecast['Revenue Stream'] = stream
+    return forecast, warm_start_params(model), regressor_effects(model)
+
 
+def forecast_revenue_streams(monthly_revenue, df_macro_monthly, periods=12, n_jobs=1, model_store=None,
+                             engine='prophet', extrapolation='last', scenario=None, effects=None, registry=None,
+                             on_stream=None):
+    # The regressors are projected onto history and future months once (see
+    # project_regressors) and the same frame is handed to every stream's model.
+    # engine picks the forecaster: a name from FORECAST_ENGINES or any callable with
+    # the signature engine(monthly_revenue, regressors, periods) that returns
+    # {stream: frame with ds, yhat, yhat_lower, yhat_upper, Revenue Stream}.
+    # n_jobs, model_store and registry only apply to the Prophet engine. Pass a dict as effects
+    # to also collect each stream's regressor coefficients (see regressor_effects);
+    # a custom engine then has to accept an effects keyword too. on_stream(stream, status)
+    # is called as streams progress ("running", "waiting", "reused", "done", "failed").
+    if not callable(engine) and engine not in FORECAST_ENGINES:
+        raise ValueError(f"Unknown forecast engine: {engine}")
+    with stage('project_regressors'):
+        regressors = project_regressors(df_macro_monthly, forecast_months(monthly_revenue, periods),
+                                        extrapolation=extrapolation, scenario=scenario)
+    if engine == 'prophet':
+        return _forecast_streams_prophet(monthly_revenue, regressors, periods, n_jobs, model_store, effects,
+                                         registry, on_stream)
+    if not callable(engine):
+        engine = FORECAST_ENGINES[engine]
+    with stage('forecast_engine'):
+        if effects is None:
+            forecast_results = engine(monthly_revenue, regressors, periods)
+        else:
+            forecast_results = engine(monthly_revenue, regressors, periods, effects=effects)
+    if not forecast_results:
+        raise ValueError("No revenue stream could be forecast.")
+    if on_stream is not None:
+        for stream in forecast_results:
+            on_stream(stream, 'done')
     return forecast_results
 
+
+def _stream_fingerprint(df_stream, regressors, periods):
+    # Hash of everything a stream's fit depends on besides the config: its history
+    # and the regressor values on its own history months and forecast horizon
+    future_ds = pd.date_range(df_stream['ds'].max(), periods=periods + 1, freq='M')[1:]
+    model_ds = pd.DataFrame({'ds': pd.DatetimeIndex(df_stream['ds']).append(future_ds).astype('datetime64[ns]')})
+    frame = model_ds.merge(df_stream, on='ds', how='left').merge(regressors, on='ds', how='left')
+    return frame_fingerprint(frame)
+
+
+def _forecast_streams_prophet(monthly_revenue, regressors, periods=12, n_jobs=1, model_store=None, effects=None,
+                              registry=None, on_stream=None):
+    # One Prophet fit per stream. n_jobs > 1 fans the fits out over a process pool,
+    # n_jobs=None (or < 1) uses every core. Results keep first-appearance stream order
+    # and a failing stream is reported and skipped instead of aborting the others.
+    #
+    # With a ModelStore, streams whose data and config are unchanged since the last
+    # run reuse their stored forecast, and the rest are warm-started from their last
+    # fitted parameters, so appending a month only refits the streams it touched.
+    #
+    # A ModelRegistry is checked first: a stream already fitted on the same data and
+    # config by any session is reused, and a stream another session is fitting right
+    # now is waited for instead of being fitted twice.
+    stream_frames = [
+        (stream, df_stream[['ds', 'y']])
+        for stream, df_stream in monthly_revenue.groupby('Revenue Stream', sort=False, observed=True)
+    ]
+
+    forecast_results = {}
+    jobs = []
+    waiting = []
+    claimed = set()
+    notify = on_stream or (lambda stream, status: None)
+    if model_store is not None or registry is not None:
+        # The model's shape: stored parameters are valid warm starts while it matches.
+        # Regressor values are part of each stream's data hash (see _stream_fingerprint),
+        # so new months of other streams leave a stream's hash alone.
+        config = {
+            'periods': periods,
+            'regressors': REGRESSORS,
+        }
+
+    def _reuse(stream, record):
+        forecast_results[stream] = record['forecast']
+        if effects is not None:
+            effects[stream] = record['effects']
+        notify(stream, 'reused')
+
+    def _collect(stream, result, data_hash, key):
+        forecast, params, stream_effects = result
+        forecast_results[stream] = forecast
+        if effects is not None:
+            effects[stream] = stream_effects
+        notify(stream, 'done')
+        if data_hash is None:
+            return None
+        record = {
+            'config': config,
+            'data_hash': data_hash,
+            'params': params,
+            'effects': stream_effects,
+            'forecast': forecast,
+        }
+        if model_store is not None:
+            model_store.put(stream, record)
+        if key is not None:
+            registry.release(key, record)
+            claimed.discard(key)
+        return record
+
+    try:
+        for stream, df_stream in stream_frames:
+            init = None
+            data_hash = key = None
+            if model_store is not None or registry is not None:
+                data_hash = _stream_fingerprint(df_stream, regressors, periods)
+            if registry is not None:
+                key = registry_key(data_hash, stream, config)
+                status, found = registry.acquire(key)
+                if status == 'hit':
+                    _reuse(stream, found)
+                    if model_store is not None:
+                        model_store.put(stream, found)  # warm start for this user's next upload
+                    continue
+                if status == 'wait':
+                    waiting.append((stream, df_stream, data_hash, key, found))
+                    notify(stream, 'waiting')
+                    continue
+                claimed.add(key)
+            if model_store is not None:
+                record = model_store.get(stream)
+                if record is not None and record['config'] == config:
+                    if record['data_hash'] == data_hash and 'effects' in record:
+                        _reuse(stream, record)
+                        if key is not None:
+                            registry.release(key, record)
+                            claimed.discard(key)
+                        continue
+                    init = record['params']
+            jobs.append((stream, df_stream, init, data_hash, key))
+
+        n_jobs = min(resolve_n_jobs(n_jobs), max(len(jobs), 1))
+        if n_jobs == 1:
+            for stream, df_stream, init, data_hash, key in jobs:
+                notify(stream, 'running')
+                try:
+                    with stage('forecast_stream', stream):
+                        result = _forecast_stream(stream, df_stream, regressors, periods, init)
+                    _collect(stream, result, data_hash, key)
+                except Exception as e:
+                    print(f"❌ Forecast failed for {stream}: {e}")
+                    notify(stream, 'failed')
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs, mp_context=POOL_CONTEXT) as pool:
+                futures = {}
+                for stream, df_stream, init, data_hash, key in jobs:
+                    future = submit_profiled(pool, 'forecast_stream', stream,
+                                             _forecast_stream, stream, df_stream, regressors, periods, init)
+                    futures[future] = (stream, data_hash, key)
+                    notify(stream, 'running')
+                # collected as they finish so progress is reported stream by stream
+                for future in as_completed(futures):
+                    stream, data_hash, key = futures[future]
+                    try:
+                        _collect(stream, future.result(), data_hash, key)
+                    except Exception as e:
+                        print(f"❌ Forecast failed for {stream}: {e}")
+                        notify(stream, 'failed')
+    finally:
+        # Wake sessions waiting on fits that failed here
+        for key in list(claimed):
+            registry.release(key)
+
+    for stream, df_stream, data_hash, key, event in waiting:
+        # Fitted by another session meanwhile; fit here only if it failed or stalled there
+        record = registry.get(key) if event.wait(REGISTRY_WAIT_SECONDS) else None
+        if record is not None:
+            _reuse(stream, record)
+            continue
+        notify(stream, 'running')
+        try:
+            with stage('forecast_stream', stream):
+                result = _forecast_stream(stream, df_stream, regressors, periods)
+            registry.put(key, _collect(stream, result, data_hash, None))
+        except Exception as e:
+            print(f"❌ Forecast failed for {stream}: {e}")
+            notify(stream, 'failed')
+
+    if not forecast_results:
+        raise ValueError("No revenue stream could be forecast.")
+
+    # Reused and refit streams finish at different times; restore input order
+    return {stream: forecast_results[stream] for stream, _ in stream_frames if stream in forecast_results}
+
 # 3. ===Merge Historical Data with Forecast Results===
 
 def merge_forecast_with_history(forecast_results, monthly_revenue):
@@ -87,42 +472,176 @@ def merge_forecast_with_history(forecast_results, monthly_revenue):
 
 
 # === 4. Evaluate Forecast Performance (Cross-Validation) ===
-def evaluate_models(df):
-    cv_results = {}
-    performance_results = {}
+def _monthly_series_by_stream(df):
+    # Accepts the row-level revenue frame or pre-aggregated monthly_revenue (ds, Revenue Stream, y)
+    if 'y' in df.columns:
+        for stream, monthly in df.groupby('Revenue Stream', sort=False, observed=True):
+            yield stream, monthly[['ds', 'y']].reset_index(drop=True)
+        return
 
     for stream in df['Revenue Stream'].unique():
-        print(f"🔍 Running cross-validation for: {stream}")
+        stream_df = df[df['Revenue Stream'] == stream].copy()
+        stream_df['Revenue'] = stream_df['Unit Price'] * stream_df['Quantity']
+        monthly = stream_df.groupby(pd.Grouper(key='Order Date', freq='M'))['Revenue'].sum().reset_index()
+        monthly.columns = ['ds', 'y']
+        yield stream, monthly
+
 
+_cv_pools = {}
+_cv_pools_lock = threading.Lock()
+
+
+def get_cv_pool(n_jobs=None):
+    # Process pools for cross-validation live for the whole process (one per worker
+    # count), so repeated evaluations don't pay for spawning workers each time
+    n_jobs = resolve_n_jobs(n_jobs)
+    with _cv_pools_lock:
+        if n_jobs not in _cv_pools:
+            _cv_pools[n_jobs] = ProcessPoolExecutor(max_workers=n_jobs, mp_context=POOL_CONTEXT)
+        return _cv_pools[n_jobs]
+
+
+def _discard_cv_pool(n_jobs, pool):
+    # A pool that lost a worker (e.g. OOM-killed) rejects every later submit with
+    # BrokenProcessPool, so it is dropped and the next get_cv_pool starts a fresh one
+    with _cv_pools_lock:
+        if _cv_pools.get(n_jobs) is pool:
+            del _cv_pools[n_jobs]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _cv_folds_on_pool(jobs, n_jobs):
+    # (stream, fold or None, error or None) per job, run on the persistent pool. If
+    # the pool breaks, it is replaced and the folds are run once more on the new one.
+    for attempt in range(2):
+        pool = get_cv_pool(n_jobs)
         try:
-            stream_df = df[df['Revenue Stream'] == stream].copy()
-            stream_df['Revenue'] = stream_df['Unit Price'] * stream_df['Quantity']
-            monthly = stream_df.groupby(pd.Grouper(key='Order Date', freq='M'))['Revenue'].sum().reset_index()
-            monthly.columns = ['ds', 'y']
+            futures = [
+                (stream, submit_profiled(pool, 'cv_fold', stream, _cv_forecast_at_cutoff, monthly, cutoff, horizon))
+                for stream, monthly, cutoff, horizon in jobs
+            ]
+        except BrokenProcessPool as e:
+            _discard_cv_pool(n_jobs, pool)
+            outcomes = [(stream, None, e) for stream, *_ in jobs]
+            continue
+        outcomes = []
+        for stream, future in futures:
+            try:
+                outcomes.append((stream, future.result(), None))
+            except Exception as e:
+                outcomes.append((stream, None, e))
+        if not any(isinstance(error, BrokenProcessPool) for *_, error in outcomes):
+            break
+        _discard_cv_pool(n_jobs, pool)
+    return outcomes
+
+
+def _cv_window(monthly):
+    total_months = (monthly['ds'].max().to_period('M') - monthly['ds'].min().to_period('M')).n
+    total_days = total_months * 30
 
-            total_months = (monthly['ds'].max().to_period('M') - monthly['ds'].min().to_period('M')).n
-            total_days = total_months * 30
+    initial = pd.Timedelta(days=int(total_days * 0.6))
+    period = pd.Timedelta(days=int(total_days * 0.2))
+    horizon = pd.Timedelta(days=int(total_days * 0.2))
+    return initial, period, horizon
 
-            initial_days = int(total_days * 0.6)
-            horizon_days = int(total_days * 0.2)
-            period_days = int(total_days * 0.2)
 
-            initial = f"{initial_days} days"
-            period = f"{period_days} days"
-            horizon = f"{horizon_days} days"
+def _cv_forecast_at_cutoff(monthly, cutoff, horizon):
+    # One CV fold: fit on history up to the cutoff, predict the following horizon
+    history = monthly[monthly['ds'] <= cutoff]
+    if history.shape[0] < 2:
+        raise ValueError("Less than two datapoints before cutoff.")
+    model = Prophet()
+    model.fit(history)
 
-            model = Prophet()
-            model.fit(monthly)
+    index_predicted = (monthly['ds'] > cutoff) & (monthly['ds'] <= cutoff + horizon)
+    yhat = model.predict(monthly.loc[index_predicted, ['ds']])
+    return pd.concat([
+        yhat[['ds', 'yhat', 'yhat_lower', 'yhat_upper']],
+        monthly.loc[index_predicted, ['y']].reset_index(drop=True),
+        pd.DataFrame({'cutoff': [cutoff] * len(yhat)}),
+    ], axis=1)
 
-            df_cv = cross_validation(model, initial=initial, period=period, horizon=horizon, parallel="processes")
-            df_p = performance_metrics(df_cv)
 
-            cv_results[stream] = df_cv
-            performance_results[stream] = df_p
-            print(f"✅ Done: {stream}\n")
+def _cv_engine_at_cutoff(engine, stream, monthly, cutoff, horizon):
+    # One CV fold through a batched engine (see FORECAST_ENGINES): fit on history up
+    # to the cutoff without regressors, like the Prophet folds, and predict the months
+    # up to cutoff + horizon
+    history = monthly[monthly['ds'] <= cutoff]
+    if history.shape[0] < 2:
+        raise ValueError("Less than two datapoints before cutoff.")
+    index_predicted = (monthly['ds'] > cutoff) & (monthly['ds'] <= cutoff + horizon)
+    actual = monthly.loc[index_predicted, ['ds', 'y']].reset_index(drop=True)
+    last_ds = actual['ds'].max() if len(actual) else history['ds'].max()
+    periods = max(len(pd.date_range(history['ds'].max(), last_ds, freq='M')) - 1, 1)
+    forecast = engine(history.assign(**{'Revenue Stream': stream}), None, periods)[stream]
+    yhat = actual[['ds']].merge(forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']], on='ds', how='left')
+    return pd.concat([yhat, actual[['y']], pd.DataFrame({'cutoff': [cutoff] * len(actual)})], axis=1)
 
+
+def evaluate_models(df, n_jobs=None, engine='prophet'):
+    # Cross-validation for every stream. Instead of one cross_validation call (and
+    # process pool) per stream, all (stream, cutoff) refits go into one queue on a
+    # persistent pool so every core stays busy across streams. Pre-aggregated
+    # monthly_revenue is used as-is; row-level input is aggregated per stream first.
+    # performance_df holds the metrics per stream and per horizon.
+    # engine is the forecaster being evaluated. Other engines than Prophet (names from
+    # FORECAST_ENGINES, or callables that accept regressors=None) are batched NumPy
+    # solves that take milliseconds per fold, so their folds run in this process.
+    cv_results = {}
+    performance_results = {}
+
+    jobs = []
+    for stream, monthly in _monthly_series_by_stream(df):
+        try:
+            initial, period, horizon = _cv_window(monthly)
+            cutoffs = generate_cutoffs(monthly, horizon, initial, period)
         except Exception as e:
             print(f"❌ Failed for {stream}: {e}")
+            continue
+        print(f"🔍 Running cross-validation for: {stream} ({len(cutoffs)} cutoffs)")
+        jobs.extend((stream, monthly, cutoff, horizon) for cutoff in cutoffs)
+
+    if engine == 'prophet':
+        n_jobs = min(resolve_n_jobs(n_jobs), max(len(jobs), 1))
+    else:
+        if not callable(engine) and engine not in FORECAST_ENGINES:
+            raise ValueError(f"Unknown forecast engine: {engine}")
+        engine_fn = engine if callable(engine) else FORECAST_ENGINES[engine]
+        n_jobs = 1
+    outcomes = []
+    if n_jobs == 1:
+        for stream, monthly, cutoff, horizon in jobs:
+            try:
+                with stage('cv_fold', stream):
+                    if engine == 'prophet':
+                        result = _cv_forecast_at_cutoff(monthly, cutoff, horizon)
+                    else:
+                        result = _cv_engine_at_cutoff(engine_fn, stream, monthly, cutoff, horizon)
+                outcomes.append((stream, result, None))
+            except Exception as e:
+                outcomes.append((stream, None, e))
+    else:
+        outcomes = _cv_folds_on_pool(jobs, n_jobs)
+
+    folds = {}
+    failed = set()
+    for stream, fold, error in outcomes:
+        if error is not None:
+            if stream not in failed:
+                print(f"❌ Failed for {stream}: {error}")
+                failed.add(stream)
+            continue
+        folds.setdefault(stream, []).append(fold)
+
+    for stream, stream_folds in folds.items():
+        if stream in failed:
+            continue
+        df_cv = pd.concat(stream_folds, ignore_index=True)
+        cv_results[stream] = df_cv
+        with stage('cv_metrics', stream):
+            performance_results[stream] = performance_metrics(df_cv)
+        print(f"✅ Done: {stream}\n")
 
     #==5 Combine all performance metrics into one DataFrame ==
     combined_performance = []
@@ -132,6 +651,313 @@ def evaluate_models(df):
         df_p['Revenue Stream'] = stream
         combined_performance.append(df_p)
 
-        performance_df = pd.concat(combined_performance, ignore_index=True)
+    if not combined_performance:
+        return cv_results, pd.DataFrame(columns=['horizon', 'Revenue Stream'])
+
+    performance_df = pd.concat(combined_performance, ignore_index=True)
+
+    return cv_results, performance_df
+
+
+# === 6. Hierarchical Forecasting (Total -> Revenue Stream -> Product) ===
+TOTAL_LABEL = 'All Streams'
+
+
+def fit_seasonal_linear_batch(Y, history_ds, periods, batch_size=5000):
+    # Y is a (months x series) matrix on a shared monthly grid. Every series uses the
+    # same design matrix, so its pseudo-inverse is computed once and each batch of
+    # series is fit and projected with two matrix products.
+    future_ds = pd.date_range(history_ds[-1], periods=periods + 1, freq='M')[1:]
+    X_history, X_future = _linear_design(history_ds, future_ds)
+    solver = np.linalg.pinv(X_history)
+
+    yhat = np.empty((periods, Y.shape[1]))
+    for start in range(0, Y.shape[1], batch_size):
+        coef = solver @ Y[:, start:start + batch_size]
+        yhat[:, start:start + batch_size] = X_future @ coef
+    return future_ds, yhat
+
+
+def reconcile_hierarchy(total_hat, stream_hat, product_hat, product_stream):
+    # OLS reconciliation (y~ = S (S'S)^-1 S' y^) solved in closed form for a three-level
+    # tree, so the cost is O(periods x products) instead of a products x products solve.
+    #   total_hat (H,), stream_hat (H, S), product_hat (H, P), product_stream (P,) stream index
+    # Returns reconciled product forecasts; streams and total are their sums.
+    n_streams = stream_hat.shape[1]
+    n = np.bincount(product_stream, minlength=n_streams).astype(float)
+
+    r = product_hat + stream_hat[:, product_stream] + total_hat[:, None]
+    R = np.stack([np.bincount(product_stream, weights=row, minlength=n_streams) for row in r])
+    T = (R / (1 + n)).sum(axis=1) / (1 + (n / (1 + n)).sum())
+    B = (R - n * T[:, None]) / (1 + n)
+    return r - B[:, product_stream] - T[:, None]
+
+
+def forecast_hierarchy(product_revenue, df_macro_monthly, periods=12, n_jobs=1, batch_size=5000,
+                       extrapolation='last', scenario=None):
+    # product_revenue: monthly revenue per stream and product, as returned by
+    # aggregate_monthly_revenue / aggregate_revenue_csv with by=PRODUCT_LEVEL.
+    # Products get the batched seasonal linear model, streams and the total get
+    # Prophet (in parallel via n_jobs), and all levels are reconciled to add up.
+    # Returns (forecast_results, product_forecast): forecast_results maps every stream
+    # plus TOTAL_LABEL to a Prophet-style frame whose future yhat/bounds are reconciled,
+    # product_forecast is a long frame (ds, Revenue Stream, Product Name, yhat).
+    wide = product_revenue.pivot_table(
+        index='ds', columns=['Revenue Stream', 'Product Name'], values='y', aggfunc='sum', fill_value=0
+    )
+    history_ds = pd.date_range(wide.index.min(), wide.index.max(), freq='M')
+    wide = wide.reindex(history_ds, fill_value=0)
+    Y = wide.to_numpy(dtype=float)
+
+    stream_of_product, stream_names = pd.factorize(wide.columns.get_level_values(0))
+    if TOTAL_LABEL in stream_names:
+        raise ValueError(f"'{TOTAL_LABEL}' is reserved for the hierarchy total.")
+
+    # Bottom level: every product in one batched least-squares fit
+    future_ds, product_hat = fit_seasonal_linear_batch(Y, history_ds, periods, batch_size)
+
+    # Upper levels: Prophet on the stream and total series built from the same grid
+    stream_y = np.stack(
+        [np.bincount(stream_of_product, weights=row, minlength=len(stream_names)) for row in Y]
+    )
+    upper = pd.DataFrame(stream_y, index=history_ds, columns=stream_names)
+    upper[TOTAL_LABEL] = Y.sum(axis=1)
+    upper_monthly = upper.rename_axis('ds').reset_index().melt(
+        id_vars='ds', var_name='Revenue Stream', value_name='y'
+    )
+    upper_results = forecast_revenue_streams(
+        upper_monthly, df_macro_monthly, periods=periods, n_jobs=n_jobs,
+        extrapolation=extrapolation, scenario=scenario
+    )
+
+    # Base forecasts on the common future grid; a stream Prophet could not fit falls
+    # back to the sum of its products
+    bottom_up = np.stack(
+        [np.bincount(stream_of_product, weights=row, minlength=len(stream_names)) for row in product_hat]
+    )
+    base = {}
+    for i, stream in enumerate(list(stream_names) + [TOTAL_LABEL]):
+        fallback = bottom_up.sum(axis=1) if stream == TOTAL_LABEL else bottom_up[:, i]
+        if stream in upper_results:
+            yhat = upper_results[stream].set_index('ds')['yhat'].reindex(future_ds).to_numpy()
+            base[stream] = np.where(np.isnan(yhat), fallback, yhat)
+        else:
+            base[stream] = fallback
+
+    stream_hat = np.column_stack([base[stream] for stream in stream_names])
+    reconciled = reconcile_hierarchy(base[TOTAL_LABEL], stream_hat, product_hat, stream_of_product)
+
+    reconciled_streams = np.stack(
+        [np.bincount(stream_of_product, weights=row, minlength=len(stream_names)) for row in reconciled]
+    )
+    reconciled_levels = {stream: reconciled_streams[:, i] for i, stream in enumerate(stream_names)}
+    reconciled_levels[TOTAL_LABEL] = reconciled.sum(axis=1)
+
+    forecast_results = {}
+    for stream, level_hat in reconciled_levels.items():
+        if stream in upper_results:
+            forecast = upper_results[stream].copy()
+        else:
+            forecast = pd.DataFrame({'ds': future_ds, 'yhat': level_hat, 'yhat_lower': level_hat,
+                                     'yhat_upper': level_hat, 'Revenue Stream': stream})
+        future_rows = forecast['ds'].isin(future_ds).to_numpy()
+        adjusted = pd.Series(level_hat, index=future_ds).reindex(forecast.loc[future_rows, 'ds']).to_numpy()
+        # keep Prophet's interval width around the reconciled point forecast
+        shift = adjusted - forecast.loc[future_rows, 'yhat'].to_numpy()
+        forecast.loc[future_rows, 'yhat'] = adjusted
+        forecast.loc[future_rows, 'yhat_lower'] += shift
+        forecast.loc[future_rows, 'yhat_upper'] += shift
+        forecast_results[stream] = forecast
+
+    product_forecast = pd.DataFrame({
+        'ds': np.repeat(future_ds.to_numpy(), len(wide.columns)),
+        'Revenue Stream': np.tile(wide.columns.get_level_values(0).to_numpy(), periods),
+        'Product Name': np.tile(wide.columns.get_level_values(1).to_numpy(), periods),
+        'yhat': reconciled.reshape(-1),
+    })
+    return forecast_results, product_forecast
+
+
+# === 7. Batched Seasonal Linear Engine ===
+LINEAR_BASE_COLUMNS = 13
+
+
+def _regressor_scale(regressors_history):
+    mean = regressors_history.mean(axis=0)
+    std = regressors_history.std(axis=0)
+    std[std == 0] = 1.0
+    return mean, std
+
+
+def _linear_design(history_ds, future_ds, regressors_history=None, regressors_future=None):
+    # Intercept, linear trend, 11 month-of-year dummies (January is the baseline) and
+    # optional regressors standardised on the history, for history and future months
+    ds = history_ds.append(future_ds)
+    n_history = len(history_ds)
+    X = np.zeros((len(ds), LINEAR_BASE_COLUMNS))
+    X[:, 0] = 1.0
+    X[:, 1] = np.arange(len(ds)) / max(n_history - 1, 1)
+    months = np.asarray(ds.month)
+    rows = np.flatnonzero(months > 1)
+    X[rows, months[rows]] = 1.0
+
+    if regressors_history is not None:
+        mean, std = _regressor_scale(regressors_history)
+        R = (np.vstack([regressors_history, regressors_future]) - mean) / std
+        X = np.hstack([X, R])
+    return X[:n_history], X[n_history:]
+
+
+def forecast_streams_linear(monthly_revenue, regressors, periods=12, interval_width=0.8, effects=None):
+    # Seasonal linear regression on trend, month of year and the macro regressors,
+    # fit for every stream at once: streams observed on the same months share one
+    # design matrix, so a single least-squares solve covers all of them. Prediction
+    # intervals are the analytic OLS ones, yhat +/- z * s * sqrt(1 + x0' (X'X)^-1 x0).
+    # regressors=None fits trend and month of year only.
+    wide = monthly_revenue.pivot_table(index='ds', columns='Revenue Stream', values='y', aggfunc='sum',
+                                       observed=True)
+    streams = list(monthly_revenue['Revenue Stream'].drop_duplicates())
+    history_ds = pd.date_range(wide.index.min(), wide.index.max(), freq='M')
+    wide = wide.reindex(index=history_ds, columns=streams)
+    future_ds = pd.date_range(history_ds[-1], periods=periods + 1, freq='M')[1:]
+
+    if regressors is None:
+        # trend and seasonality only (cross-validation folds, see evaluate_models)
+        X_history, X_future = _linear_design(history_ds, future_ds)
+    else:
+        macro = regressors.set_index('ds')[REGRESSORS].reindex(history_ds.append(future_ds))
+        macro_values = macro.to_numpy(dtype=float)
+        X_history, X_future = _linear_design(history_ds, future_ds,
+                                             macro_values[:len(history_ds)], macro_values[len(history_ds):])
+        _, macro_std = _regressor_scale(macro_values[:len(history_ds)])
+    z = NormalDist().inv_cdf(0.5 + interval_width / 2)
+
+    Y = wide.to_numpy(dtype=float)
+    observed = ~np.isnan(Y)
+    patterns, pattern_of_stream = np.unique(observed, axis=1, return_inverse=True)
+    pattern_of_stream = np.asarray(pattern_of_stream).reshape(-1)
+
+    forecast_results = {}
+    for p in range(patterns.shape[1]):
+        rows = patterns[:, p]
+        cols = np.flatnonzero(pattern_of_stream == p)
+        X = X_history[rows]
+        n_obs, n_params = X.shape
+        if n_obs < 2:
+            for col in cols:
+                print(f"❌ Forecast failed for {streams[col]}: fewer than 2 observed months")
+            continue
+
+        XtX_inv = np.linalg.pinv(X.T @ X)
+        coef = XtX_inv @ X.T @ Y[rows][:, cols]
+        residuals = Y[rows][:, cols] - X @ coef
+        dof = n_obs - min(n_params, np.linalg.matrix_rank(X))
+        sigma = np.sqrt((residuals ** 2).sum(axis=0) / dof) if dof > 0 else np.full(len(cols), np.nan)
+
+        X_out = np.vstack([X, X_future])
+        yhat = X_out @ coef
+        leverage = np.einsum('ij,jk,ik->i', X_out, XtX_inv, X_out)
+        half_width = z * np.sqrt(1 + leverage)[:, None] * sigma[None, :]
+        ds_out = history_ds[rows].append(future_ds)
+
+        for j, col in enumerate(cols):
+            stream = streams[col]
+            if effects is not None and regressors is not None:
+                # Coefficients are per standard deviation; convert to per unit
+                effects[stream] = coef[LINEAR_BASE_COLUMNS:, j] / macro_std
+            forecast_results[stream] = pd.DataFrame({
+                'ds': ds_out,
+                'yhat': yhat[:, j],
+                'yhat_lower': yhat[:, j] - half_width[:, j],
+                'yhat_upper': yhat[:, j] + half_width[:, j],
+                'Revenue Stream': stream,
+            })
+
+    return {stream: forecast_results[stream] for stream in streams if stream in forecast_results}
+
+
+FORECAST_ENGINES = {
+    'prophet': _forecast_streams_prophet,
+    'linear': forecast_streams_linear,
+}
+
+
+# === 8. Scenario Analysis (What-If on the Macro Regressors) ===
+class ScenarioCube:
+    # Forecasts for every scenario x stream x future month. yhat, yhat_lower and
+    # yhat_upper are arrays of shape (len(scenarios), len(streams), len(ds)).
+
+    def __init__(self, scenarios, streams, ds, yhat, yhat_lower, yhat_upper):
+        self.scenarios = list(scenarios)
+        self.streams = list(streams)
+        self.ds = ds
+        self.yhat = yhat
+        self.yhat_lower = yhat_lower
+        self.yhat_upper = yhat_upper
+
+    def to_frame(self):
+        n_scenarios, n_streams, n_months = self.yhat.shape
+        return pd.DataFrame({
+            'Scenario': np.repeat(self.scenarios, n_streams * n_months),
+            'Revenue Stream': np.tile(np.repeat(self.streams, n_months), n_scenarios),
+            'ds': np.tile(self.ds.to_numpy(), n_scenarios * n_streams),
+            'yhat': self.yhat.reshape(-1),
+            'yhat_lower': self.yhat_lower.reshape(-1),
+            'yhat_upper': self.yhat_upper.reshape(-1),
+        })
+
+    def totals(self):
+        # Scenario x month revenue summed over streams
+        return pd.DataFrame(np.nansum(self.yhat, axis=1), index=self.scenarios, columns=self.ds)
+
+
+class ScenarioForecaster:
+    # Fits every stream once and keeps, per stream, the baseline forecast and the
+    # fitted regressor coefficients. Both engines treat the regressors additively,
+    # so a scenario's forecast is baseline + coef . (x_scenario - x_baseline) for
+    # every month; predict() evaluates any number of trajectories in one einsum
+    # instead of refitting. Intervals keep their baseline width.
+
+    def __init__(self, monthly_revenue, df_macro_monthly, periods=12, n_jobs=1, engine='prophet',
+                 extrapolation='last', model_store=None):
+        effects = {}
+        forecast_results = forecast_revenue_streams(
+            monthly_revenue, df_macro_monthly, periods=periods, n_jobs=n_jobs, model_store=model_store,
+            engine=engine, extrapolation=extrapolation, effects=effects
+        )
+        self.streams = [stream for stream in forecast_results if stream in effects]
+        self.ds = forecast_months(monthly_revenue, periods)[-periods:]
+
+        regressors = project_regressors(df_macro_monthly, self.ds, extrapolation=extrapolation)
+        self.baseline = regressors.set_index('ds')[REGRESSORS]
+
+        bands = [
+            forecast_results[stream].set_index('ds')[['yhat', 'yhat_lower', 'yhat_upper']].reindex(self.ds)
+            for stream in self.streams
+        ]
+        # (band, stream, month) and (stream, regressor)
+        self._base = np.stack([band.to_numpy(dtype=float).T for band in bands], axis=1)
+        self._effects = np.vstack([effects[stream] for stream in self.streams])
+
+    def shocked(self, shocks):
+        # Baseline trajectory with regressors scaled, e.g. {'Exchange Rate': 1.1}
+        unknown = set(shocks) - set(REGRESSORS)
+        if unknown:
+            raise ValueError(f"Unknown regressors: {sorted(unknown)}")
+        return self.baseline * pd.Series(shocks).reindex(REGRESSORS, fill_value=1.0)
+
+    def predict(self, scenarios):
+        # scenarios: {name: trajectory}, a trajectory being a frame indexed by ds with
+        # some REGRESSORS columns (months/regressors it leaves out keep the baseline)
+        # or an array of shape (len(ds), len(REGRESSORS))
+        names = list(scenarios)
+        paths = np.empty((len(names), len(self.ds), len(REGRESSORS)))
+        for i, name in enumerate(names):
+            trajectory = scenarios[name]
+            if isinstance(trajectory, pd.DataFrame):
+                trajectory = trajectory.reindex(index=self.ds, columns=REGRESSORS).fillna(self.baseline)
+            paths[i] = np.asarray(trajectory, dtype=float)
 
-        return cv_results, performance_df
+        shift = np.einsum('smr,kr->skm', paths - self.baseline.to_numpy()[None], self._effects)
+        yhat, yhat_lower, yhat_upper = (self._base[band][None] + shift for band in range(3))
+        return ScenarioCube(names, self.streams, self.ds, yhat, yhat_lower, yhat_upper)
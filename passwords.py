@@ -0,0 +1,174 @@
+# passwords.py
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Work factor for new hashes; stored hashes with fewer iterations are upgraded on login
+PBKDF2_ITERATIONS = int(os.environ.get("FINOPTIX_PBKDF2_ITERATIONS", "600000"))
+# Threads hashing at once: a burst of logins queues here instead of taking every core
+HASH_WORKERS = int(os.environ.get("FINOPTIX_HASH_WORKERS", "2"))
+# Failed logins per email allowed within the window before further attempts are refused
+MAX_LOGIN_ATTEMPTS = int(os.environ.get("FINOPTIX_MAX_LOGIN_ATTEMPTS", "5"))
+LOGIN_WINDOW_SECONDS = float(os.environ.get("FINOPTIX_LOGIN_WINDOW_SECONDS", "900"))
+
+ALGORITHM = "pbkdf2_sha256"
+
+
+# === 1. Hashing ===
+def hash_password(password, iterations=None):
+    # "pbkdf2_sha256$<iterations>$<salt>$<digest>" with a random 16-byte salt
+    iterations = iterations or PBKDF2_ITERATIONS
+    salt = secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return "$".join([
+        ALGORITHM, str(iterations),
+        base64.b64encode(salt).decode(), base64.b64encode(digest).decode(),
+    ])
+
+
+def _parse(stored):
+    # (iterations, salt, digest), or None for a legacy plaintext password
+    parts = stored.split("$")
+    if len(parts) != 4 or parts[0] != ALGORITHM:
+        return None
+    try:
+        return int(parts[1]), base64.b64decode(parts[2]), base64.b64decode(parts[3])
+    except ValueError:
+        return None
+
+
+def needs_rehash(stored):
+    parsed = _parse(stored)
+    return parsed is None or parsed[0] < PBKDF2_ITERATIONS
+
+
+def verify_password(password, stored):
+    # Returns (ok, needs_rehash). Plaintext entries from the old users.json still
+    # verify, but always ask to be replaced by a hash, as do hashes made with a
+    # lower work factor than the current one.
+    parsed = _parse(stored)
+    if parsed is None:
+        return hmac.compare_digest(password.encode(), stored.encode()), True
+    iterations, salt, digest = parsed
+    candidate = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return hmac.compare_digest(candidate, digest), iterations < PBKDF2_ITERATIONS
+
+
+# === 2. Verification Cache ===
+class VerificationCache:
+    # Remembers recent successful verifications so Streamlit reruns and repeated
+    # logins don't pay for key stretching again. Entries are keyed by an HMAC (with
+    # a per-process random key) of email, password and stored hash, so the cache
+    # holds no reusable password material and a password change invalidates it.
+
+    def __init__(self, ttl=300.0, max_entries=10_000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._key = secrets.token_bytes(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _fingerprint(self, email, password, stored):
+        message = "\0".join([email, password, stored]).encode()
+        return hmac.new(self._key, message, hashlib.sha256).digest()
+
+    def hit(self, email, password, stored):
+        fingerprint = self._fingerprint(email, password, stored)
+        now = time.monotonic()
+        with self._lock:
+            expires = self._entries.get(fingerprint)
+            if expires is None or expires < now:
+                self._entries.pop(fingerprint, None)
+                return False
+            self._entries.move_to_end(fingerprint)
+            return True
+
+    def add(self, email, password, stored):
+        fingerprint = self._fingerprint(email, password, stored)
+        with self._lock:
+            self._entries[fingerprint] = time.monotonic() + self.ttl
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# === 3. Per-Email Throttling ===
+class LoginThrottle:
+    # Counts failed attempts per email in a fixed window; once max_attempts is
+    # reached, further attempts are refused before any hashing happens, so a
+    # brute-force run costs at most max_attempts hashes per email per window.
+
+    def __init__(self, max_attempts=MAX_LOGIN_ATTEMPTS, window=LOGIN_WINDOW_SECONDS):
+        self.max_attempts = max_attempts
+        self.window = window
+        self._failures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def retry_after(self, email):
+        # Seconds until email may try again, 0 if it may try now
+        with self._lock:
+            entry = self._failures.get(email)
+            if entry is None:
+                return 0
+            count, window_start = entry
+            remaining = window_start + self.window - time.monotonic()
+            if remaining <= 0:
+                del self._failures[email]
+                return 0
+            return remaining if count >= self.max_attempts else 0
+
+    def failure(self, email):
+        now = time.monotonic()
+        with self._lock:
+            count, window_start = self._failures.get(email, (0, now))
+            if window_start + self.window <= now:
+                count, window_start = 0, now
+            self._failures[email] = (count + 1, window_start)
+            if count == 0:
+                # a new window: kept ordered by window start, oldest first
+                self._failures.move_to_end(email)
+            self._prune(now)
+
+    def _prune(self, now):
+        # caller holds self._lock. Drops expired windows from the oldest end, so
+        # failures for many distinct (or made-up) emails can't grow the dict beyond
+        # the emails that failed within the last window
+        while self._failures:
+            email, (_, window_start) = next(iter(self._failures.items()))
+            if window_start + self.window > now:
+                break
+            self._failures.popitem(last=False)
+
+    def success(self, email):
+        with self._lock:
+            self._failures.pop(email, None)
+
+
+# === 4. Shared Instances ===
+_hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="finoptix-hash")
+verification_cache = VerificationCache()
+login_throttle = LoginThrottle()
+
+
+# The pool caps how many PBKDF2 computations run at once across all sessions.
+# Callers still wait for their own hash, so it bounds CPU use under a burst of
+# logins rather than taking the work off the request thread.
+def hash_password_pooled(password):
+    return _hash_executor.submit(hash_password, password).result()
+
+
+def check_password(email, password, stored):
+    # verify_password through the cache and the bounded hashing pool
+    if verification_cache.hit(email, password, stored):
+        return True, needs_rehash(stored)
+    ok, rehash = _hash_executor.submit(verify_password, password, stored).result()
+    if ok:
+        verification_cache.add(email, password, stored)
+    return ok, rehash
@@ -0,0 +1,212 @@
+# profiler.py
+
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+import tracemalloc
+from concurrent.futures import Future
+
+import pandas as pd
+
+# Set FINOPTIX_PROFILE=1 to profile every dashboard run
+PROFILE_ENABLED = os.environ.get("FINOPTIX_PROFILE", "0") not in ("", "0")
+
+# memory is "own" when peak_mb is the stage's own figure, "shared" when another
+# thread's stage overlapped it (peak_mb is then None) and None when not tracing
+RECORD_COLUMNS = ["stage", "stream", "wall_s", "cpu_s", "peak_mb", "memory", "pid"]
+
+# The profiler collecting stages for the current thread / context, or None. Each
+# Streamlit session runs in its own thread, so sessions never see each other's stages.
+_active = contextvars.ContextVar("finoptix_profiler", default=None)
+_NULL_STAGE = contextlib.nullcontext()
+
+# tracemalloc keeps a single peak for the whole process, so only one thread at a
+# time (the owner) may reset and read it. _open counts open stages per thread and
+# _overlaps bumps whenever a stage opens while another thread has one open, which
+# is how a stage learns that its peak includes someone else's allocations.
+_memory_lock = threading.Lock()
+_memory_owner = None
+_open = {}
+_overlaps = 0
+
+
+# === 1. Stage Records ===
+class Profiler:
+    # Wall time, CPU time of the calling thread and peak traced Python memory per
+    # stage, optionally per stream. Nested stages each get their own record; a
+    # parent's peak covers its children. Threads not running a stage (e.g. plain
+    # Streamlit reruns) still allocate into the process-wide peak and can't be seen.
+
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextlib.contextmanager
+    def stage(self, name, stream=None):
+        stack = self._stack()
+        tracing = tracemalloc.is_tracing()
+        frame = {"base": 0, "peak": 0, "owns": False}
+        if tracing:
+            _open_stage(frame, stack)
+        stack.append(frame)
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall_start, time.thread_time() - cpu_start
+            stack.pop()
+            peak_mb, memory = None, None
+            if tracing:
+                peak_mb, memory = _close_stage(frame, stack)
+            self.add({"stage": name, "stream": stream, "wall_s": wall, "cpu_s": cpu,
+                      "peak_mb": peak_mb, "memory": memory, "pid": os.getpid()})
+
+    def add(self, record):
+        with self._lock:
+            self.records.append(record)
+
+    def extend(self, records):
+        with self._lock:
+            self.records.extend(records)
+
+    # === 2. Export ===
+    def to_frame(self):
+        with self._lock:
+            return pd.DataFrame(list(self.records), columns=RECORD_COLUMNS)
+
+    def summary(self):
+        # One row per stage: number of calls, total wall/CPU time, largest own peak
+        # and how many calls overlapped another thread's stage (no peak of their own)
+        records = self.to_frame()
+        if records.empty:
+            return pd.DataFrame(columns=["stage", "calls", "wall_s", "cpu_s", "peak_mb", "peak_shared"])
+        summary = records.assign(shared=records["memory"].eq("shared")).groupby("stage", sort=False).agg(
+            calls=("wall_s", "size"), wall_s=("wall_s", "sum"), cpu_s=("cpu_s", "sum"), peak_mb=("peak_mb", "max"),
+            peak_shared=("shared", "sum")
+        )
+        return summary.reset_index()
+
+    def to_json(self, path=None):
+        payload = json.dumps({
+            "summary": self.summary().to_dict(orient="records"),
+            "records": self.to_frame().to_dict(orient="records"),
+        }, indent=2, default=str)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(payload)
+        return payload
+
+    def to_csv(self, path=None):
+        return self.to_frame().to_csv(path, index=False)
+
+
+def _open_stage(frame, stack):
+    # Takes the peak for this thread if no other thread holds it; nested stages of
+    # the owner fold the peak so far into their parent before resetting it
+    global _memory_owner, _overlaps
+    me = threading.get_ident()
+    with _memory_lock:
+        frame["shared"] = any(thread != me for thread in _open)
+        if frame["shared"]:
+            _overlaps += 1
+        _open[me] = _open.get(me, 0) + 1
+        frame["overlaps"] = _overlaps
+        if _memory_owner is None:
+            _memory_owner = me
+        frame["owns"] = _memory_owner == me
+        if frame["owns"]:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+            tracemalloc.reset_peak()
+            frame["base"] = frame["peak"] = current
+
+
+def _close_stage(frame, stack):
+    # (peak_mb, memory) for a finished stage; peak_mb is None unless this thread
+    # held the peak for the whole stage and no other thread's stage overlapped it
+    global _memory_owner
+    me = threading.get_ident()
+    with _memory_lock:
+        _open[me] -= 1
+        if not _open[me]:
+            del _open[me]
+            if _memory_owner == me:
+                _memory_owner = None
+        if not frame["owns"]:
+            return None, "shared"
+        peak = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+        if stack:
+            stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+        if frame["shared"] or frame["overlaps"] != _overlaps:
+            return None, "shared"
+        return (peak - frame["base"]) / 2**20, "own"
+
+
+# === 3. Instrumentation Hooks ===
+@contextlib.contextmanager
+def profiling(profiler=None, trace_memory=True):
+    # Collects every stage() below this block into profiler (a new one by default)
+    profiler = profiler if profiler is not None else Profiler()
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    token = _active.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _active.reset(token)
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def active_profiler():
+    return _active.get()
+
+
+def stage(name, stream=None):
+    # Context manager timing one stage; a shared no-op when nothing is profiling
+    profiler = _active.get()
+    if profiler is None:
+        return _NULL_STAGE
+    return profiler.stage(name, stream)
+
+
+def run_profiled(name, stream, func, *args, **kwargs):
+    # Pool-worker side of submit_profiled: runs func as one stage under a fresh
+    # profiler and returns its records along with the result
+    with profiling() as profiler:
+        with profiler.stage(name, stream):
+            result = func(*args, **kwargs)
+    return result, profiler.records
+
+
+def submit_profiled(pool, name, stream, func, *args, **kwargs):
+    # pool.submit(func, ...) that, while profiling, also times the call inside the
+    # worker and merges the worker's stage records into the active profiler
+    profiler = _active.get()
+    if profiler is None:
+        return pool.submit(func, *args, **kwargs)
+
+    outer = Future()
+
+    def _unwrap(inner):
+        try:
+            result, records = inner.result()
+        except BaseException as e:
+            outer.set_exception(e)
+            return
+        profiler.extend(records)
+        outer.set_result(result)
+
+    pool.submit(run_profiled, name, stream, func, *args, **kwargs).add_done_callback(_unwrap)
+    return outer
@@ -0,0 +1,166 @@
+# reset_codes.py
+
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+
+from forecast_cache import atomic_write, shared_instance
+
+RESET_CODES_LOG = os.environ.get("FINOPTIX_RESET_CODES_LOG", "reset_codes.log")
+RESET_CODE_TTL_SECONDS = float(os.environ.get("FINOPTIX_RESET_CODE_TTL_SECONDS", "900"))
+RESET_CODE_MAX_ATTEMPTS = int(os.environ.get("FINOPTIX_RESET_CODE_MAX_ATTEMPTS", "5"))
+# Seconds between sweeps of expired codes by the shared store's daemon thread
+RESET_CODE_PURGE_SECONDS = 60.0
+# Server-side key for the code HMACs: FINOPTIX_RESET_CODE_SECRET, or else a random
+# key generated once into the key file. A 6-digit code has only 10^6 values, so a
+# plain hash in the log could be reversed by trying them all; without the key it can't.
+RESET_CODE_SECRET = os.environ.get("FINOPTIX_RESET_CODE_SECRET", "")
+RESET_CODE_KEY_FILE = os.environ.get("FINOPTIX_RESET_CODE_KEY_FILE", "reset_codes.key")
+
+
+def _load_secret(key_file=RESET_CODE_KEY_FILE):
+    if RESET_CODE_SECRET:
+        return RESET_CODE_SECRET.encode()
+    try:
+        # O_EXCL so two processes starting at once can't each write a different key
+        fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        with open(key_file, "rb") as f:
+            return f.read().strip()
+    secret = secrets.token_hex(32).encode()
+    with os.fdopen(fd, "wb") as f:
+        f.write(secret)
+    return secret
+
+
+def _code_hash(secret, code):
+    return hmac.new(secret, code.encode(), hashlib.sha256).hexdigest()
+
+
+# === Expiring Reset Codes ===
+class ResetCodeStore:
+    # Live codes are held in a dict keyed by email (O(1) issue/verify). Every change
+    # is appended as one JSON line to a log that is replayed on start, so codes
+    # survive restarts without rewriting a file per call. Once the log holds more
+    # dead lines than live codes, it is compacted: rewritten with just the live
+    # codes via atomic_write. Only an HMAC-SHA256 of each code, keyed with the
+    # server-side secret, is kept.
+    #
+    # Wall-clock expiry times are stored so they stay meaningful across restarts.
+
+    def __init__(self, path=RESET_CODES_LOG, ttl=RESET_CODE_TTL_SECONDS, max_attempts=RESET_CODE_MAX_ATTEMPTS,
+                 secret=None):
+        self.path = path
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self._secret = secret if secret is not None else _load_secret()
+        self._codes = {}
+        self._log_lines = 0
+        self._lock = threading.Lock()
+        self._replay()
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line after a crash
+                self._apply(entry)
+                self._log_lines += 1
+        self._purge_expired(time.time())
+
+    def _apply(self, entry):
+        email = entry["email"]
+        if entry["op"] == "issue":
+            self._codes[email] = {"hash": entry["hash"], "expires": entry["expires"], "attempts": 0}
+        elif entry["op"] == "attempt" and email in self._codes:
+            self._codes[email]["attempts"] += 1
+        elif entry["op"] == "consume":
+            self._codes.pop(email, None)
+
+    def _append(self, entry):
+        self._apply(entry)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        self._log_lines += 1
+        if self._log_lines > 2 * len(self._codes) + 64:
+            self._compact()
+
+    def _purge_expired(self, now):
+        expired = [email for email, code in self._codes.items() if code["expires"] <= now]
+        for email in expired:
+            del self._codes[email]
+        return len(expired)
+
+    def _compact(self):
+        def write(f):
+            for email, code in self._codes.items():
+                f.write(json.dumps({"op": "issue", "email": email, "hash": code["hash"],
+                                    "expires": code["expires"]}) + "\n")
+                for _ in range(code["attempts"]):
+                    f.write(json.dumps({"op": "attempt", "email": email}) + "\n")
+        atomic_write(self.path, write, "w")
+        self._log_lines = sum(1 + code["attempts"] for code in self._codes.values())
+
+    def issue(self, email):
+        # New 6-digit code for email, replacing any earlier one
+        code = f"{secrets.randbelow(900000) + 100000}"
+        with self._lock:
+            self._append({"op": "issue", "email": email, "hash": _code_hash(self._secret, code),
+                          "expires": time.time() + self.ttl})
+        return code
+
+    def verify(self, email, code):
+        # True for the live code of email. Each wrong guess counts as an attempt and
+        # the code is dropped once max_attempts is reached, as is an expired code.
+        with self._lock:
+            entry = self._codes.get(email)
+            if entry is None:
+                return False
+            if entry["expires"] <= time.time() or entry["attempts"] >= self.max_attempts:
+                self._append({"op": "consume", "email": email})
+                return False
+            if hmac.compare_digest(entry["hash"], _code_hash(self._secret, str(code))):
+                return True
+            self._append({"op": "attempt", "email": email})
+            if self._codes[email]["attempts"] >= self.max_attempts:
+                self._append({"op": "consume", "email": email})
+            return False
+
+    def consume(self, email):
+        with self._lock:
+            if email in self._codes:
+                self._append({"op": "consume", "email": email})
+
+    def purge(self):
+        # Drops expired codes and compacts the log; returns how many were dropped
+        with self._lock:
+            purged = self._purge_expired(time.time())
+            if purged or self._log_lines > len(self._codes):
+                self._compact()
+        return purged
+
+    def __len__(self):
+        return len(self._codes)
+
+
+def _purge_periodically(store, interval):
+    while True:
+        time.sleep(interval)
+        store.purge()
+
+
+@shared_instance
+def get_reset_code_store():
+    # Process-wide store; a daemon thread purges expired codes every RESET_CODE_PURGE_SECONDS
+    store = ResetCodeStore()
+    threading.Thread(target=_purge_periodically, args=(store, RESET_CODE_PURGE_SECONDS),
+                     name="finoptix-reset-purge", daemon=True).start()
+    return store
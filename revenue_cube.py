@@ -0,0 +1,266 @@
+# revenue_cube.py
+
+import numpy as np
+import pandas as pd
+
+from forecast_cache import atomic_write
+from model_utils import REVENUE_COLUMNS, REVENUE_DTYPES, STREAM_LEVEL
+from profiler import stage
+
+# Roll-up levels of the time axis; the cube itself is stored per day
+GRAINS = {"day": "D", "week": "W-SUN", "month": "M", "quarter": "Q"}
+DIMENSIONS = ('Revenue Stream', 'Product Name')
+MEASURES = ('Revenue', 'Quantity', 'Orders')
+# Key spaces up to this size are grouped with a dense count instead of a hash
+DENSE_KEYS = 1 << 22
+# Product label when the upload has no Product Name column
+NO_PRODUCT = "All"
+
+_VOCABULARIES = {'Revenue Stream': 'streams', 'Product Name': 'products'}
+_CODES = {'Revenue Stream': 'stream_code', 'Product Name': 'product_code'}
+_VOCAB_OF_CODE = {'day_code': 'days', 'stream_code': 'streams', 'product_code': 'products'}
+
+
+# === 1. Cube Storage ===
+class RevenueCube:
+    # Revenue, quantity and order count per day x stream x product, built once from the
+    # row-level orders. Days, streams and products are sorted vocabularies and every
+    # non-empty cell is one entry of parallel NumPy arrays (int32 codes into those
+    # vocabularies plus the three measures), sorted by day, stream, product.
+    # Weeks, months and quarters are roll-ups of the day axis, so any breakdown the
+    # dashboard asks for is a bincount over at most a few hundred thousand cells,
+    # never a re-group of the raw upload. Instances are not modified after creation.
+
+    def __init__(self, days, streams, products, day_code, stream_code, product_code, revenue, quantity, orders):
+        self.days = days
+        self.streams = streams
+        self.products = products
+        self.day_code = day_code
+        self.stream_code = stream_code
+        self.product_code = product_code
+        self.revenue = revenue
+        self.quantity = quantity
+        self.orders = orders
+        self._periods = {}
+
+    @classmethod
+    def empty(cls):
+        codes = np.empty(0, dtype=np.int32)
+        return cls(np.empty(0, dtype='datetime64[D]'), np.empty(0, dtype=str), np.empty(0, dtype=str),
+                   codes, codes, codes, np.empty(0), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+
+    @classmethod
+    def from_orders(cls, orders):
+        # Row-level orders (Order Date, Revenue Stream, Unit Price, Quantity and
+        # optionally Product Name) -> cube. Rows without a parseable date are dropped.
+        # Dates repeat heavily, so each distinct date string is parsed once.
+        date_code, dates = pd.factorize(orders['Order Date'])
+        day_of_date = pd.to_datetime(pd.Index(dates).astype(str)).values.astype('datetime64[D]')
+        # distinct strings can name the same day; code -1 (missing date) picks the NaT appended at the end
+        days, day_of_date = np.unique(np.append(day_of_date, np.datetime64('NaT')), return_inverse=True)
+        day_code = day_of_date[date_code]
+        valid = ~np.isnat(days[day_code])
+        # factorize works on the categorical codes, never on per-row strings
+        stream_code, streams = _sorted_codes(orders['Revenue Stream'])
+        valid &= stream_code >= 0
+        if 'Product Name' in orders.columns:
+            # orders without a product name are kept under NO_PRODUCT
+            product_code, products = _sorted_codes(orders['Product Name'], missing=NO_PRODUCT)
+        else:
+            product_code, products = np.zeros(len(orders), dtype=np.intp), np.array([NO_PRODUCT])
+        # float64 so float32 prices don't lose cents over millions of rows
+        revenue = orders['Unit Price'].to_numpy(dtype='float64') * orders['Quantity'].to_numpy()
+        return _reduce(
+            days, streams, products,
+            day_code[valid], stream_code[valid], product_code[valid],
+            revenue[valid], orders['Quantity'].to_numpy(dtype=np.int64)[valid], np.ones(valid.sum(), dtype=np.int64),
+        )
+
+    def __len__(self):
+        # number of non-empty cells
+        return len(self.day_code)
+
+    @property
+    def nbytes(self):
+        arrays = [self.days, self.streams, self.products, self.day_code, self.stream_code, self.product_code,
+                  self.revenue, self.quantity, self.orders]
+        return sum(array.nbytes for array in arrays)
+
+    def merge(self, other):
+        # Cube holding the sums of both; vocabularies are unioned and codes remapped
+        if len(other) == 0:
+            return self
+        if len(self) == 0:
+            return other
+        days = np.union1d(self.days, other.days)
+        streams = np.union1d(self.streams, other.streams)
+        products = np.union1d(self.products, other.products)
+
+        def remap(vocabulary, attr):
+            return np.concatenate([np.searchsorted(vocabulary, getattr(cube, _VOCAB_OF_CODE[attr]))[getattr(cube, attr)]
+                                   for cube in (self, other)])
+
+        return _reduce(
+            days, streams, products,
+            remap(days, 'day_code'), remap(streams, 'stream_code'), remap(products, 'product_code'),
+            np.concatenate([self.revenue, other.revenue]),
+            np.concatenate([self.quantity, other.quantity]),
+            np.concatenate([self.orders, other.orders]),
+        )
+
+    # === 2. Roll-up / Drill-down Queries ===
+    def _period_codes(self, grain):
+        # Per day of the vocabulary: code of its period, plus the period end dates
+        if grain not in self._periods:
+            if grain not in GRAINS:
+                raise ValueError(f"Unknown grain '{grain}', expected one of {', '.join(GRAINS)} or None.")
+            periods = pd.PeriodIndex(pd.DatetimeIndex(self.days), freq=GRAINS[grain])
+            codes, uniques = pd.factorize(periods, sort=True)
+            ends = uniques.to_timestamp(how='end').normalize().values if len(uniques) else \
+                np.empty(0, dtype='datetime64[ns]')
+            self._periods[grain] = (codes, ends)
+        return self._periods[grain]
+
+    def query(self, grain="month", by=STREAM_LEVEL, streams=None, products=None, start=None, end=None):
+        # Totals per period (grain: day/week/month/quarter, or None for no time axis)
+        # and per value of each column in `by` (Revenue Stream and/or Product Name),
+        # restricted to the given streams/products and to days in [start, end].
+        # Returns ds (period end date), *by, Revenue, Quantity, Orders sorted by keys.
+        by = list(by)
+        unknown = [col for col in by if col not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Cannot break down by {', '.join(unknown)}; the cube has {', '.join(DIMENSIONS)}.")
+
+        mask = np.ones(len(self), dtype=bool)
+        for col, selected in (('Revenue Stream', streams), ('Product Name', products)):
+            if selected is not None:
+                vocabulary = getattr(self, _VOCABULARIES[col])
+                mask &= np.isin(vocabulary, np.asarray(list(selected), dtype=str))[getattr(self, _CODES[col])]
+        if start is not None or end is not None:
+            in_range = np.ones(len(self.days), dtype=bool)
+            if start is not None:
+                in_range &= self.days >= np.datetime64(pd.Timestamp(start).date())
+            if end is not None:
+                in_range &= self.days <= np.datetime64(pd.Timestamp(end).date())
+            mask &= in_range[self.day_code]
+        # unfiltered queries read the cell arrays as views instead of copies
+        cells = slice(None) if mask.all() else mask
+
+        axes = []
+        if grain is not None:
+            period_of_day, ends = self._period_codes(grain)
+            axes.append(('ds', period_of_day[self.day_code[cells]], ends))
+        for col in by:
+            axes.append((col, getattr(self, _CODES[col])[cells], getattr(self, _VOCABULARIES[col])))
+
+        shape = [max(len(labels), 1) for *_, labels in axes]
+        if axes:
+            key = np.ravel_multi_index([codes for _, codes, _ in axes], shape)
+        else:
+            key = np.zeros(len(self.revenue[cells]), dtype=np.intp)
+        groups, inverse = _group(key, int(np.prod(shape)))
+
+        result = {}
+        for (col, _, labels), codes in zip(axes, np.unravel_index(groups, shape) if axes else ()):
+            # streams and products come back categorical: codes over the vocabulary, no per-row strings
+            result[col] = labels[codes] if col == 'ds' else pd.Categorical.from_codes(codes, labels)
+        result['Revenue'] = np.bincount(inverse, weights=self.revenue[cells], minlength=len(groups)).astype('float64')
+        for measure in ('Quantity', 'Orders'):
+            values = getattr(self, measure.lower())[cells]
+            result[measure] = np.bincount(inverse, weights=values, minlength=len(groups)).astype(np.int64)
+        return pd.DataFrame(result)
+
+    def monthly_revenue(self, by=STREAM_LEVEL):
+        # Same shape as aggregate_revenue_csv: ds, *by, y sorted by month then keys
+        by = list(by)
+        monthly = self.query("month", by=by)[['ds', *by, 'Revenue']].rename(columns={'Revenue': 'y'})
+        for col in by:
+            monthly[col] = monthly[col].astype(str)
+        return monthly
+
+    # === 3. Persistence ===
+    def save(self, path):
+        # One uncompressed .npz of the vocabularies and cell arrays, replaced atomically
+        def write(f):
+            np.savez(f, days=self.days, streams=self.streams, products=self.products,
+                     day_code=self.day_code, stream_code=self.stream_code, product_code=self.product_code,
+                     revenue=self.revenue, quantity=self.quantity, orders=self.orders)
+        return atomic_write(path, write, "wb")
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls(**{name: arrays[name] for name in arrays.files})
+
+
+def _sorted_codes(values, missing=None):
+    # (codes, sorted vocabulary of str) for values; missing values get code -1, or
+    # the code of `missing` when given. Sorted regardless of the input's category order.
+    codes, uniques = pd.factorize(values)
+    uniques = np.asarray(uniques, dtype=str)
+    vocabulary = np.unique(uniques if missing is None else np.append(uniques, missing))
+    remap = np.append(np.searchsorted(vocabulary, uniques),
+                      -1 if missing is None else np.searchsorted(vocabulary, missing))
+    # code -1 picks the last entry of remap
+    return remap[codes], vocabulary
+
+
+def _group(key, size):
+    # (sorted distinct keys, position of each key among them), like np.unique with
+    # return_inverse but without sorting every key. Small key spaces (most roll-ups)
+    # are counted densely in O(n + size); larger ones are hash-factorized and only
+    # the distinct keys are sorted.
+    if size <= DENSE_KEYS:
+        present = np.bincount(key, minlength=size) > 0
+        return np.flatnonzero(present), (np.cumsum(present) - 1)[key]
+    inverse, groups = pd.factorize(key)
+    order = np.argsort(groups)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return groups[order], rank[inverse]
+
+
+def _reduce(days, streams, products, day_code, stream_code, product_code, revenue, quantity, orders):
+    # Sums the measures of cells with the same (day, stream, product) and drops
+    # vocabulary entries no cell uses
+    shape = (max(len(days), 1), max(len(streams), 1), max(len(products), 1))
+    key = np.ravel_multi_index((day_code, stream_code, product_code), shape)
+    cells, inverse = _group(key, int(np.prod(shape)))
+    d, s, p = np.unravel_index(cells, shape)
+    used_days, d = np.unique(d, return_inverse=True)
+    used_streams, s = np.unique(s, return_inverse=True)
+    used_products, p = np.unique(p, return_inverse=True)
+    return RevenueCube(
+        days[used_days], streams[used_streams], products[used_products],
+        d.astype(np.int32), s.astype(np.int32), p.astype(np.int32),
+        np.bincount(inverse, weights=revenue, minlength=len(cells)),
+        np.bincount(inverse, weights=quantity, minlength=len(cells)).astype(np.int64),
+        np.bincount(inverse, weights=orders, minlength=len(cells)).astype(np.int64),
+    )
+
+
+# === 4. Building at Ingest ===
+def build_revenue_cube(filepath_or_buffer, chunksize=500_000):
+    # Streams a revenue CSV in chunks (narrow dtypes, only the needed columns) and
+    # folds each chunk into the cube, so peak memory tracks the number of cells.
+    # One pass gives both the cube and, via monthly_revenue(), the forecast input.
+    header = pd.read_csv(filepath_or_buffer, nrows=0).columns
+    if hasattr(filepath_or_buffer, "seek"):
+        filepath_or_buffer.seek(0)
+    usecols = REVENUE_COLUMNS + (['Product Name'] if 'Product Name' in header else [])
+    reader = pd.read_csv(
+        filepath_or_buffer,
+        usecols=usecols,
+        dtype={col: REVENUE_DTYPES[col] for col in usecols if col in REVENUE_DTYPES},
+        chunksize=chunksize,
+    )
+    cube = RevenueCube.empty()
+    chunks = iter(reader)
+    while True:
+        with stage('parse_csv'):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+        with stage('build_cube'):
+            cube = cube.merge(RevenueCube.from_orders(chunk))
+    return cube
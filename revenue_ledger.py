@@ -0,0 +1,169 @@
+# revenue_ledger.py
+
+import os
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+
+from forecast_cache import atomic_write
+from model_utils import REVENUE_COLUMNS, REVENUE_DTYPES, STREAM_LEVEL
+from profiler import stage
+from revenue_cube import RevenueCube
+
+# Column that identifies an order when the upload has one; otherwise the whole row does
+ORDER_ID_COLUMN = "Order ID"
+ORDER_ROW_COLUMNS = ['Order Date', 'Product Name', 'Revenue Stream', 'Unit Price', 'Quantity']
+# Key segments merged into one once there are more than this many
+MAX_KEY_SEGMENTS = 16
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+# === 1. Order Keys ===
+def order_keys(chunk, key_columns, seen=None):
+    # 64-bit key per row. Identical rows (no order id to tell them apart) get their
+    # occurrence number folded in, so the 2nd copy of a row in a file has a different
+    # key from the 1st. Re-uploading overlapping history therefore reproduces the
+    # same keys, while repeated orders within a file are all kept. `seen` holds the
+    # row count per hash over earlier chunks of the same file; returns (keys, seen).
+    h = pd.util.hash_pandas_object(chunk[key_columns], index=False).to_numpy()
+    hashes = pd.Series(h)
+    rank = hashes.groupby(h).cumcount().to_numpy(dtype=np.uint64)
+    counts = hashes.value_counts()
+    if seen is not None:
+        rank += hashes.map(seen).fillna(0).to_numpy(dtype=np.uint64)
+        counts = seen.add(counts, fill_value=0).astype('int64')
+    with np.errstate(over="ignore"):
+        return h ^ (rank * _GOLDEN), counts
+
+
+# === 2. Persisted Aggregate ===
+class RevenueLedger:
+    # Day x stream x product totals (revenue, quantity, order count; a RevenueCube) for
+    # one dataset, plus the keys of every order merged so far. ingest() folds only the
+    # rows whose keys are new into the cube, so adding last month's orders, or
+    # re-uploading a file that overlaps the history, costs O(delta) and never double counts.
+    #
+    # On disk: state.pkl holds the cube and the list of key segments; each
+    # ingest appends one sorted keys-<n>.npy segment (memory-mapped when checked)
+    # and then replaces state.pkl, so a crash mid-ingest leaves the previous state.
+
+    def __init__(self, ledger_dir):
+        self.ledger_dir = ledger_dir
+        self._lock = threading.Lock()
+        os.makedirs(ledger_dir, exist_ok=True)
+        self._load()
+
+    def _state_path(self):
+        return os.path.join(self.ledger_dir, "state.pkl")
+
+    def _load(self):
+        try:
+            with open(self._state_path(), "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            state = {"cube": RevenueCube.empty(), "segments": [], "next_segment": 0}
+        self.cube = state["cube"]
+        self.segments = state["segments"]
+        self.next_segment = state["next_segment"]
+
+    def _save(self):
+        state = {"cube": self.cube, "segments": self.segments, "next_segment": self.next_segment}
+        atomic_write(self._state_path(), lambda f: pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL), "wb")
+        # segments no longer listed (compacted or from an interrupted ingest)
+        for name in os.listdir(self.ledger_dir):
+            if name.startswith("keys-") and name not in self.segments:
+                os.remove(os.path.join(self.ledger_dir, name))
+
+    def _write_segment(self, keys):
+        name = f"keys-{self.next_segment:06d}.npy"
+        self.next_segment += 1
+        np.save(os.path.join(self.ledger_dir, name), np.sort(keys))
+        return name
+
+    def _segment(self, name):
+        return np.load(os.path.join(self.ledger_dir, name), mmap_mode="r")
+
+    def _known(self, keys):
+        # Mask of keys already merged, by binary search in every sorted segment
+        known = np.zeros(len(keys), dtype=bool)
+        for name in self.segments:
+            segment = self._segment(name)
+            if len(segment) == 0:
+                continue
+            pos = np.searchsorted(segment, keys).clip(max=len(segment) - 1)
+            known |= segment[pos] == keys
+        return known
+
+    def __len__(self):
+        # number of distinct orders merged so far
+        return sum(len(self._segment(name)) for name in self.segments)
+
+    def reset(self):
+        with self._lock:
+            self.cube = RevenueCube.empty()
+            self.segments = []
+            self._save()
+
+    def ingest(self, source, chunksize=500_000):
+        # Merges the orders in source (CSV path/buffer or a row-level DataFrame) and
+        # returns {"rows", "new", "duplicates", "touched"}, touched being the sorted
+        # (month, stream) pairs whose totals changed. touched is for reporting: refits
+        # are limited by the ModelStore/ModelRegistry, which compare each stream's data
+        # hash, so streams outside touched are reused without consulting it.
+        with self._lock:
+            chunks = _read_orders(source, chunksize)
+            key_columns = None
+            seen = None
+            new_keys = []
+            delta = RevenueCube.empty()
+            rows = 0
+            for chunk in chunks:
+                if key_columns is None:
+                    key_columns = [ORDER_ID_COLUMN] if ORDER_ID_COLUMN in chunk.columns else \
+                        [col for col in ORDER_ROW_COLUMNS if col in chunk.columns]
+                rows += len(chunk)
+                with stage('dedup_orders'):
+                    keys, seen = order_keys(chunk, key_columns, seen)
+                    fresh = ~self._known(keys)
+                if fresh.any():
+                    new_keys.append(keys[fresh])
+                    with stage('build_cube'):
+                        delta = delta.merge(RevenueCube.from_orders(chunk[fresh]))
+
+            new = sum(len(keys) for keys in new_keys)
+            touched = []
+            if new:
+                months = delta.query("month")
+                touched = list(zip(months['ds'], months['Revenue Stream']))
+                self.cube = self.cube.merge(delta)
+                self.segments.append(self._write_segment(np.concatenate(new_keys)))
+                if len(self.segments) > MAX_KEY_SEGMENTS:
+                    merged = np.concatenate([self._segment(name) for name in self.segments])
+                    self.segments = [self._write_segment(merged)]
+                self._save()
+            return {"rows": rows, "new": new, "duplicates": rows - new, "touched": touched}
+
+    def monthly_revenue(self, by=STREAM_LEVEL):
+        # Same shape as aggregate_revenue_csv: ds, *by, y sorted by month then keys
+        return self.cube.monthly_revenue(by)
+
+
+def _read_orders(source, chunksize):
+    if isinstance(source, pd.DataFrame):
+        # same dtypes as a parsed CSV, so both hash to the same order keys
+        orders = source.copy()
+        if pd.api.types.is_datetime64_any_dtype(orders['Order Date']):
+            orders['Order Date'] = orders['Order Date'].dt.strftime('%Y-%m-%d')
+        yield orders.astype({col: dtype for col, dtype in REVENUE_DTYPES.items() if col in orders.columns})
+        return
+    header = pd.read_csv(source, nrows=0).columns
+    if hasattr(source, "seek"):
+        source.seek(0)
+    usecols = [col for col in [*REVENUE_COLUMNS, 'Product Name', ORDER_ID_COLUMN] if col in header]
+    dtype = {col: REVENUE_DTYPES[col] for col in usecols if col in REVENUE_DTYPES}
+    if ORDER_ID_COLUMN in usecols:
+        dtype[ORDER_ID_COLUMN] = str
+    yield from pd.read_csv(source, usecols=usecols, dtype=dtype, chunksize=chunksize)
@@ -0,0 +1,73 @@
+# session_store.py
+
+import contextlib
+import os
+import shutil
+import time
+
+import pyarrow.feather as feather
+
+from forecast_cache import CACHE_DIR, atomic_write
+
+SESSION_DIR = os.path.join(CACHE_DIR, "sessions")
+# Sessions nobody has read or written for this long (e.g. the browser was closed
+# without logging out) are removed the next time any session writes a table
+SESSION_TTL_SECONDS = float(os.environ.get("FINOPTIX_SESSION_TTL_HOURS", "24")) * 3600
+
+
+# === Columnar Per-Session Tables ===
+# Uploads and pipeline outputs are written once as uncompressed Arrow IPC (Feather v2)
+# files, which can be memory-mapped. Session state then only holds file paths, and
+# each rerun maps the columns it needs instead of copying whole frames around.
+
+def _session_dir(session_id):
+    return os.path.join(SESSION_DIR, session_id)
+
+
+def _touch(session_dir):
+    # The directory's mtime marks the session's last activity
+    with contextlib.suppress(OSError):
+        os.utime(session_dir)
+
+
+def prune_sessions(now=None, keep=None):
+    # Removes session directories idle for longer than SESSION_TTL_SECONDS, except `keep`
+    now = time.time() if now is None else now
+    if not os.path.isdir(SESSION_DIR):
+        return
+    for session_id in os.listdir(SESSION_DIR):
+        path = _session_dir(session_id)
+        with contextlib.suppress(OSError):
+            if session_id != keep and now - os.path.getmtime(path) > SESSION_TTL_SECONDS:
+                shutil.rmtree(path, ignore_errors=True)
+
+
+def write_table(df, session_id, name):
+    prune_sessions(keep=session_id)
+    session_dir = _session_dir(session_id)
+    os.makedirs(session_dir, exist_ok=True)
+    _touch(session_dir)
+    # uncompressed so the file can be mapped without decoding
+    return atomic_write(
+        os.path.join(session_dir, f"{name}.arrow"),
+        lambda tmp_path: feather.write_feather(df.reset_index(drop=True), tmp_path, compression="uncompressed"),
+    )
+
+
+def read_table(path, columns=None):
+    _touch(os.path.dirname(path))
+    table = feather.read_table(path, columns=columns, memory_map=True)
+    # split_blocks keeps numeric columns as views over the mapped buffers
+    return table.to_pandas(split_blocks=True)
+
+
+def session_file(session_id, filename):
+    # Path for any other per-session file (e.g. exports); removed with the session
+    session_dir = _session_dir(session_id)
+    os.makedirs(session_dir, exist_ok=True)
+    _touch(session_dir)
+    return os.path.join(session_dir, filename)
+
+
+def clear_session(session_id):
+    shutil.rmtree(_session_dir(session_id), ignore_errors=True)
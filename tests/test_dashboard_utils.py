@@ -0,0 +1,190 @@
+"""dashboard_utils against the row-wise app.py code it replaced."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard_utils import (
+    FORECAST_TABLE_COLUMNS, MONTH_ORDER, FilterIndex, chart_data, compute_metrics, filter_combined, forecast_window,
+)
+
+SELECTIONS = [
+    ("All", "All", "All"),
+    ("March", "All", "All"),
+    ("All", "2021", "All"),
+    ("All", "All", "License"),
+    ("June", "2022", "Product"),
+    # nothing matches: a year outside the data, a stream that isn't there, a
+    # month past the end of the data
+    ("All", "1999", "All"),
+    ("All", "All", "Consulting"),
+    ("December", "2022", "License"),
+]
+
+
+@pytest.fixture(scope="module")
+def combined_df():
+    # 3 streams x 30 months (2020-01 .. 2022-06), the last 8 months forecast-only,
+    # rows interleaved by stream like the pipeline's output
+    rng = np.random.default_rng(7)
+    dates = pd.date_range("2020-01-31", periods=30, freq="ME")
+    index = pd.MultiIndex.from_product([dates, ["Product", "License", "Managed Service"]],
+                                       names=["Date", "Revenue Stream"])
+    df = index.to_frame(index=False)
+    forecast = rng.uniform(1_000, 10_000, len(df))
+    actual = forecast * rng.normal(1.0, 0.1, len(df))
+    actual[df["Date"] > dates[-9]] = np.nan
+    df["Actual Revenue"] = actual
+    df["Forecasted Revenue"] = forecast
+    df["Lower Estimate"] = forecast * 0.9
+    df["Upper Estimate"] = forecast * 1.1
+    return df
+
+
+# === Original app.py logic ===
+def legacy_options(combined_df):
+    unique_months = combined_df['Date'].dt.month_name().unique()
+    month_options = ["All"] + [m for m in MONTH_ORDER if m in unique_months]
+    year_options = ["All"] + sorted(combined_df['Date'].dt.year.unique().astype(str))
+    stream_options = ["All"] + sorted(combined_df["Revenue Stream"].unique())
+    return month_options, year_options, stream_options
+
+
+def legacy_filter(combined_df, month, year, stream):
+    filtered_df = combined_df
+    if month != "All":
+        filtered_df = filtered_df[filtered_df['Date'].dt.month_name() == month]
+    if year != "All":
+        filtered_df = filtered_df[filtered_df['Date'].dt.year.astype(str) == year]
+    if stream != "All":
+        filtered_df = filtered_df[filtered_df["Revenue Stream"] == stream]
+    return filtered_df
+
+
+def legacy_metrics(filtered_df):
+    revenue = filtered_df["Actual Revenue"].fillna(filtered_df["Forecasted Revenue"])
+    df_with_actuals = filtered_df.dropna(subset=["Actual Revenue"])
+    if not df_with_actuals.empty:
+        accuracy = 100 - (abs(df_with_actuals["Forecasted Revenue"] - df_with_actuals["Actual Revenue"])
+                          / df_with_actuals["Actual Revenue"] * 100).mean()
+    else:
+        accuracy = 0
+    rev_series = revenue[filtered_df["Date"].sort_values(kind="stable").index]
+    if len(rev_series) >= 2:
+        growth_rate = ((rev_series.iloc[-1] - rev_series.iloc[0]) / rev_series.iloc[0]) * 100 \
+            if rev_series.iloc[0] != 0 else 0
+    else:
+        growth_rate = 0
+    return {"total_revenue": revenue.sum(), "accuracy": accuracy, "growth_rate": growth_rate}
+
+
+def legacy_bounds(filtered_df):
+    lower = filtered_df.apply(lambda row: row["Lower Estimate"] if pd.isna(row["Actual Revenue"]) else None, axis=1)
+    upper = filtered_df.apply(lambda row: row["Upper Estimate"] if pd.isna(row["Actual Revenue"]) else None, axis=1)
+    return lower, upper
+
+
+def expected_window(filtered_df, horizon):
+    # The horizon whole months after the latest month with actuals (the old
+    # DateOffset version lost the last of them), else every forecast row
+    months = filtered_df["Date"].dt.to_period("M")
+    with_actuals = months[filtered_df["Actual Revenue"].notna()]
+    if with_actuals.empty:
+        rows = filtered_df["Forecasted Revenue"].notna()
+    else:
+        latest = with_actuals.max()
+        rows = months.apply(lambda m: latest < m <= latest + horizon)
+    return filtered_df.loc[rows, FORECAST_TABLE_COLUMNS].sort_values("Date", kind="stable")
+
+
+# === 1. Filter Options & Filtering ===
+@pytest.mark.parametrize("month, year, stream", SELECTIONS)
+def test_filter_combined_matches_chained_filters(combined_df, month, year, stream):
+    pd.testing.assert_frame_equal(filter_combined(combined_df, month, year, stream),
+                                  legacy_filter(combined_df, month, year, stream))
+
+
+def test_filter_combined_all_returns_frame_unchanged(combined_df):
+    assert filter_combined(combined_df) is combined_df
+
+
+def test_filter_index_options_match_legacy(combined_df):
+    assert FilterIndex(combined_df).options() == legacy_options(combined_df)
+
+
+@pytest.mark.parametrize("month, year, stream", SELECTIONS)
+def test_filter_index_matches_mask(combined_df, month, year, stream):
+    selected = FilterIndex(combined_df).select(combined_df, month, year, stream)
+    expected = filter_combined(combined_df, month, year, stream)
+    pd.testing.assert_frame_equal(selected, expected, check_index_type=not expected.empty)
+
+
+def test_filter_index_single_stream():
+    df = pd.DataFrame({"Date": pd.date_range("2023-01-31", periods=4, freq="ME"),
+                       "Revenue Stream": "License", "Actual Revenue": [1.0, 2.0, np.nan, np.nan],
+                       "Forecasted Revenue": 1.5, "Lower Estimate": 1.0, "Upper Estimate": 2.0})
+    index = FilterIndex(df)
+    assert index.options()[2] == ["All", "License"]
+    assert index.positions() is None
+    assert list(index.positions(stream="License")) == [0, 1, 2, 3]
+    assert list(index.positions(month="February", stream="License")) == [1]
+    assert len(index.positions(stream="Product")) == 0
+
+
+# === 2. Metrics ===
+@pytest.mark.parametrize("month, year, stream", SELECTIONS)
+def test_compute_metrics_matches_legacy(combined_df, month, year, stream):
+    filtered_df = filter_combined(combined_df, month, year, stream)
+    metrics, expected = compute_metrics(filtered_df), legacy_metrics(filtered_df)
+    assert metrics == pytest.approx(expected)
+
+
+def test_compute_metrics_empty_selection(combined_df):
+    empty = filter_combined(combined_df, stream="Consulting")
+    assert compute_metrics(empty) == {"total_revenue": 0.0, "accuracy": 0.0, "growth_rate": 0.0}
+
+
+def test_compute_metrics_forecast_only_selection(combined_df):
+    # no actuals: accuracy is 0 and growth runs over the forecasts
+    filtered_df = filter_combined(combined_df, month="May", year="2022", stream="License")
+    assert compute_metrics(filtered_df)["accuracy"] == 0.0
+    assert compute_metrics(filtered_df) == pytest.approx(legacy_metrics(filtered_df))
+
+
+# === 3. Chart Data ===
+@pytest.mark.parametrize("month, year, stream", SELECTIONS)
+def test_chart_data_matches_legacy(combined_df, month, year, stream):
+    filtered_df = filter_combined(combined_df, month, year, stream)
+    chart_df = chart_data(filtered_df)
+    assert chart_df["Date"].is_monotonic_increasing
+    chart_df = chart_df.sort_index()
+    lower, upper = legacy_bounds(filtered_df)
+    np.testing.assert_allclose(chart_df["Lower Bound"], lower.astype(float))
+    np.testing.assert_allclose(chart_df["Upper Bound"], upper.astype(float))
+    np.testing.assert_allclose(chart_df["Revenue"],
+                               filtered_df["Actual Revenue"].fillna(filtered_df["Forecasted Revenue"]))
+
+
+# === 4. Forecast Window Table ===
+@pytest.mark.parametrize("horizon", [1, 6, 12])
+@pytest.mark.parametrize("month, year, stream", SELECTIONS)
+def test_forecast_window(combined_df, month, year, stream, horizon):
+    filtered_df = filter_combined(combined_df, month, year, stream)
+    window = forecast_window(filtered_df, horizon)
+    pd.testing.assert_frame_equal(window, expected_window(filtered_df, horizon),
+                                  check_index_type=not window.empty)
+
+
+def test_forecast_window_counts_whole_months(combined_df):
+    # actuals end in 2021-10, so a 6-month window is 2021-11 .. 2022-04 for every stream
+    window = forecast_window(combined_df, 6)
+    assert window["Date"].dt.strftime("%Y-%m").unique().tolist() == [
+        "2021-11", "2021-12", "2022-01", "2022-02", "2022-03", "2022-04"]
+    assert len(window) == 6 * 3
+
+
+def test_forecast_window_without_actuals(combined_df):
+    filtered_df = filter_combined(combined_df, year="2022", month="May")
+    window = forecast_window(filtered_df, 1)
+    assert len(window) == 3
+    assert list(window.columns) == FORECAST_TABLE_COLUMNS
@@ -1,6 +1,181 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
 import streamlit as st
 import pandas as pd
 
+from forecast_cache import shared_instance
+
+# Expected columns and the kind of values each must hold
+REVENUE_SCHEMA = {"Order Date": "date", "Unit Price": "number", "Quantity": "number", "Revenue Stream": "text"}
+MACRO_SCHEMA = {"Order Date": "date", "Exchange Rate": "number", "Inflation Rate": "number"}
+
+# Leading bytes of a CSV parsed to check headers and sample dtypes
+SNIFF_BYTES = int(os.environ.get("FINOPTIX_UPLOAD_SNIFF_KB", "64")) * 1024
+PREVIEW_ROWS = 20
+_HASH_BLOCK = 1024 * 1024
+_MEMO_ENTRIES = 64
+
+
+# === 1. Upload Inspection ===
+class UploadCheck:
+    # What the first block of an upload tells us: its columns, the dtypes pandas
+    # infers from the sampled rows, a head(n) preview and any problems found
+    # (missing columns, or sampled values that don't fit the schema)
+
+    def __init__(self, name, digest, columns, dtypes, preview, errors):
+        self.name = name
+        self.digest = digest
+        self.columns = columns
+        self.dtypes = dtypes
+        self.preview = preview
+        self.errors = errors
+
+    @property
+    def valid(self):
+        return not self.errors
+
+
+def _is_excel(name):
+    return name.lower().endswith((".xlsx", ".xls"))
+
+
+def file_digest(file):
+    # SHA-256 of the file's bytes, read in blocks; the read position is restored
+    position = file.tell()
+    file.seek(0)
+    h = hashlib.sha256()
+    for block in iter(lambda: file.read(_HASH_BLOCK), b""):
+        h.update(block)
+    file.seek(position)
+    return h.hexdigest()
+
+
+def _sniff_csv(file):
+    # Parses only the first SNIFF_BYTES, cut back to the last complete line
+    file.seek(0)
+    block = file.read(SNIFF_BYTES)
+    truncated = file.read(1) != b""
+    file.seek(0)
+    if truncated and b"\n" in block:
+        block = block[:block.rindex(b"\n") + 1]
+    return pd.read_csv(io.BytesIO(block))
+
+
+def _sniff_excel(file, nrows):
+    # openpyxl opens the workbook read-only and stops after nrows rows
+    file.seek(0)
+    sample = pd.read_excel(file, nrows=nrows)
+    file.seek(0)
+    return sample
+
+
+def _schema_errors(sample, schema):
+    missing = [col for col in schema if col not in sample.columns]
+    errors = [f"missing columns: {', '.join(missing)}"] if missing else []
+    for col, kind in schema.items():
+        if col in missing or kind == "text":
+            continue
+        values = sample[col].dropna()
+        if kind == "number":
+            bad = pd.to_numeric(values, errors="coerce").isna()
+        else:
+            bad = pd.to_datetime(values.astype(str), errors="coerce").isna()
+        if bad.any():
+            errors.append(f"'{col}' should hold {kind}s, found {values[bad].iloc[0]!r}")
+    return errors
+
+
+def _inspect(file, name, digest, schema, nrows):
+    sample = _sniff_excel(file, nrows) if _is_excel(name) else _sniff_csv(file)
+    return UploadCheck(
+        name=name,
+        digest=digest,
+        columns=list(sample.columns),
+        dtypes={col: str(dtype) for col, dtype in sample.dtypes.items()},
+        preview=sample.head(nrows),
+        errors=_schema_errors(sample, schema),
+    )
+
+
+# === 2. Memoized Per File Hash ===
+class UploadInspector:
+    # Remembers the UploadCheck of recent files by content hash, so reruns (and other
+    # sessions uploading the same file) don't parse again. Streamlit uploads carry a
+    # file_id; its hash is remembered too, so a rerun doesn't even re-read the bytes.
+
+    def __init__(self, max_entries=_MEMO_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._checks = OrderedDict()
+        self._digests = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, memo, key, value):
+        # caller holds self._lock
+        memo[key] = value
+        memo.move_to_end(key)
+        while len(memo) > self.max_entries:
+            memo.popitem(last=False)
+
+    def digest(self, file):
+        file_id = getattr(file, "file_id", None)
+        with self._lock:
+            digest = self._digests.get(file_id) if file_id is not None else None
+        if digest is None:
+            digest = file_digest(file)
+            if file_id is not None:
+                with self._lock:
+                    self._remember(self._digests, file_id, digest)
+        return digest
+
+    def inspect(self, file, schema, nrows=PREVIEW_ROWS):
+        name = getattr(file, "name", "")
+        digest = self.digest(file)
+        key = (digest, _is_excel(name), tuple(schema.items()), nrows)
+        with self._lock:
+            check = self._checks.get(key)
+            if check is not None:
+                self._checks.move_to_end(key)
+                self.hits += 1
+                return check
+            self.misses += 1
+        check = _inspect(file, name, digest, schema, nrows)
+        with self._lock:
+            self._remember(self._checks, key, check)
+        return check
+
+
+@shared_instance
+def get_upload_inspector():
+    # Process-wide instance shared by every Streamlit session
+    return UploadInspector()
+
+
+def inspect_upload(file, schema, nrows=PREVIEW_ROWS):
+    return get_upload_inspector().inspect(file, schema, nrows)
+
+
+# === 3. Preview UI ===
+def _preview(label, file, schema):
+    if file is None:
+        st.warning(f"Please upload a {label.lower()} file.")
+        return
+    try:
+        check = inspect_upload(file, schema)
+    except Exception as e:
+        st.error(f"Error reading {label.lower()} file: {e}")
+        return
+    for error in check.errors:
+        st.error(f"❌ {label}: {error}")
+    st.subheader(f"{label} Preview (Top {PREVIEW_ROWS} Rows)")
+    st.dataframe(check.preview)
+
+
 def upload_and_preview_data():
     st.sidebar.header("📂 Upload Datasets")
 
@@ -8,32 +183,10 @@ def upload_and_preview_data():
     revenue_file = st.sidebar.file_uploader("Upload Revenue Data (CSV or Excel)", type=["csv", "xlsx"], key="revenue")
 
     if st.sidebar.button("Preview Revenue Data"):
-        if revenue_file is not None:
-            try:
-                if revenue_file.name.endswith(".csv"):
-                    revenue_df = pd.read_csv(revenue_file)
-                else:
-                    revenue_df = pd.read_excel(revenue_file)
-                st.subheader("Revenue Data Preview (Top 20 Rows)")
-                st.dataframe(revenue_df.head(20))
-            except Exception as e:
-                st.error(f"Error reading revenue file: {e}")
-        else:
-            st.warning("Please upload a revenue data file.")
+        _preview("Revenue Data", revenue_file, REVENUE_SCHEMA)
 
     # Upload Macroeconomic Data
     macro_file = st.sidebar.file_uploader("Upload Macroeconomic Data (CSV or Excel)", type=["csv", "xlsx"], key="macro")
 
     if st.sidebar.button("Preview Macroeconomic Data"):
-        if macro_file is not None:
-            try:
-                if macro_file.name.endswith(".csv"):
-                    macro_df = pd.read_csv(macro_file)
-                else:
-                    macro_df = pd.read_excel(macro_file)
-                st.subheader("Macroeconomic Data Preview (Top 20 Rows)")
-                st.dataframe(macro_df.head(20))
-            except Exception as e:
-                st.error(f"Error reading macroeconomic file: {e}")
-        else:
-            st.warning("Please upload a macroeconomic data file.")
+        _preview("Macroeconomic Data", macro_file, MACRO_SCHEMA)
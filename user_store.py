@@ -0,0 +1,166 @@
+# user_store.py
+
+import json
+import os
+import sqlite3
+import threading
+
+from forecast_cache import atomic_write, shared_instance
+
+USERS_FILE = "users.json"
+USERS_DB = os.environ.get("FINOPTIX_USERS_DB", "users.db")
+# "sqlite" (default) or "json" for the legacy single-file store
+USER_STORE_BACKEND = os.environ.get("FINOPTIX_USER_STORE", "sqlite")
+
+USER_FIELDS = ("first_name", "last_name", "password")
+
+
+# === 1. Legacy JSON File ===
+class JSONUserStore:
+    # The original users.json layout ({email: {first_name, last_name, password}}).
+    # Every call still parses the whole file, but writes are serialised by a lock and
+    # land via atomic_write, so concurrent sessions can't interleave a
+    # half-written file or lose each other's updates within this process.
+
+    def __init__(self, path=USERS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save(self, users):
+        atomic_write(self.path, lambda f: json.dump(users, f, indent=4), "w")
+
+    def get(self, email):
+        return self._load().get(email)
+
+    def add(self, email, record):
+        with self._lock:
+            users = self._load()
+            if email in users:
+                return False
+            users[email] = dict(record)
+            self._save(users)
+        return True
+
+    def update(self, email, **fields):
+        with self._lock:
+            users = self._load()
+            if email not in users:
+                return False
+            users[email].update(fields)
+            self._save(users)
+        return True
+
+    def items(self):
+        return self._load().items()
+
+    def __len__(self):
+        return len(self._load())
+
+
+# === 2. SQLite ===
+class SQLiteUserStore:
+    # One row per user, keyed (and therefore indexed) by email, so a login is a
+    # single primary-key lookup. WAL mode lets readers run alongside a writer, and
+    # each thread gets its own connection; uniqueness on registration is enforced
+    # by the primary key inside the insert itself, not by a read-then-write.
+
+    def __init__(self, path=USERS_DB, timeout=30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS users ("
+                "email TEXT PRIMARY KEY, first_name TEXT, last_name TEXT, password TEXT NOT NULL)"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, email):
+        row = self._connect().execute(
+            "SELECT first_name, last_name, password FROM users WHERE email = ?", (email,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {field: row[field] for field in USER_FIELDS if row[field] is not None}
+
+    def add(self, email, record):
+        values = [record.get(field) for field in USER_FIELDS]
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT INTO users (email, first_name, last_name, password) VALUES (?, ?, ?, ?)",
+                    (email, *values),
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def update(self, email, **fields):
+        unknown = set(fields) - set(USER_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown user fields: {sorted(unknown)}")
+        if not fields:
+            return self.get(email) is not None
+        assignments = ", ".join(f"{field} = ?" for field in fields)
+        with self._connect() as conn:
+            cursor = conn.execute(f"UPDATE users SET {assignments} WHERE email = ?", (*fields.values(), email))
+        return cursor.rowcount > 0
+
+    def items(self):
+        rows = self._connect().execute("SELECT email, first_name, last_name, password FROM users").fetchall()
+        return [
+            (row["email"], {field: row[field] for field in USER_FIELDS if row[field] is not None})
+            for row in rows
+        ]
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# === 3. Migration & Default Store ===
+def migrate_json_users(store, json_path=USERS_FILE):
+    # Copies users.json into store; users already in the store are left alone, so
+    # this is safe to run on every start. The JSON file itself is not modified.
+    # Returns the number of users imported.
+    if not os.path.exists(json_path):
+        return 0
+    imported = 0
+    for email, record in JSONUserStore(json_path).items():
+        if "password" in record and store.add(email, record):
+            imported += 1
+    return imported
+
+
+@shared_instance
+def get_user_store():
+    # Process-wide store shared by every Streamlit session; the SQLite backend
+    # picks up any users.json entries it doesn't have yet
+    if USER_STORE_BACKEND == "json":
+        return JSONUserStore()
+    if USER_STORE_BACKEND == "sqlite":
+        store = SQLiteUserStore()
+        migrate_json_users(store)
+        return store
+    raise ValueError(f"Unknown user store backend: {USER_STORE_BACKEND}")